@@ -0,0 +1,66 @@
+"""Excel column letter <-> column index lookup tables.
+
+Tables are built once on import and cover all columns Excel supports (A-XFD). Use these whenever a column letter or
+index needs to be converted, instead of computing them from character codes.
+"""
+
+import re
+
+MAX_COLUMNS = 16384
+
+def _build_letters() -> tuple[str, ...]:
+    letters = []
+    for index in range(1, MAX_COLUMNS+1):
+        chars = ''
+        while index > 0:
+            index, remainder = divmod(index-1, 26)
+            chars = chr(ord('A')+remainder)+chars
+        letters.append(chars)
+    return tuple(letters)
+
+# COLUMN_LETTERS[0] is 'A', so column index N has letter COLUMN_LETTERS[N-1].
+COLUMN_LETTERS = _build_letters()
+COLUMN_INDICES = {letter: index for index, letter in enumerate(COLUMN_LETTERS, start=1)}
+
+_CELL_PATTERN = re.compile(r'^([A-Z]+)(\d+)$')
+
+def letter(index: int) -> str:
+    """Returns column letter of a 1-based column index, e.g. 1 -> 'A', 27 -> 'AA'.
+
+    Args:
+        index (int): Column index, 1 <= index <= MAX_COLUMNS.
+
+    Returns:
+        str:
+        Column letter.
+    """
+    if not 1 <= index <= MAX_COLUMNS:
+        raise IndexError(f"Column index {index} is out of range 1-{MAX_COLUMNS}.")
+    return COLUMN_LETTERS[index-1]
+
+def index(col_letter: str) -> int:
+    """Returns 1-based column index of a column letter, e.g. 'A' -> 1, 'AA' -> 27.
+
+    Args:
+        col_letter (str): Column letter in uppercase.
+
+    Returns:
+        int:
+        Column index.
+    """
+    return COLUMN_INDICES[col_letter]
+
+def split_cell(cell: str) -> tuple[str, int]:
+    """Splits a cell reference into column letter and row number, e.g. 'AB12' -> ('AB', 12).
+
+    Args:
+        cell (str): Cell reference.
+
+    Returns:
+        tuple[str, int]:
+        Column letter and row number.
+    """
+    match = _CELL_PATTERN.match(cell)
+    if match is None:
+        raise ValueError(f"Invalid cell reference '{cell}'.")
+    return match.group(1), int(match.group(2))
@@ -1,13 +1,17 @@
 """CLI commands."""
 
+import datetime
 import json
 import logging
 import os
 import shutil
 
 import commands_utils
+import fetch_engine
+import intraday
 from paths import FilePaths
 from query import QueryVars, FetchData
+from settings_store import SettingsStore
 from sheets import WorkbookSheets
 import workbook_tools
 
@@ -67,8 +71,8 @@ def update_query() -> None:
         'However, use "decimals" only with float values (they would not make sense for ints or other types...)\n'
         'And if you want to leave default name values and don\'t care about rounding, remove the entire row!\n'
         '# Note that date column is always A; rest depend on the order they appear in query columns.\n'
-        '# Supports excel columns A-Z and AA-AZ; if your workbook exceeds this limit of 52 column names, '
-        'program crashes.')
+        '# Supports all excel columns A-XFD, so a query can have up to 16383 columns. Columns after Z are named '
+        'AA, AB, ..., AZ, BA and so on.')
     QUERY_COMMANDS_HELP = (
             '/////////////////////////////\n'
             'Query commands:\n'
@@ -130,8 +134,13 @@ def update_wb_file_name(select_wb: list[str] = []) -> None:
         if new_wb == 'yes':
             commands_utils.change_workbook(name_input, True, False)
         
-def fetch() -> int:
+def fetch(per_market: bool = False) -> int:
     """Get api data, modify it based on custom header values, then store it.
+
+    Args:
+        per_market (bool=False): Send a separate request to each query market concurrently and merge the results, 
+            instead of a single request to market endpoint of settings.json. Latency and row count of each market are 
+            printed.
     
     Returns:
         int:
@@ -141,7 +150,94 @@ def fetch() -> int:
     """
     logger.debug("commands.py> fetch")
     print('[fetch]->fetching data... ', end='')
-    request_data_json = commands_utils.requests_api_data()
+    if per_market:
+        request_data_json = commands_utils.requests_market_data()
+    else:
+        request_data_json = commands_utils.requests_api_data()
+    status = _store_fetched_data(request_data_json)
+    if status == 0:
+        commands_utils.save_snapshot(request_data_json, QueryVars.my_query)
+    return status
+
+def refresh(wb_names: list[str], per_market: bool = False) -> None:
+    """Fetches data of several workbooks at once and saves all of it to each workbook.
+
+    Requests of all workbooks share the same concurrency and rate limits, see fetch_engine.py. Once every request has 
+    finished, each workbook is selected in turn and its data is saved like with saveall(). Originally selected 
+    workbook is selected again at the end, also if saving raises an error.
+
+    Args:
+        wb_names (list[str]): Workbook names.
+        per_market (bool=False): Send a separate request to each query market, see fetch().
+    """
+    logger.debug(f"commands.py> refresh: Workbooks {wb_names}")
+    original_wb = FilePaths.wb_name
+    wb_requests = {}
+    for wb_name in wb_names:
+        try:
+            settings = SettingsStore.load(FilePaths.WB_FILES_ROOT_PATH/wb_name/'settings'/'settings.json')
+        except FileNotFoundError:
+            print(f"[refresh]->workbook '{wb_name}' not found, skipping.")
+            continue
+        url = f'https://scanner.tradingview.com/{settings["market"]}/scan'
+        wb_requests[wb_name] = (settings["query"], commands_utils.build_requests(settings["query"], url, per_market))
+    print(f'[refresh]->fetching data of {len(wb_requests)} workbooks... ', end='')
+    all_requests = [(url, query) for _, request_list in wb_requests.values() for _, url, query in request_list]
+    results = fetch_engine.run(all_requests)
+    position = 0
+    try:
+        for wb_name, (query, request_list) in wb_requests.items():
+            wb_results = results[position:position+len(request_list)]
+            position += len(request_list)
+            print(f'\n[refresh]->', end='')
+            commands_utils.change_workbook(wb_name, False, False)
+            try:
+                request_data_json = commands_utils.merge_responses(query, request_list, wb_results)
+            except Exception as err:
+                print(err)
+                continue
+            if _store_fetched_data(request_data_json) == 0:
+                workbook_tools.save(FetchData.query_data, commands_utils.get_date())
+    finally:
+        if FilePaths.wb_name != original_wb:
+            commands_utils.change_workbook(original_wb, False, False)
+
+def fetch_local(wb_name: str | None = None) -> int:
+    """Filters data of the latest fetch of a workbook with current query, without sending a new request.
+
+    Query filters, sort and range are evaluated locally on the cached data, so one broad fetch can be narrowed down by
+    several different queries. All columns used by these queries must be included in the broad query columns. Each 
+    workbook caches only its own fetches.
+
+    If wb_name is not passed, user is asked for it.
+
+    Args:
+        wb_name (str | None = None): Name of the workbook whose fetched data is filtered.
+
+    Returns:
+        int:
+        Same return values as fetch(), or -1 if cached data is unavailable or can't be filtered.
+    """
+    logger.debug("commands.py> fetch_local")
+    if wb_name is None:
+        wb_name = input('Enter workbook name of the fetched data, or leave empty for current workbook\n'
+                        '[fetch local]>>>').strip() or FilePaths.wb_name
+    print('[fetch local]->', end='')
+    request_data_json = commands_utils.filter_snapshot(QueryVars.my_query, wb_name)
+    if request_data_json is None:
+        return -1
+    return _store_fetched_data(request_data_json)
+
+def _store_fetched_data(request_data_json: dict) -> int:
+    """Cleans fetched data, writes it into display txt file and stores it to FetchData.
+
+    Args:
+        request_data_json (dict): Json data with 'totalCount' and 'data' keys.
+
+    Returns:
+        int:
+        0 if data creation was succesful, else -1.
+    """
     if request_data_json['totalCount'] != 0:
         if request_data_json['data'][0]['d'] != []:
             dataframe_cleaned = commands_utils.clean_fetched_data(request_data_json)
@@ -195,6 +291,63 @@ def saveall() -> None:
     for sym in FetchData.query_data:
         print(sym[0])
 
+def save_intraday() -> None:
+    """Saves all fetched symbol data as a timestamped intraday snapshot.
+
+    Unlike saveall(), data is not added to the workbook but to data/intraday folder, where each snapshot keeps its 
+    fetch time. See intraday.py for storage details.
+    """
+    logger.debug("commands.py> save_intraday")
+    print('[save intraday]->', end='')
+    if FetchData.query_data == []:
+        logger.debug("commands.py> save_intraday: No query data")
+        print('No data available to save. Fetch data before you attempt to save it.')
+        return
+    try:
+        changed = intraday.append(FetchData.query_data)
+    except ValueError as err:
+        print(err)
+        return
+    print(f'snapshot saved, {changed}/{len(FetchData.query_data)} symbols had new values.')
+
+def _parse_datetime(value: str, end_of_day: bool = False) -> datetime.datetime:
+    parsed = datetime.datetime.fromisoformat(value)
+    if end_of_day and len(value) == 10:
+        return parsed.replace(hour=23, minute=59, second=59, microsecond=999999)
+    return parsed
+
+def intraday_history(symbol: str | None = None, since: str | None = None, until: str | None = None) -> None:
+    """Prints intraday snapshot values of a symbol, e.g. to follow its pre-market evolution.
+
+    If symbol is not passed, user is asked for symbol and time window.
+
+    Args:
+        symbol (str | None = None): Symbol name.
+        since (str | None = None): Window start as 'YYYY-MM-DD' or 'YYYY-MM-DD HH:MM'. Default is start of today.
+        until (str | None = None): Window end as 'YYYY-MM-DD' or 'YYYY-MM-DD HH:MM'. Default is end of since date.
+    """
+    logger.debug("commands.py> intraday_history")
+    if symbol is None:
+        history_input = input('Enter symbol and optional time window separated with \';\', e.g.\n'
+                              'NVDA; 2025-01-06 04:00; 2025-01-06 09:30\n'
+                              '[intraday history]>>>')
+        values = [val.strip() for val in history_input.split(';')]
+        symbol = values[0]
+        since = values[1] if len(values) > 1 and values[1] != '' else None
+        until = values[2] if len(values) > 2 and values[2] != '' else None
+    try:
+        start = _parse_datetime(since) if since is not None else datetime.datetime.combine(datetime.date.today(), 
+                                                                                            datetime.time())
+        end = _parse_datetime(until, True) if until is not None else start.replace(hour=23, minute=59, second=59)
+    except ValueError:
+        print("Invalid time given. Use format 'YYYY-MM-DD' or 'YYYY-MM-DD HH:MM'.")
+        return
+    df = intraday.history(symbol, start, end)
+    if len(df.index) == 0:
+        print(f"No intraday snapshots of '{symbol}' between {start} and {end}.")
+        return
+    print(df.to_string(index=False))
+
 def print_query() -> None:
     """Prints current query in json format."""
     print(json.dumps(QueryVars.my_query, indent=4))
@@ -202,12 +355,12 @@ def print_query() -> None:
 def update_date_format() -> None:
     """Updates dates to current format."""
     logger.debug("commands.py> update_date_formet")
-    first_row = input('Give a row number (>= 2) where updating starts. Base value is 2:'+
-                      ' for this, leave empty input.\n'
+    first_row = input('Give a row number (>= 2) where updating starts, restyling all rows after it. To update only '
+                      'rows which haven\'t been formatted yet, leave empty input.\n'
                       '[update date]>>>')
     logger.debug(f"commands.py> update_date_format: Input '{first_row}'")
     if first_row == '':
-        workbook_tools.update_datetime(2)
+        workbook_tools.update_datetime()
     else:
         try:
             workbook_tools.update_datetime(int(first_row))
@@ -237,12 +390,35 @@ def export_wb() -> None:
     file_type = input('Enter a file type from the following list:\n'
                       'txt, csv, json\n'+
                       'You can also select \'all\' to create all files.\n'+
+                      'To export new rows into a database file, select \'sqlite\' or \'duckdb\'.\n'+
                       '>type \'back\' to return to main ui.\n'+
                       '[export_wb]>>>')
     if file_type == 'back':
         print('Exporting of workbook contents halted.')
-    else:
+        return
+    if file_type in ('sqlite', 'duckdb'):
         workbook_tools.export_wb(file_type)
+        return
+    filters = input('Optional filters, leave empty to export everything. Separate filters with \';\' and values '
+                    'with \',\', e.g.\n'
+                    'since 2024-01-01; until 2024-01-31; symbols NVDA, AAPL; columns Date, Symbol, Pre-market Open\n'
+                    '[export_wb>filters]>>>')
+    logger.debug(f"commands.py> export_wb: Filters input '{filters}'")
+    filter_args: dict[str, list[str]] = {}
+    for elem in filters.split(';'):
+        if elem.strip() == '':
+            continue
+        key, _, value_str = elem.strip().partition(' ')
+        values = [val.strip() for val in value_str.split(',') if val.strip() != '']
+        if key not in ('since', 'until', 'symbols', 'columns') or values == []:
+            print(f"Invalid filter '{elem.strip()}'.")
+            return
+        filter_args[key] = values
+    workbook_tools.export_wb(file_type,
+                             filter_args.get('since', [None])[0],
+                             filter_args.get('until', [None])[0],
+                             filter_args.get('symbols'),
+                             filter_args.get('columns'))
 
 def show_txt() -> None:
     """Opens the symbol data text file."""
@@ -1,19 +1,23 @@
 """All major logic behind commands.py."""
 
 from __future__ import annotations
-from datetime import date
+from datetime import date, datetime
 import json
 import logging
 import os
 import re
 import shutil
+from pathlib import Path
 from typing import TYPE_CHECKING
 
 import pandas as pd
-import requests
 
+import fetch_engine
+from fetch_engine import FetchEngine
+import local_filter
 from query import QueryVars, FetchData
 from paths import FilePaths
+from settings_store import SettingsStore
 from sheets import WorkbookSheets 
 import workbook_tools
 
@@ -48,10 +52,103 @@ def round_to_int(value: float | int | str) -> int | str:
     else:
         return '-'
 
+def _page_queries(query: dict[str, Any]) -> list[dict[str, Any]]:
+    """Splits query range into pages of at most FetchEngine.page_size rows."""
+    if "range" not in query:
+        return [query]
+    start, end = query["range"]
+    page_size = FetchEngine.page_size
+    return [query | {"range": [page, min(page+page_size, end)]} for page in range(start, end, page_size)] or [query]
+
+def build_requests(query: dict[str, Any], 
+                   url: str, 
+                   per_market: bool = False
+                   ) -> list[tuple[str, str, dict[str, Any]]]:
+    """Returns all requests needed for fetching a query.
+
+    Large query ranges are split into pages, see FetchEngine.page_size. With per_market, every market in query 
+    'markets' is sent to its own endpoint and each request uses query range [0, end] and includes the sort column, so 
+    that sorting merged results and applying query range afterwards gives the same top rows a single request would.
+
+    Args:
+        query (dict[str, Any]): Query dictionary.
+        url (str): Scanner endpoint url; only used without per_market.
+        per_market (bool=False): Send a separate request to each query market.
+
+    Returns:
+        list[tuple[str, str, dict[str, Any]]]:
+        (market, url, query) for each request. Market is an empty string without per_market.
+    """
+    if not per_market:
+        return [('', url, page) for page in _page_queries(query)]
+    query = dict(query)
+    if "sort" in query and query["sort"]["sortBy"] not in query["columns"]:
+        query["columns"] = list(query["columns"])+[query["sort"]["sortBy"]]
+    if "range" in query:
+        query["range"] = [0, query["range"][1]]
+    return [(market, f'https://scanner.tradingview.com/{market}/scan', page)
+            for market in query.get("markets", [])
+            for page in _page_queries(query | {"markets": [market]})]
+
+def merge_responses(query: dict[str, Any], 
+                    request_list: list[tuple[str, str, dict[str, Any]]], 
+                    results: list[Any]) -> Any:
+    """Merges fetch_engine results of build_requests() requests into a single api data dictionary.
+
+    For per-market requests, latency and row count of each market are printed and symbols found from several markets 
+    are only included once.
+
+    Args:
+        query (dict[str, Any]): Query dictionary passed to build_requests().
+        request_list (list[tuple[str, str, dict[str, Any]]]): Requests returned by build_requests().
+        results (list[Any]): fetch_engine.run() results of request_list.
+
+    Returns:
+        Any:
+        Json dictionary of merged api data.
+
+    Raises:
+        Exception: All requests of a fetch, or of every market, failed.
+    """
+    markets: dict[str, list[Any]] = {}
+    for (market, _, _), result in zip(request_list, results):
+        markets.setdefault(market, []).append(result)
+    merged_markets = {}
+    for market, pages in markets.items():
+        failed = [page for page in pages if isinstance(page, BaseException)]
+        if failed:
+            logger.debug(f"commands_utils> merge_responses: Market '{market}' failed: {failed[0]}")
+            if market != '':
+                print(f"\n  {market}: request failed ({failed[0]})", end='')
+            continue
+        merged_markets[market] = {"totalCount": pages[0][0]["totalCount"], 
+                                  "data": [row for page, _ in pages for row in page["data"]]}
+        if market != '':
+            latency = max(latency for _, latency in pages)
+            print(f"\n  {market}: {len(merged_markets[market]['data'])} rows in {latency:.2f}s", end='')
+    if not merged_markets:
+        logger.debug("commands_utils> merge_responses: All requests failed, critical error")
+        raise Exception("Could not fetch any data from API.")
+    if '' in merged_markets:
+        return merged_markets['']
+
+    columns = request_list[0][2]["columns"]
+    rows = [row for market_data in merged_markets.values() for row in market_data['data']]
+    merged = pd.DataFrame({'s': [row['s'] for row in rows], 'd': [row['d'] for row in rows]})
+    merged = merged.drop_duplicates(subset='s', ignore_index=True)
+    total_count = len(merged.index)
+    if "sort" in query:
+        sort_by = query["sort"]["sortBy"]
+        merged[sort_by] = [d[columns.index(sort_by)] for d in merged['d']]
+    merged = local_filter.sort_and_slice(merged, query)
+    return {"totalCount": total_count, 
+            "data": [{"s": s, "d": d[:len(query["columns"])]} for s, d in zip(merged['s'], merged['d'])]}
+
 def requests_api_data() -> Any:
     """Request data from Tradingview API based on current settings.json values.
     
-    Data is send as json dictionary query. If request was succesful, returns all as another json dictionary.
+    Data is send as json dictionary query. If request was succesful, returns all as another json dictionary. Large 
+    query ranges are fetched as concurrent pages, see fetch_engine.py.
 
     Returns:
         Any:
@@ -61,12 +158,28 @@ def requests_api_data() -> Any:
         Exception: Request status code was not 200.
     """
     logger.debug("commands_utils> requests_api_data")
-    request_data = requests.post(url=QueryVars.url, json=QueryVars.my_query, headers=FetchData.REQUEST_HEADERS)
-    if request_data.status_code == requests.codes.ok:
-        return request_data.json()
-    else:
-        logger.debug("commands_utils> requests_api_data: Invalid http status code, critical error")
-        raise Exception("Could not fetch any data from API.")
+    request_list = build_requests(QueryVars.my_query, QueryVars.url)
+    results = fetch_engine.run([(url, query) for _, url, query in request_list])
+    return merge_responses(QueryVars.my_query, request_list, results)
+
+def requests_market_data() -> Any:
+    """Requests data from each query market concurrently and merges the results.
+
+    Instead of a single 'global' request, every market in query 'markets' is sent to its own endpoint, see 
+    build_requests(). Markets that fail are reported and skipped.
+
+    Returns:
+        Any:
+        Json dictionary of merged api data, in same format as requests_api_data() returns.
+
+    Raises:
+        Exception: None of the market requests succeeded.
+    """
+    logger.debug(f"commands_utils> requests_market_data: Markets {QueryVars.markets}")
+    query = QueryVars.my_query | {"markets": QueryVars.markets}
+    request_list = build_requests(query, QueryVars.url, per_market=True)
+    results = fetch_engine.run([(url, page) for _, url, page in request_list])
+    return merge_responses(query, request_list, results)
 
 def clean_fetched_data(request_data: Any) -> pd.DataFrame:
     """Cleans fetched API data, updates numeric types for columns, and saves it for utilization.
@@ -95,49 +208,72 @@ def clean_fetched_data(request_data: Any) -> pd.DataFrame:
             Cleaned fetch data.
     """
     logger.debug("commands_utils> clean_fetched_data")
-    current_data = []
-    raw_data = []
-    for data in request_data['data']:
-        raw_temp = []
-        for column in data['d']:
-            raw_temp.append(column)
-        raw_data.append(raw_temp)
-    current_data = raw_data
-
-    modified = []
-    for symbol_data in current_data:
-        newcolumn = []
-        for column in symbol_data:
-            if isinstance(column, list):
-                column = ', '.join(column)
-            newcolumn.append(column)
-        modified.append(newcolumn)
-    current_data = modified
+    current_data = [[', '.join(column) if isinstance(column, list) else column for column in data['d']]
+                    for data in request_data['data']]
 
     txt_dataframe = pd.DataFrame(data=current_data, 
-                                 columns=[QueryVars.col_headers[header] for header in QueryVars.txt_headers])
+                                 columns=[spec.name for spec in QueryVars.schema.data_columns])
     txt_dataframe = txt_dataframe.fillna('-')
-    try:
-        target_cols = [QueryVars.col_headers[headers] for headers in QueryVars.int_cols]
-        for col in target_cols:
-            txt_dataframe[col] = txt_dataframe[col].apply(round_to_int)
-    except AttributeError:
-        ...
-    try:
-        target_cols = [QueryVars.col_headers[headers] for headers in QueryVars.float_cols]
-        decimals = {QueryVars.col_headers[headers]: QueryVars.float_decimals[headers] for headers in QueryVars.
-                    float_decimals.keys()}
-        for col in target_cols:
-            try:
-                decimal_val = decimals[col]
-                txt_dataframe[col] = txt_dataframe[col].apply(lambda t: f"{float(t):.{decimal_val}f}")
-            except KeyError:
-                ...
-    except AttributeError:
-        ...
+    for spec in QueryVars.schema.converted_columns:
+        txt_dataframe[spec.name] = txt_dataframe[spec.name].apply(spec.convert)
     return txt_dataframe
     
 
+def snapshot_path(wb_name: str) -> Path:
+    """Returns path of the latest fetch snapshot of a workbook, stored in its data folder."""
+    return FilePaths.WB_FILES_ROOT_PATH/wb_name/'data'/FilePaths.SNAPSHOT_NAME
+
+def save_snapshot(request_data: Any, query: dict[str, Any]) -> None:
+    """Stores fetched raw API data of current workbook for local filtering with fetch_local.
+
+    Each workbook keeps only its latest fetch; previous snapshot of the workbook is overwritten.
+
+    Args:
+        request_data (Any): JSON data dictionary object fetched from TradingView web API.
+        query (dict[str, Any]): Query used for fetching request_data.
+    """
+    logger.debug("commands_utils> save_snapshot")
+    snapshot_df = pd.DataFrame([data['d'] for data in request_data['data']], columns=query["columns"])
+    snapshot_df.insert(0, 's', [data['s'] for data in request_data['data']])
+    snapshot_df = snapshot_df.loc[:, ~snapshot_df.columns.duplicated()]
+    pd.to_pickle({"time": datetime.now().isoformat(sep=' ', timespec='seconds'),
+                  "wb_name": FilePaths.wb_name,
+                  "data": snapshot_df}, 
+                 snapshot_path(FilePaths.wb_name))
+
+def filter_snapshot(query: dict[str, Any], wb_name: str) -> Any:
+    """Evaluates query filters, sort and range on the latest snapshot of a workbook and returns results in API data 
+    format.
+
+    Args:
+        query (dict[str, Any]): Query dictionary.
+        wb_name (str): Name of the workbook whose fetched data is filtered.
+
+    Returns:
+        Any:
+        Json-like dictionary with same 'totalCount' and 'data' structure as requests_api_data returns, or None if no 
+        snapshot exists or query can't be evaluated on it.
+    """
+    logger.debug("commands_utils> filter_snapshot")
+    try:
+        snapshot = pd.read_pickle(snapshot_path(wb_name))
+    except FileNotFoundError:
+        print(f"No cached data found for workbook '{wb_name}'. Fetch data in it with a broad query first.")
+        return None
+    try:
+        result = local_filter.evaluate(snapshot["data"], query)
+    except ValueError as err:
+        print(f"Unable to filter cached data of workbook '{snapshot['wb_name']}' ({snapshot['time']}): {err}")
+        return None
+    except KeyError as err:
+        print(f"Unable to filter cached data of workbook '{snapshot['wb_name']}' ({snapshot['time']}): "
+              f"query filter or sort is missing key {err}.")
+        return None
+    print(f"Using cached data of workbook '{snapshot['wb_name']}' ({snapshot['time']}).")
+    symbols = result['s'].tolist()
+    rows = result[query["columns"]].values.tolist()
+    return {"totalCount": len(rows), "data": [{"s": s, "d": d} for s, d in zip(symbols, rows)]}
+
 def create_fetch_display_txt(df_string: list[str]) -> None:
     """Creates a displayable txt file for symbol data saving process.
 
@@ -279,15 +415,13 @@ def change_workbook(wb_name_input: str, new: bool, check_name: bool = True) -> i
         if dir == wb_name_input:
             exists = True
             break
-    with open(FilePaths.WB_FILES_ROOT_PATH/'current_wb.json') as f:
-        wb_fname = json.load(f)
+    wb_fname = SettingsStore.load(FilePaths.WB_FILES_ROOT_PATH/'current_wb.json')
     wb_fname['wb_name'] = wb_name_input
     if not new and not exists:
         logger.debug("commands_utils> change_workbook: Returned -2")
         return -2
     elif not new and exists: 
-        with open(FilePaths.WB_FILES_ROOT_PATH/'current_wb.json', 'w') as f:
-            json.dump(wb_fname, f, indent=4)
+        SettingsStore.dump(FilePaths.WB_FILES_ROOT_PATH/'current_wb.json', wb_fname)
         FilePaths.wb_name = wb_name_input
         print(f"Workbook '{wb_name_input}' selected.")
         FilePaths.update_filepaths()
@@ -296,8 +430,7 @@ def change_workbook(wb_name_input: str, new: bool, check_name: bool = True) -> i
         logger.debug("commands_utils> change_workbook: Returned 1")
         return 1
     elif new and not exists:
-        with open(FilePaths.WB_FILES_ROOT_PATH/'current_wb.json', 'w') as f:
-            json.dump(wb_fname, f, indent=4)
+        SettingsStore.dump(FilePaths.WB_FILES_ROOT_PATH/'current_wb.json', wb_fname)
         FilePaths.wb_name = wb_name_input
         print("Creating new folder structure under workbooks...")
         workbook_tools.create_wb()
@@ -334,8 +467,7 @@ def update_settings_json(query_input: str, manual_update: bool = True) -> None:
                 else:
                     with open(FilePaths.settings_path/'query.txt') as f:
                         current_query = json.load(f)
-                with open(FilePaths.settings_path/'settings.json') as f:
-                    settings = json.load(f)
+                settings = SettingsStore.load(FilePaths.settings_path/'settings.json')
                 settings["query"] = current_query
                 try:
                     if len(current_query["markets"]) > 1:
@@ -344,8 +476,7 @@ def update_settings_json(query_input: str, manual_update: bool = True) -> None:
                         settings["market"] = current_query["markets"][0]
                 except KeyError:
                     settings["market"] = "global"
-                with open(FilePaths.settings_path/'settings.json', 'w') as f:
-                    json.dump(settings, f, indent=4)
+                SettingsStore.dump(FilePaths.settings_path/'settings.json', settings)
                 if QueryVars.my_query["columns"] == ['name']:
                     workbook_tools.create_wb(False)
                     QueryVars.update_query_variables()
@@ -361,11 +492,9 @@ def update_settings_json(query_input: str, manual_update: bool = True) -> None:
                 else:
                     with open(FilePaths.settings_path/'headers.txt') as f:
                         current_headers = json.load(f)
-                with open(FilePaths.settings_path/'settings.json') as f:
-                    settings = json.load(f)
+                settings = SettingsStore.load(FilePaths.settings_path/'settings.json')
                 settings['headers'] = current_headers
-                with open(FilePaths.settings_path/'settings.json', 'w') as f:
-                    json.dump(settings, f, indent=4)
+                SettingsStore.dump(FilePaths.settings_path/'settings.json', settings)
                 QueryVars.update_query_variables()
             except json.decoder.JSONDecodeError:
                 print('Invalid json text given. Make sure all properties are enclosed in double quotes.')
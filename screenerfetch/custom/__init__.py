@@ -3,12 +3,13 @@
 Each should implement their own commands, importantly workbook creation, and set base values for settings files
 if commands require specific settings.json values.
 
-Remember to:  
--add workbook create command under run._custom_create, and  
--add command to enter its custom command interface under run._select_custom_package  
+Remember to add a plugin.json file in the package folder which lists its entry points, at least:  
+-workbook create command as 'create', and  
+-command to enter its custom command interface as 'commands'  
     -->see small_cap1.c_commands.select_custom_command() for an example - this opens a sub-interface similar to main 
     interface.  
--add package import under run.py 
+See plugins.py for the file format. Packages are imported only when these commands are used, so importing them here 
+or in run.py is not needed.
 
 Custom script commands should be added under run_script.py.
 """
\ No newline at end of file
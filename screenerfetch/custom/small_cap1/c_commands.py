@@ -1,9 +1,17 @@
 """Current custom workbook commands."""
 
+from __future__ import annotations
+from pathlib import Path
+from typing import TYPE_CHECKING
+
 import custom.small_cap1.plot as plot
+import custom.small_cap1.plot_batch as plot_batch
+import custom.small_cap1.plot_cache as plot_cache
 import custom.small_cap1.c_workbook_tools as c_workbook_tools
 from sheets import WorkbookSheets
-import workbook_tools
+
+if TYPE_CHECKING:
+    from typing import Callable, Iterable
 
 def plot_data() -> None:
     """Selects a correct plot function from plot.py based on user input."""
@@ -17,7 +25,10 @@ def plot_data() -> None:
                         'close .\n'
                     'daily cs => candlestick chart displaying all daily candles for user selected date.\n'
                     'dist => display some distributions.\n'
-                    'float => scatter plot distribution of open-to-high prices and share float.\n')
+                    'float => scatter plot distribution of open-to-high prices and share float.\n'
+                    'compare => line charts comparing daily averages and symbol counts of several workbooks.\n'
+                    'batch => save selected plots as image files in workbook data/plots folder, without displaying '
+                        'them. Daily candles can be saved for a range of dates.\n')
     while True:
         user_input = input('[plot]>>>')
         if user_input == 'back':
@@ -30,15 +41,66 @@ def plot_data() -> None:
             date_input = input('Enter a date found that corresponds to an existing date in your excel workbook. ' 
                                'Date must in format "YYYY-MM-DD" (with \'-\' as separator!).\n'
                                '[plot>daily cs]>>>')
-            if workbook_tools.check_date(date_input):
+            if plot_cache.has_date(date_input):
                 plot.show_daily_candles(date_input)
+            else:
+                print("Date value not found.")
         elif user_input == 'dist':
             plot.show_distributions()
         elif user_input == 'float':
             plot.show_high_to_open_vs_float_and_mc()
+        elif user_input == 'compare':
+            names_input = input('Enter names of workbooks to compare, separated by spaces.\n'
+                                '[plot>compare]>>>').split()
+            if names_input:
+                plot.show_workbook_comparison(names_input)
+            else:
+                print('Invalid input.')
+        elif user_input == 'batch':
+            names_input = input(f'Enter plot names separated by \',\'. Plots are: {", ".join(plot_batch.PLOTS)}\n'
+                                '[plot>batch]>>>')
+            plot_names = [name.strip() for name in names_input.split(',') if name.strip()]
+            since, until = None, None
+            if 'daily cs' in plot_names:
+                dates_input = input('Enter first and last date of daily candles as "YYYY-MM-DD YYYY-MM-DD", or leave '
+                                    'empty for all dates.\n[plot>batch>daily cs]>>>').split()
+                if len(dates_input) == 2:
+                    since, until = dates_input
+            batch_plot(plot_names, since, until)
         else:
             print('Invalid input.')
     
+def batch_plot(plot_names: list[str], 
+               since: str | None = None, 
+               until: str | None = None, 
+               image_format: str = 'png') -> None:
+    """Saves plots as image files in workbook data/plots folder without displaying them.
+
+    Args:
+        plot_names (list[str]): Plot names as in plot mode, e.g. 'avg daily' or 'daily cs'.
+        since (str | None = None): First date of 'daily cs' images in YYYY-MM-DD format. Defaults to first date.
+        until (str | None = None): Last date of 'daily cs' images in YYYY-MM-DD format. Defaults to last date.
+        image_format (str = 'png'): 'png' or 'svg'.
+    """
+    if plot.check_if_empty():
+        print("Workbook has no data, cannot plot anything.")
+        return
+    try:
+        saved = plot_batch.render(plot_names, since, until, image_format)
+    except ValueError as err:
+        print(err)
+        return
+    print(f"Saved {len(saved)} images in {plot_batch.output_folder()}")
+
+def _run_batch(batch_function: Callable[[Iterable[str]], None], input_data: str) -> None:
+    """Runs a c_workbook_tools batch function with entries of the file in 'file PATH' input."""
+    try:
+        entries = c_workbook_tools.read_entries(Path(input_data.removeprefix('file').strip().strip('"\'')))
+    except OSError as err:
+        print(f"Could not read file: {err}")
+        return
+    batch_function(entries)
+
 def add_row_in_sheet2() -> None:
     """Adds a new row to second worksheet in workbook.
 
@@ -48,12 +110,17 @@ def add_row_in_sheet2() -> None:
     print(f'Type \'exit\' to stop adding new rows in {WorkbookSheets.sheet_names[1]}.\n'
           'Need date and symbol (always in uppercase) to identify correct rows.\n'
           'Format is SYMBOL YYYY-MM-DD . Example: NVDA 2024-01-31 \n'
+          'To add rows of many symbols and save once, type file and path of a text file with an entry on each line. '
+          'Example: file trades.txt\n'
           '-> '   
           )
     while True:
         input_data = input('[plot>add row to sheet2]>>>')
         if input_data == 'back':
             return
+        if input_data.startswith('file '):
+            _run_batch(c_workbook_tools.add_row_in_sheet2_batch, input_data)
+            continue
         try:
             c_workbook_tools.add_row_in_sheet2(input_data)
         except (IndexError, ValueError):
@@ -68,12 +135,17 @@ def add_notes() -> None:
     print('Type \'exit\' to stop editing notes.\n'
           'Need date and symbol (always in uppercase) to identify correct rows.\n'
           'Format is SYMBOL YYYY-MM-DD. Example: NVDA 2024-01-31\n'
+          'To update notes of many symbols and save once, type file and path of a text file with an entry and its '
+          'notes on each line. Example line: NVDA 2024-01-31 Faded after open\n'
           '-> '   
           )
     while True:
         input_data = input('[plot>notes]>>>')
         if input_data == 'back':
             return
+        if input_data.startswith('file '):
+            _run_batch(c_workbook_tools.edit_notes_batch, input_data)
+            continue
         try:
             c_workbook_tools.edit_notes(input_data)
         except (IndexError, ValueError):
@@ -96,17 +168,28 @@ def add_images() -> None:
     You have to add images yourself e.g. could use snipping tool (ctrl + shift + s). 
     (I've tried web screenshotting with Selenium/Playwright, but results were just bad so manual process is better.)
 
+    Only images which exist are linked. Typing 'all' links images of every row in the second worksheet at once.
+
     You can keep adding multiple symbols. When done, type 'back' as input and press enter.
     """
     print('Type \'exit\' to stop adding new images.\n'
           'Need date and symbol (always in uppercase) to identify correct rows.\n'
           'Format is SYMBOL YYYY-MM-DD . Example: NVDA 2024-01-31 \n'
+          'To add images of many symbols and save once, type file and path of a text file with an entry on each line. '
+          'Example: file trades.txt\n'
+          'To add images of every row which has them and list missing images, type all.\n'
           '-> '   
           )
     while True:
         input_data = input('[plot>images]>>>')
         if input_data == 'back':
             return
+        if input_data == 'all':
+            c_workbook_tools.link_all_images()
+            continue
+        if input_data.startswith('file '):
+            _run_batch(c_workbook_tools.add_image_hyperlinks_batch, input_data)
+            continue
         try:
             c_workbook_tools.add_image_hyperlinks(input_data)
         except (IndexError, ValueError):
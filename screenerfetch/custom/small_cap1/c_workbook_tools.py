@@ -1,17 +1,25 @@
 """Workbook tools for current custom workbook."""
 
+from __future__ import annotations
 import datetime
-import json
 import os
+from typing import TYPE_CHECKING
 
 import openpyxl
 from openpyxl.styles import Alignment, Font, NamedStyle
 
 from paths import FilePaths
 from query import QueryVars
+from custom.small_cap1.image_catalog import KINDS, ImageCatalog, image_name, images_folder
 from custom.small_cap1.settings import SmallCap1Values
+from settings_store import SettingsStore
+from row_index import RowIndex, date_key
 from sheets import WorkbookSheets
-from workbook_tools import get_last_row
+from workbook_tools import count_rows, save_styled, update_datetime
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing import Any, Iterable
 
 def _create_custom_workbook_files() -> None:
     try:
@@ -20,9 +28,7 @@ def _create_custom_workbook_files() -> None:
         print(f"{FilePaths.wb_name}, {FilePaths.wb_name}/settings and {FilePaths.wb_name}/data created.")
     except FileExistsError:
         ...
-    with open(FilePaths.settings_path/'settings.json', 'w') as f:
-            set_settings = SmallCap1Values.SETTINGS
-            json.dump(set_settings, f, indent=4)
+    SettingsStore.dump(FilePaths.settings_path/'settings.json', SmallCap1Values.SETTINGS)
     print(f"{FilePaths.wb_name}/settings/settings.json created.")
     with open(FilePaths.settings_path/'query.txt', 'w') as qf:
         qf.writelines(SmallCap1Values.QUERY)
@@ -31,114 +37,251 @@ def _create_custom_workbook_files() -> None:
         hf.writelines(SmallCap1Values.HEADERS)
     print(f"{FilePaths.wb_name}/settings/headers.txt created.")
 
+def _parse_entry(entry: str) -> tuple[str, str, str]:
+    """Splits 'SYMBOL YYYY-MM-DD [text]' into symbol, date in yyyy-mm-dd format and text, which may be empty.
+
+    Raises:
+        ValueError: Entry has no symbol and date, or date is invalid.
+    """
+    symbol, date, *text = entry.split(maxsplit=2)
+    y, m, d = date.split('-')
+    return symbol, str(datetime.date(int(y), int(m), int(d))), text[0] if text else ''
+
+def _parse_entries(entries: Iterable[str]) -> list[tuple[str, str, str]]:
+    parsed = []
+    for entry in entries:
+        entry = entry.strip()
+        if not entry or entry.startswith('#'):
+            continue
+        try:
+            parsed.append(_parse_entry(entry))
+        except ValueError:
+            print(f"Invalid entry '{entry}', skipped.")
+    return parsed
+
+def read_entries(file_path: Path) -> list[str]:
+    """Returns lines of a text file of SYMBOL YYYY-MM-DD entries, one per line.
+
+    Args:
+        file_path (Path): Text file path.
+
+    Returns:
+        list[str]:
+        Lines of file. Blank lines and lines starting with # are skipped by batch functions.
+    """
+    with open(file_path) as f:
+        return f.read().splitlines()
+
+def _write_sheet2_row(ws: Any, row: int, symbol: str, date: str) -> None:
+    ws.cell(column=1, row=row).value = datetime.date.fromisoformat(date)
+    ws.cell(column=1, row=row).alignment = Alignment(horizontal='left')
+    ws.cell(column=2, row=row).value = symbol
+    ws.cell(column=2, row=row).alignment = Alignment(horizontal='right')
+
+def _write_notes(ws: Any, row: int, notes: str) -> None:
+    ws.cell(row=row, column=3, value=notes) # remember to update column if location changes.
+    ws.cell(row=row, column=3).alignment = Alignment(horizontal='right')
+
+def _link_images(ws: Any, targets: Iterable[tuple[int, str, str]]) -> tuple[int, list[str]]:
+    """Adds hyperlinks of existing intraday (column D) and daily (column E) images to second worksheet rows.
+
+    Args:
+        ws (Any): Second worksheet.
+        targets (Iterable[tuple[int, str, str]]): Row number, symbol and date in yyyy-mm-dd format of each row.
+
+    Returns:
+        tuple[int, list[str]]:
+        Number of rows which got at least one hyperlink, and names of missing images.
+    """
+    catalog = ImageCatalog.load(images_folder(), FilePaths.data_path/'image_catalog.json')
+    linked, missing = 0, []
+    for row, symbol, date in targets:
+        images = catalog.images(symbol, date)
+        for col, kind in zip(('D', 'E'), KINDS):
+            if kind not in images:
+                missing.append(image_name(symbol, date, kind))
+                continue
+            cell = ws[col+str(row)]
+            cell.hyperlink = str(images[kind])
+            cell.value = 'Image'
+            cell.style = "Hyperlink"
+            cell.alignment = Alignment(horizontal='center')
+        linked += bool(images)
+    return linked, missing
+
+def _print_missing_images(missing: list[str]) -> None:
+    if missing:
+        print(f'Missing images in {images_folder()}: {", ".join(missing)}')
+
+def _print_batch_result(done: list[str], failed: list[str], message: str) -> None:
+    print(f'{message}: {len(done)}.')
+    if failed:
+        print(f'Failed to find cells corresponding to: {", ".join(failed)}')
+
+def add_row_in_sheet2_batch(entries: Iterable[str]) -> None:
+    """Adds rows for several symbols in the second worksheet and saves workbook once.
+
+    Entries are resolved through a (date, symbol) -> row index of both worksheets, built once, instead of scanning 
+    symbol column for each entry. Symbols must have a row on the same date in the main worksheet; entries which 
+    already have a row in the second worksheet are skipped.
+
+    Args:
+        entries (Iterable[str]): Entries in SYMBOL YYYY-MM-DD format. Invalid entries are skipped.
+    """
+    parsed = _parse_entries(entries)
+    if not parsed:
+        return
+    wb = openpyxl.load_workbook(FilePaths.wb_path)
+    ws_data = wb[WorkbookSheets.sheet_names[0]]
+    ws = wb[WorkbookSheets.sheet_names[1]]
+    data_index = RowIndex.from_worksheet(ws_data)
+    index = RowIndex.from_worksheet(ws)
+    next_row = count_rows(ws)+1
+    added, failed = [], []
+    for symbol, date, _ in parsed:
+        if data_index.find(date, symbol) is None:
+            failed.append(f'{symbol} {date}')
+        elif index.find(date, symbol) is not None:
+            print(f'Row for {symbol} {date} already exists in sheet {WorkbookSheets.sheet_names[1]}, skipped.')
+        else:
+            _write_sheet2_row(ws, next_row, symbol, date)
+            index.add(next_row, date, symbol)
+            added.append(f'{symbol} {date}')
+            next_row += 1
+    if added:
+        save_styled(wb)
+    _print_batch_result(added, failed, f'Rows added to sheet {WorkbookSheets.sheet_names[1]}')
+
 def add_row_in_sheet2(input_str: str) -> None:
     """Add a custom row for a symbol in the second worksheet.
 
     Requires a 'custom' workbook (or else you need to add columns manually).
      
-    Customize the row/col values inside loop if you need to add/remove stuff.
+    Customize the row/col values in _write_sheet2_row if you need to add/remove stuff.
 
     Args:
         input_str (str): Symbol name and date in SYMBOL YYYY-MM-DD format.
+
+    Raises:
+        ValueError: Invalid input_str.
+    """
+    _parse_entry(input_str)
+    add_row_in_sheet2_batch([input_str])
+
+def edit_notes_batch(entries: Iterable[str]) -> None:
+    """Updates 'Notes' column values of several second worksheet rows and saves workbook once.
+
+    Args:
+        entries (Iterable[str]): Entries in SYMBOL YYYY-MM-DD notes format, e.g. 'NVDA 2024-01-31 Faded after open'. 
+            Invalid entries are skipped.
     """
+    parsed = _parse_entries(entries)
+    if not parsed:
+        return
     wb = openpyxl.load_workbook(FilePaths.wb_path)
-    ws = wb[WorkbookSheets.sheet_names[0]]
-    if ws is not None:
-        symbol, date = input_str.split()
-        raw_date = date.split('-')
-        y, m, d = raw_date[0], raw_date[1], raw_date[2]
-        date_datetime = datetime.datetime(int(y), int(m), int(d))
-        for sym in ws['B']:
-            if sym.value == symbol:
-                if ws.cell(row=sym.row, column=1).value.date() == date_datetime.date(): # type: ignore              
-                    ws = wb[WorkbookSheets.sheet_names[1]]
-                    next_row = get_last_row(WorkbookSheets.sheet_names[1])+1
-                    ws.cell(column=1, row=next_row).value = date_datetime.date()
-                    current = ws.cell(column=1, row=next_row)
-                    current.alignment = Alignment(horizontal='left')
-                    ws.cell(column=2, row=next_row).value = symbol
-                    current = ws.cell(column=2, row=next_row)
-                    current.alignment = Alignment(horizontal='right')
-
-                    wb.save(FilePaths.wb_path)
-                    print(f'Row for {symbol, date} added to sheet {WorkbookSheets.sheet_names[1]}.')
-                    return
-    print('Failed to find cells corresponding to input data.')
+    ws = wb[WorkbookSheets.sheet_names[1]]
+    index = RowIndex.from_worksheet(ws)
+    updated, failed = [], []
+    for symbol, date, notes in parsed:
+        row = index.find(date, symbol)
+        if row is None:
+            failed.append(f'{symbol} {date}')
+            continue
+        _write_notes(ws, row, notes)
+        updated.append(f'{symbol} {date}')
+    if updated:
+        save_styled(wb)
+    _print_batch_result(updated, failed, f'Notes updated in sheet {WorkbookSheets.sheet_names[1]}')
 
 def edit_notes(input_str: str) -> None:
     """Updates the second worksheet 'Notes' column values with input_data.
     
     Requires a 'custom' workbook (or else you need to add columns manually).
-    
-    datetime.datetime comparisons cause a lot of headache for type checker like mypy so type: ignore is added.
 
     Args:
         input_str (str): Symbol name and date in SYMBOL YYYY-MM-DD format.
+
+    Raises:
+        ValueError: Invalid input_str.
     """
+    symbol, date, _ = _parse_entry(input_str)
     wb = openpyxl.load_workbook(FilePaths.wb_path)
     ws = wb[WorkbookSheets.sheet_names[1]]
-    if ws is not None:
-        symbol, date = input_str.split()
-        raw_date = date.split('-')
-        y, m, d = raw_date[0], raw_date[1], raw_date[2]
-        date_datetime = datetime.datetime(int(y), int(m), int(d))
-        for sym in ws['B']:
-            if sym.value == symbol:
-                if ws.cell(row=sym.row, column=1).value.date() == date_datetime.date(): # type: ignore
-                    notes = input('Your notes --> ')
-                    ws.cell(row=sym.row, column=3, value=notes) # remember to update column if location changes.
-                    ws.cell(row=sym.row, column=3, value=notes).alignment = Alignment(horizontal='right')
-                    wb.save(FilePaths.wb_path)
-                    print(f'Notes for {symbol, date} updated in sheet {WorkbookSheets.sheet_names[1]}.')
-                    return
-    print('Failed to find cells corresponding to input data.')
+    row = RowIndex.from_worksheet(ws).find(date, symbol)
+    if row is None:
+        print('Failed to find cells corresponding to input data.')
+        return
+    _write_notes(ws, row, input('Your notes --> '))
+    save_styled(wb)
+    print(f'Notes for {symbol, date} updated in sheet {WorkbookSheets.sheet_names[1]}.')
+
+def add_image_hyperlinks_batch(entries: Iterable[str]) -> None:
+    """Adds intraday and daily image hyperlinks of several second worksheet rows and saves workbook once.
+
+    Only images found in custom/small_cap1/images folder are linked; missing images are listed.
+
+    Args:
+        entries (Iterable[str]): Entries in SYMBOL YYYY-MM-DD format. Invalid entries are skipped.
+    """
+    parsed = _parse_entries(entries)
+    if not parsed:
+        return
+    wb = openpyxl.load_workbook(FilePaths.wb_path)
+    ws = wb[WorkbookSheets.sheet_names[1]]
+    index = RowIndex.from_worksheet(ws)
+    targets, found, failed = [], [], []
+    for symbol, date, _ in parsed:
+        row = index.find(date, symbol)
+        if row is None:
+            failed.append(f'{symbol} {date}')
+            continue
+        targets.append((row, symbol, date))
+        found.append(f'{symbol} {date}')
+    linked, missing = _link_images(ws, targets)
+    if linked:
+        save_styled(wb)
+    _print_batch_result(found, failed, 'Rows found')
+    print(f'Image hyperlinks added to {linked} rows.')
+    _print_missing_images(missing)
 
 def add_image_hyperlinks(input_str: str) -> None:
     """Add intraday and daily images for a symbol that has them available in custom/images folder.
     
     Requires a 'custom' workbook (or else you need to add columns manually).
 
-    Images are added to the second worksheet. Will always add both image hyperlinks, even if one or both images are 
-    missing.
+    Images are added to the second worksheet. Only existing images are linked.
 
     Args:
         input_str: Symbol name and date in SYMBOL YYYY-MM-DD format.
+
+    Raises:
+        ValueError: Invalid input_str.
+    """
+    _parse_entry(input_str)
+    add_image_hyperlinks_batch([input_str])
+
+def link_all_images() -> None:
+    """Adds image hyperlinks to every second worksheet row which has images, and saves workbook once.
+
+    Images are looked up from an image catalog, so images folder is read only if its contents have changed. Rows
+    whose images are missing are reported.
     """
     wb = openpyxl.load_workbook(FilePaths.wb_path)
     ws = wb[WorkbookSheets.sheet_names[1]]
-    if ws is not None:
-        symbol, date = input_str.split()
-        raw_date = date.split('-')
-        y, m, d = raw_date[0], raw_date[1], raw_date[2]
-        date_datetime = datetime.datetime(int(y), int(m), int(d))
-        for sym in ws['B']:
-            if sym.value == symbol:
-                if ws.cell(row=sym.row, column=1).value.date() == date_datetime.date(): # type: ignore
-                    r = str(sym.row)
-                    ws['D'+r].hyperlink = FilePaths.PATH/'custom'/'small_cap1'/'images'/str(symbol+' '+date+'.png')
-                    ws['D'+r].value = 'Image'
-                    ws['D'+r].style = "Hyperlink"
-                    ws['D'+r].alignment = Alignment(horizontal='center')
-                    ws['E'+r].hyperlink = FilePaths.PATH/'custom'/'small_cap1'/'images'/str(symbol+' '+date+' D'+'.png')
-                    ws['E'+r].value = 'Image'
-                    ws['E'+r].style = "Hyperlink"
-                    ws['E'+r].alignment = Alignment(horizontal='center')
-                    wb.save(FilePaths.wb_path)
-                    print('Done.')
-                    return
-    print('Failed to find cells corresponding to input data.')
-    return
+    targets = []
+    for row_num, (date_val, symbol) in enumerate(ws.iter_rows(min_row=2, max_col=2, values_only=True), start=2):
+        date = date_key(date_val)
+        if date is not None and symbol is not None:
+            targets.append((row_num, str(symbol), date))
+    linked, missing = _link_images(ws, targets)
+    if linked:
+        save_styled(wb)
+    print(f'Image hyperlinks added to {linked} of {len(targets)} rows.')
+    _print_missing_images(missing)
 
 def custom_update_datetime() -> None:
-    """Update datetime on second sheet."""
-    wb = openpyxl.load_workbook(FilePaths.wb_path)
-    ws = wb[WorkbookSheets.sheet_names[1]]
-    if ws is not None:
-        for i in range(2, get_last_row(WorkbookSheets.sheet_names[1])+1):
-            ws.cell(row=i, column=1).style = "datetime"
-            ws.cell(row=i, column=1).alignment = Alignment(horizontal='left')          
-            wb.save(FilePaths.wb_path)
-            print('Date format updated.')
+    """Update date formats of rows which haven't been formatted yet, including second sheet dates."""
+    update_datetime()
 
 def create_custom_wb() -> None:
     """Create custom workbook. Will overwrite contents of currently existing wb with same name."""
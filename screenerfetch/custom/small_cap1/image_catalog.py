@@ -0,0 +1,124 @@
+"""ImageCatalog class.
+
+Indexes chart images of custom/small_cap1/images folder by symbol and date. Image names are 'SYMBOL YYYY-MM-DD.png'
+for intraday and 'SYMBOL YYYY-MM-DD D.png' for daily images.
+"""
+
+from __future__ import annotations
+import json
+import logging
+import os
+import re
+from pathlib import Path
+
+from paths import FilePaths
+
+logger = logging.getLogger('screenerfetch')
+
+IMAGE_NAME = re.compile(r'^(\S+) (\d{4}-\d{2}-\d{2})( D)?\.png$')
+KINDS = ('intraday', 'daily')
+
+def images_folder() -> Path:
+    """Returns folder of small_cap1 chart images."""
+    return FilePaths.PATH/'custom'/'small_cap1'/'images'
+
+def image_name(symbol: str, date: str, kind: str) -> str:
+    """Returns file name of an image, e.g. 'NVDA 2024-01-31 D.png' for a daily image."""
+    return f'{symbol} {date} D.png' if kind == 'daily' else f'{symbol} {date}.png'
+
+class ImageCatalog:
+    """Index of images in a folder by (symbol, date).
+
+    Folder is scanned only when its modification time has changed since the catalog was stored, which happens when
+    files are added, removed or renamed. On a rescan, only names not in the catalog yet are parsed.
+
+    Attributes:
+        folder (Path): Images folder.
+        mtime (int): Folder modification time in nanoseconds when it was last scanned.
+        files (dict[str, list[str]]): Image file name -> [symbol, date in yyyy-mm-dd format, kind].
+    """
+    def __init__(self, folder: Path, mtime: int, files: dict[str, list[str]]) -> None:
+        self.folder = folder
+        self.mtime = mtime
+        self.files = files
+        self._index: dict[tuple[str, str], dict[str, str]] = {}
+        for name, (symbol, date, kind) in files.items():
+            self._index.setdefault((symbol, date), {})[kind] = name
+
+    @staticmethod
+    def _parse(name: str) -> list[str] | None:
+        match = IMAGE_NAME.match(name)
+        if match is None:
+            return None
+        symbol, date, daily = match.groups()
+        return [symbol, date, 'daily' if daily else 'intraday']
+
+    @classmethod
+    def scan(cls, folder: Path, known: dict[str, list[str]] | None = None) -> ImageCatalog:
+        """Scans a folder for images.
+
+        Args:
+            folder (Path): Images folder.
+            known (dict[str, list[str]] | None = None): Already parsed file names, reused if the files still exist.
+
+        Returns:
+            ImageCatalog:
+            New catalog. Empty if folder doesn't exist.
+        """
+        logger.debug(f"image_catalog> ImageCatalog.scan: Folder '{folder}'")
+        known = known or {}
+        files: dict[str, list[str]] = {}
+        try:
+            mtime = os.stat(folder).st_mtime_ns
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    parsed = known.get(entry.name) or cls._parse(entry.name)
+                    if parsed is not None:
+                        files[entry.name] = parsed
+        except FileNotFoundError:
+            mtime = 0
+        return cls(folder, mtime, files)
+
+    @classmethod
+    def load(cls, folder: Path, catalog_path: Path) -> ImageCatalog:
+        """Returns the stored catalog if folder hasn't changed since, otherwise rescans the folder and stores it.
+
+        Args:
+            folder (Path): Images folder.
+            catalog_path (Path): Catalog json file path.
+
+        Returns:
+            ImageCatalog:
+            Catalog matching current folder contents.
+        """
+        known = None
+        try:
+            with open(catalog_path) as f:
+                stored = json.load(f)
+            if stored["folder"] == str(folder):
+                if stored["mtime"] == os.stat(folder).st_mtime_ns:
+                    logger.debug("image_catalog> ImageCatalog.load: Using stored catalog")
+                    return cls(folder, stored["mtime"], stored["files"])
+                known = stored["files"]
+        except (FileNotFoundError, json.decoder.JSONDecodeError, KeyError):
+            ...
+        catalog = cls.scan(folder, known)
+        try:
+            with open(catalog_path, 'w') as f:
+                json.dump({"folder": str(folder), "mtime": catalog.mtime, "files": catalog.files}, f)
+        except OSError:
+            logger.debug("image_catalog> ImageCatalog.load: Could not store catalog")
+        return catalog
+
+    def images(self, symbol: str, date: str) -> dict[str, Path]:
+        """Returns images of a symbol on a date.
+
+        Args:
+            symbol (str): Symbol name.
+            date (str): Date in yyyy-mm-dd format.
+
+        Returns:
+            dict[str, Path]:
+            Image kind, 'intraday' or 'daily' -> image path, for existing images only.
+        """
+        return {kind: self.folder/name for kind, name in self._index.get((symbol, date), {}).items()}
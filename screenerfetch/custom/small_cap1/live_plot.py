@@ -0,0 +1,67 @@
+"""Live plot views which update as watch mode saves new rows.
+
+A view subscribes to workbook_tools.save and adds saved rows to its own in-memory daily summary, then replaces data of
+existing artists instead of reading the workbook and redrawing the figure. Use pause() as watch mode sleep function,
+so the plot window stays responsive between cycles.
+"""
+
+from __future__ import annotations
+import logging
+import time
+from typing import TYPE_CHECKING
+
+import matplotlib.pyplot as plt
+
+import custom.small_cap1.plot as plot
+import workbook_tools
+
+if TYPE_CHECKING:
+    from typing import Any
+
+logger = logging.getLogger('screenerfetch')
+
+class LiveAverageCandles:
+    """Daily average candles and symbol counts, updated after each save.
+
+    Attributes:
+        summary (DailySummary): Daily summary of current workbook, kept up to date with saved rows.
+        artists (plot.AverageCandles | None): Figure and artists, None until workbook has data.
+    """
+    def __init__(self) -> None:
+        plt.style.use(plot.STYLE)
+        plt.ion()
+        self.summary = workbook_tools.daily_summary()
+        self.artists = plot.draw_average_candles(self.summary)
+        if self.artists is not None:
+            plt.show(block=False)
+        workbook_tools.subscribe(self.on_save)
+
+    def on_save(self, date: str, rows: list[dict[str, Any]]) -> None:
+        """Adds saved rows to summary and updates the figure."""
+        logger.debug(f"live_plot> LiveAverageCandles.on_save: {len(rows)} rows on {date}")
+        for values in rows:
+            self.summary.add_row(date, values)
+        if self.artists is None:
+            self.artists = plot.draw_average_candles(self.summary)
+            if self.artists is not None:
+                plt.show(block=False)
+            return
+        plot.update_average_candles(self.artists, self.summary)
+        self.artists.fig.canvas.draw_idle()
+
+    def close(self) -> None:
+        """Stops updates and closes the figure."""
+        workbook_tools.unsubscribe(self.on_save)
+        if self.artists is not None:
+            plt.close(self.artists.fig)
+
+    def pause(self, seconds: float) -> None:
+        """Waits while processing plot window events, see pause(). Use as watch mode sleep function."""
+        pause(seconds)
+
+def pause(seconds: float) -> None:
+    """Waits while processing plot window events, so windows can be redrawn, resized and zoomed."""
+    if plt.get_fignums():
+        plt.pause(seconds)
+    else:
+        time.sleep(seconds)
@@ -1,19 +1,52 @@
 """Data plotting functions for custom workbooks.
+
+Each plot is shown in an interactive window, or saved to an image file if save_path is given.
 """
 
+from __future__ import annotations
 from collections import namedtuple
+from pathlib import Path
+from typing import TYPE_CHECKING
 
+from matplotlib.collections import PolyCollection
+from matplotlib.colors import LogNorm
+from matplotlib.legend import Legend
+from matplotlib.patches import Patch
 import matplotlib.pyplot as plt
+from matplotlib.ticker import FuncFormatter
 import numpy as np
 import pandas as pd
 
+import custom.small_cap1.plot_cache as plot_cache
+from custom.small_cap1.plot_math import Buckets, extremes, log_edges, lttb
 from paths import FilePaths
+import workbook_tools
+
+if TYPE_CHECKING:
+    from daily_summary import DailySummary
 
 # matplotlib generates plenty of type errors for smallest possible things; they are ignored.
 # mypy: ignore-errors
 
 # Style values https://matplotlib.org/stable/gallery/style_sheets/style_sheets_reference.html
 STYLE = 'dark_background'
+# Size of saved images; image format is set by save_path file extension.
+SAVE_SIZE = (16, 9)
+SAVE_DPI = 100
+# Colors of rising and falling candles, and wick and body widths of average candles.
+CANDLE_COLORS = ('green', 'red')
+AVERAGE_CANDLE_WIDTHS = (0.03, 0.3)
+# Maximum number of symbols listed in daily candles volume legend.
+VOLUME_LEGEND_SIZE = 30
+# Maximum number of points drawn per line in line plots; longer lines are downsampled.
+LINE_POINTS = 500
+# Scatter plots with more rows than this are drawn as density maps of (x bins, y bins) bins.
+DENSITY_THRESHOLD = 5000
+DENSITY_BINS = (100, 60)
+# Distribution buckets of show_distributions.
+MARKET_CAP_BUCKETS = Buckets((5e7, 2.5e8), ('nano', 'micro', 'small'))
+FLOAT_BUCKETS = Buckets((1e7, 1e8), ('low', 'mid', 'high'))
+CHG_FROM_OPEN_BUCKETS = Buckets((-20, -10, -1, 1, 10, 20))
 
 def check_if_empty() -> bool:
     """Checks if current workbook has any non-header data in it.
@@ -22,63 +55,98 @@ def check_if_empty() -> bool:
         bool:
         True if data was found, False if not.
     """
-    df = pd.read_excel(FilePaths.wb_path, 0, header=0, usecols=['Date'])
-    if len(df.index) == 0:
+    if len(plot_cache.load(['Date']).index) == 0:
         return True
     return False
 
-def show_daily_average_candles() -> None:
-    """Display daily average candle of all symbols.
-    
-    A daily average candle values are calculated by taking average on each of them (low, high, open, close) over all 
-    symbols that day.
+def _show_or_save(save_path: Path | None) -> None:
+    if save_path is None:
+        plt.show()
+        return
+    fig = plt.gcf()
+    fig.set_size_inches(*SAVE_SIZE)
+    # legends drawn outside of axes, e.g. daily candles volume legend, are kept inside the image
+    legends = [artist for ax in fig.axes for artist in ax.get_children() if isinstance(artist, Legend)]
+    fig.savefig(save_path, dpi=SAVE_DPI, bbox_inches='tight', bbox_extra_artists=legends)
+    plt.close(fig)
+
+def _rectangles(x: np.ndarray, bottom: np.ndarray, top: np.ndarray, width: float) -> np.ndarray:
+    """Returns vertices of rectangles centered at x, as an array of shape (len(x), 4, 2)."""
+    left = x-width/2
+    right = x+width/2
+    return np.stack([np.column_stack([left, bottom]), np.column_stack([left, top]),
+                     np.column_stack([right, top]), np.column_stack([right, bottom])], axis=1)
+
+def _candle_geometry(low, high, open_, close, delta, width, body_width, pos_color, neg_color
+                     ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Returns wick vertices, body vertices and colors of candles placed at x = 0, 1, ..."""
+    low, high, open_, close = (np.asarray(values, dtype=float) for values in (low, high, open_, close))
+    x = np.arange(len(low), dtype=float)
+    body_bottom = np.minimum(open_, close)
+    colors = np.where(close > open_, pos_color, neg_color)
+    return (_rectangles(x, low, high+delta, width),
+            _rectangles(x, body_bottom, np.maximum(open_, close)+delta, body_width),
+            colors)
+
+def _draw_candles(ax, labels, low, high, open_, close, delta, width, body_width, pos_color, neg_color
+                  ) -> tuple[PolyCollection, PolyCollection]:
+    """Draws candlesticks as two polygon collections, wicks and bodies, instead of separate bars per candle.
+
+    Candles are placed at x = 0, 1, ... and x axis ticks are labeled with corresponding labels. A candle is drawn in
+    pos_color if close > open, else in neg_color. delta sets a minimum height for wicks and bodies.
+
+    Returns:
+        tuple[PolyCollection, PolyCollection]:
+        Wick and body collections, which can be updated with new geometry later.
     """
-    plt.style.use(STYLE)
-    cs_pos_color = 'green'
-    cs_neg_color = 'red'
-    cs_width = 0.03
-    cs_body_width = 0.3
-
-    df = pd.read_excel(FilePaths.wb_path, 0, header=0, usecols=['Date', 'Low', 'High', 'Price', 'Open'])
-    # read_excel orders columns based on their sheet order: currently, columns are ordered Open < Price < Low < High. 
-    # So line below re-arranges columns to a order that aligns with the rest of code: Low < High < Price < Open.
-    df = df[['Date', 'Low', 'High', 'Price', 'Open']]
-    df['Date'] = df['Date'].apply(lambda x: str(x).replace(' 00:00:00', '')) # normalize datetime object values.
-    dates = df['Date'].unique()
-    df[['Low','High','Price','Open']] = df[['Low','High','Price','Open']].apply(pd.to_numeric, errors='coerce')
+    wick_verts, body_verts, colors = _candle_geometry(low, high, open_, close, delta, width, body_width, 
+                                                      pos_color, neg_color)
+    wicks = ax.add_collection(PolyCollection(wick_verts, facecolors=colors, linewidths=0))
+    bodies = ax.add_collection(PolyCollection(body_verts, facecolors=colors, linewidths=0))
+    ax.autoscale_view()
+    _label_positions(ax, labels)
+    return wicks, bodies
+
+def _label_positions(ax, labels) -> None:
+    """Labels x axis ticks at positions 0, 1, ... with corresponding labels."""
+    ax.xaxis.set_major_formatter(
+        FuncFormatter(lambda value, _: labels[int(value)] if value.is_integer() and 0 <= value < len(labels) else ''))
+
+def _plot_line(ax, y, *args, **kwargs) -> None:
+    """Plots y at x = 0, 1, ... downsampled to LINE_POINTS points. Line is broken where y has NaN values."""
+    y = np.asarray(y, dtype=float)
+    missing = np.isnan(y)
+    x = np.flatnonzero(~missing)
+    x = x[lttb(x, y[x], LINE_POINTS)]
+    # NaN between kept points which have missing values in between makes matplotlib leave a gap there
+    missing_before = np.cumsum(missing)
+    gaps = np.flatnonzero(missing_before[x[1:]] > missing_before[x[:-1]])+1
+    ax.plot(np.insert(x.astype(float), gaps, np.nan), np.insert(y[x], gaps, np.nan), *args, **kwargs)
+
+AverageCandles = namedtuple('AverageCandles', ['fig', 'ax_candles', 'ax_counts', 'wicks', 'bodies', 'counts_line',
+                                               'totals'])
+
+def draw_average_candles(summary: DailySummary) -> AverageCandles | None:
+    """Draws daily average candles and symbol counts of a daily summary on a new figure.
+
+    Returns:
+        AverageCandles | None:
+        Figure and its data artists, which update_average_candles updates in place. None if summary has no data.
+    """
+    averages = summary.frame('mean')[['Low', 'High', 'Price', 'Open']].round(2)
+    if averages['High'].isna().all():
+        return None
+    dates = averages.index.to_numpy()
     # sets a minimum height for candle bodies, especially helpful if Open=Price; naturally skews the actual values a 
     #bit, but helps with visual clarity.
-    try:
-        delta = 0.001*df['High'].max(numeric_only=True)
-    except TypeError:
-        print("Workbook requires data.")
-        return
+    delta = 0.001*summary.frame('max')['High'].max()
 
     fig = plt.figure()
     ax_candles = fig.add_subplot(3, 1, (1,2))
     ax_counts = fig.add_subplot(3, 1, 3)
-    AverageCandles = namedtuple('AverageCandles', ['low', 'high', 'price', 'open'])
-    for d in dates:
-        temp_df: pd.DataFrame = df.loc[df['Date'] == d]
-        avg_list = list(temp_df.mean(axis=0, numeric_only=True).values)
-        for index in range(len(avg_list)):
-            avg_list[index] = round(float(avg_list[index]), 2)
-        
-        candle_averages = AverageCandles(avg_list[0], avg_list[1], avg_list[2], avg_list[3])
-        if candle_averages.price > candle_averages.open:
-            ax_candles.bar(d, candle_averages.high+delta-candle_averages.price, cs_width, 
-                           candle_averages.price, color=cs_pos_color)
-            ax_candles.bar(d, candle_averages.price+delta-candle_averages.open, cs_body_width, 
-                           candle_averages.open, color=cs_pos_color)
-            ax_candles.bar(d, candle_averages.open+delta-candle_averages.low, cs_width, 
-                           candle_averages.low, color=cs_pos_color)
-        else:
-            ax_candles.bar(d, candle_averages.high+delta-candle_averages.open, cs_width, 
-                           candle_averages.open, color=cs_neg_color)
-            ax_candles.bar(d, candle_averages.open+delta-candle_averages.price, cs_body_width,
-                           candle_averages.price, color=cs_neg_color)
-            ax_candles.bar(d, candle_averages.price+delta-candle_averages.low, cs_width,
-                            candle_averages.low, color=cs_neg_color)
+    wicks, bodies = _draw_candles(ax_candles, dates, averages['Low'], averages['High'], averages['Open'], 
+                                  averages['Price'], delta, AVERAGE_CANDLE_WIDTHS[0], AVERAGE_CANDLE_WIDTHS[1], 
+                                  *CANDLE_COLORS)
 
     font_x= {'family':'serif','color':'cornflowerblue','size':14}
     font_y = {'family':'serif','color':'cornflowerblue','size':14}
@@ -87,65 +155,91 @@ def show_daily_average_candles() -> None:
     ax_candles.set_xlabel('Dates', fontdict=font_x)
     ax_candles.set_ylabel('Price', fontdict=font_y)
     ax_candles.set_axisbelow(True)
-    ax_candles.set_ylim(bottom=0, top=max([df['High'].loc[df['Date'] == val].mean() for val in dates])+1)
-    ax_candles.xaxis.set_major_locator(plt.MaxNLocator(steps=[2,3,4]))
+    ax_candles.set_ylim(bottom=0, top=averages['High'].max()+1)
+    ax_candles.xaxis.set_major_locator(plt.MaxNLocator(integer=True))
     ax_candles.yaxis.grid(color='gray', linestyle='--')
     ax_candles.xaxis.grid(color='gray', linestyle='--')
     
     ax_counts.set_title('Total amount of symbols each day')
     ax_counts.set_xlabel('Dates', fontdict=font_x)
     ax_counts.set_ylabel('Symbol count', fontdict=font_y)
-    ax_counts.xaxis.set_major_locator(plt.MaxNLocator(steps=[2,3,4]))
-    symbol_count = []
-    for val in dates:
-        symbol_count.append(df.loc[df['Date'] == val]['Date'].count())
-    
-    ax_counts.plot(dates, symbol_count)
+    ax_counts.xaxis.set_major_locator(plt.MaxNLocator(integer=True))
+    counts = summary.row_counts().to_numpy()
+    counts_line, = ax_counts.plot(np.arange(len(counts)), counts)
+    _label_positions(ax_counts, dates)
+    totals = ax_counts.text(0.01, 0.85, _count_totals(dates, counts), transform=ax_counts.transAxes)
     ax_counts_pos = ax_counts.get_position()
     ax_counts_pos.y0, ax_counts_pos.y1 = ax_counts_pos.y0-0.05, ax_counts_pos.y1-0.05
     ax_counts.set_position(ax_counts_pos)
-    plt.show()
+    return AverageCandles(fig, ax_candles, ax_counts, wicks, bodies, counts_line, totals)
 
-def show_average_lines() -> None:
+def update_average_candles(artists: AverageCandles, summary: DailySummary) -> None:
+    """Updates candles, counts and totals of a figure from draw_average_candles to match summary.
+
+    Only data of existing artists is replaced, so the figure is not rebuilt. Call fig.canvas.draw_idle() afterwards.
+    """
+    averages = summary.frame('mean')[['Low', 'High', 'Price', 'Open']].round(2)
+    dates = averages.index.to_numpy()
+    delta = 0.001*summary.frame('max')['High'].max()
+    wick_verts, body_verts, colors = _candle_geometry(averages['Low'], averages['High'], averages['Open'], 
+                                                      averages['Price'], delta, *AVERAGE_CANDLE_WIDTHS, 
+                                                      *CANDLE_COLORS)
+    artists.wicks.set_verts(wick_verts)
+    artists.wicks.set_facecolor(colors)
+    artists.bodies.set_verts(body_verts)
+    artists.bodies.set_facecolor(colors)
+    counts = summary.row_counts().to_numpy()
+    artists.counts_line.set_data(np.arange(len(counts)), counts)
+    artists.totals.set_text(_count_totals(dates, counts))
+    for ax in (artists.ax_candles, artists.ax_counts):
+        _label_positions(ax, dates)
+        ax.set_xlim(-1, len(dates))
+    artists.ax_candles.set_ylim(bottom=0, top=averages['High'].max()+1)
+    artists.ax_counts.set_ylim(bottom=0, top=counts.max()*1.1)
+
+def _count_totals(dates: np.ndarray, counts: np.ndarray) -> str:
+    return f'Latest {dates[-1]}: {counts[-1]} rows, {counts.sum()} rows in total'
+
+def show_daily_average_candles(save_path: Path | None = None) -> None:
+    """Display daily average candle of all symbols.
+    
+    A daily average candle values are calculated by taking average on each of them (low, high, open, close) over all 
+    symbols that day. Averages are read from the workbook daily summary.
+    """
+    plt.style.use(STYLE)
+    if draw_average_candles(workbook_tools.daily_summary()) is None:
+        print("Workbook requires data.")
+        return
+    _show_or_save(save_path)
+
+def show_average_lines(save_path: Path | None = None) -> None:
     """Displays daily averages and draws them as separate lines.
      
     Values tracked are premarket open, open and close. Average is then calculated for each of these 
-    values over all symbols of a day, resulting into 3 different lines."""
+    values over all symbols of a day, resulting into 3 different lines. Averages are read from the workbook daily 
+    summary. Long histories are downsampled to LINE_POINTS points per line, keeping peaks and troughs."""
     plt.style.use(STYLE)
-    pre_open_avg = []
-    open_avg = []
-    close_avg = []
-
-    df = pd.read_excel(FilePaths.wb_path, 0, header=0, usecols=['Date', 'Pre-market Open', 'Open', 'Price'])
-    df = df[['Date', 'Pre-market Open', 'Open', 'Price']]
-    df['Date'] = df['Date'].apply(lambda x: str(x).replace(' 00:00:00', ''))
-    dates = df['Date'].unique()
-    df[['Pre-market Open','Open','Price']] = df[['Pre-market Open','Open','Price']].apply(pd.to_numeric, 
-                                                                                          errors='coerce')
-    for d in dates:
-        temp_df: pd.DataFrame = df.loc[df['Date'] == d]
-        avg_list = list(temp_df.mean(axis=0, numeric_only=True).values)
-        for index in range(len(avg_list)):
-            avg_list[index] = round(float(avg_list[index]), 2)
-        pre_open_avg.append(avg_list[0])
-        open_avg.append(avg_list[1])
-        close_avg.append(avg_list[2])
-
-    plt.gca().xaxis.set_major_locator(plt.MaxNLocator(steps=[2,3,4]))
+    daily = workbook_tools.daily_summary().frame('mean')[['Pre-market Open', 'Open', 'Price']].round(2)
+    dates = daily.index.to_numpy()
+
+    ax = plt.gca()
+    ax.xaxis.set_major_locator(plt.MaxNLocator(integer=True))
+    _label_positions(ax, dates)
     plt.title('Averages of pre-market open, open and close')
-    plt.plot(dates, pre_open_avg, 'x--', color='lightsteelblue', label='pre-open')
-    plt.plot(dates, open_avg, 'o--', color='dodgerblue', label='open')
-    plt.plot(dates, close_avg, '+--', color='goldenrod', label='close')
+    _plot_line(ax, daily['Pre-market Open'], 'x--', color='lightsteelblue', label='pre-open')
+    _plot_line(ax, daily['Open'], 'o--', color='dodgerblue', label='open')
+    _plot_line(ax, daily['Price'], '+--', color='goldenrod', label='close')
     plt.legend()
-    plt.show()
+    _show_or_save(save_path)
 
-def show_daily_candles(date: str) -> None:
+def show_daily_candles(date: str, save_path: Path | None = None) -> None:
     """Draws all daily candlesticks for given date.
 
     Also displays volumes of each symbol + distribution of green and red candles.
     
     Args:
         date (str): A date string in 'yyyy-mm-dd' format. Sheet data for this date must exists in current workbook.
+        save_path (Path | None = None): Save plot to this image file instead of showing it.
     """
     plt.style.use(STYLE)
     cs_pos_color = 'green'
@@ -153,14 +247,9 @@ def show_daily_candles(date: str) -> None:
     cs_width = 0.05
     cs_body_width = 0.5
 
-    df = pd.read_excel(FilePaths.wb_path, 0, header=0, usecols=['Date', 'Symbol', 'Open', 'Low', 'High', 'Price', 
-                                                                'Volume'])
-    df = df[['Date', 'Symbol', 'Open', 'Low', 'High', 'Price', 'Volume']]
-    df['Date'] = df['Date'].apply(lambda x: str(x).replace(' 00:00:00', ''))
+    df = plot_cache.load(['Date', 'Symbol', 'Open', 'Low', 'High', 'Price', 'Volume'])
     df = df.loc[df['Date'] == date]
     df = df.reset_index(drop=True)
-    df[['Open', 'Low', 'High', 'Price']] = df[['Open', 'Low', 'High', 'Price']].apply(pd.to_numeric, 
-                                                                                      errors='coerce')
    
     delta = 0.001*df['High'].max(numeric_only=True)
 
@@ -172,71 +261,57 @@ def show_daily_candles(date: str) -> None:
                   'distribution of green and red candles')
     ax.set_xlabel('Symbols', fontdict=font_x)
     ax.set_ylabel('Price', fontdict=font_y)
-    ax.set_ylim(bottom=0, auto=True)
     ax.yaxis.grid(color='gray', linestyle=':')
     ax.locator_params(axis='y', nbins=20)
+    symbols = df['Symbol'].to_numpy()
+    _draw_candles(ax, symbols, df['Low'], df['High'], df['Open'], df['Price'], delta, cs_width, cs_body_width, 
+                  cs_pos_color, cs_neg_color)
+    ax.set_ylim(bottom=0)
+    # every symbol gets a tick while they fit, after that ticks are spread evenly
+    ax.xaxis.set_major_locator(plt.MaxNLocator(nbins=60, integer=True, steps=[1, 2, 5, 10]))
     plt.xticks(rotation=60, ha='right')
-    for row_index in range(len(df)):
-        cs_df = df.loc[row_index]
-        name = cs_df['Symbol']
-        if cs_df['Price'] > cs_df['Open']:
-            plt.bar(name, cs_df['High']+delta-cs_df['Price'], cs_width, cs_df['Price'], color=cs_pos_color)
-            plt.bar(name, cs_df['Price']+delta-cs_df['Open'], cs_body_width, cs_df['Open'], color=cs_pos_color)
-            plt.bar(name, cs_df['Open']+delta-cs_df['Low'], cs_width, cs_df['Low'], color=cs_pos_color, 
-                    label=name+': '+str(cs_df['Volume']))
-        else:
-            plt.bar(name, cs_df['High']+delta-cs_df['Open'], cs_width, cs_df['Open'], color=cs_neg_color)
-            plt.bar(name, cs_df['Open']+delta-cs_df['Price'], cs_body_width, cs_df['Price'], color=cs_neg_color)
-            plt.bar(name, cs_df['Price']+delta-cs_df['Low'], cs_width, cs_df['Low'], color=cs_neg_color,
-                    label=name+': '+str(cs_df['Volume']))
-            
+
+    # volume legend shows the highest volumes only, as a legend entry per symbol doesn't fit for wide screeners
+    top_volumes = df.nlargest(VOLUME_LEGEND_SIZE, 'Volume')
+    volume_colors = np.where(top_volumes['Price'] > top_volumes['Open'], cs_pos_color, cs_neg_color)
+    volume_labels = (top_volumes['Symbol']+': '+top_volumes['Volume'].map('{:.0f}'.format)).tolist()
+    volume_title = 'Volume' if len(df.index) <= VOLUME_LEGEND_SIZE else f'Volume, top {VOLUME_LEGEND_SIZE}'
+
     daily_max = df['High'].max()
-    daily_max_name = df[['Symbol', 'High']].loc[df['High'] == daily_max].iat[0,0]
+    daily_max_name = df.at[df['High'].idxmax(), 'Symbol']
     daily_min = df['Low'].min()
-    daily_min_name = df[['Symbol', 'Low']].loc[df['Low'] == daily_min].iat[0,0]
+    daily_min_name = df.at[df['Low'].idxmin(), 'Symbol']
     green_total = df[df['Price'] - df['Open'] > 0]['Price'].count()
     red_total = df['Price'].count()-green_total
     green_pct = f"{(green_total/(green_total+red_total)*100):.2f}"
     red_pct = f"{(red_total/(green_total+red_total)*100):.2f}"
 
-    ax = plt.gca()
-    vol_legend = ax.legend(title='Volume', loc='upper left', bbox_to_anchor=(1, 1.125), facecolor='darkslategray')
+    vol_legend = ax.legend([Patch(color=color) for color in volume_colors], volume_labels, title=volume_title,
+                           loc='upper left', bbox_to_anchor=(1, 1.125), facecolor='darkslategray')
     plt.legend(title=f'Highest: {daily_max} ({daily_max_name})\nLowest: {daily_min} ({daily_min_name})'
                f'\nGreen: {green_total} ({green_pct}%)\nRed: {red_total} ({red_pct}%)', 
                loc='upper right', facecolor='darkslategray', ncols=2, labels='', title_fontsize=11,
                bbox_to_anchor=(1.005, 1.125))
     plt.setp(plt.gca().get_legend().get_title(), color='azure')
     ax.add_artist(vol_legend)
-    plt.show()
+    _show_or_save(save_path)
 
-def show_distributions() -> None:
+def show_distributions(save_path: Path | None = None) -> None:
     """Frequency distributions created from workbook data."""
     plt.style.use(STYLE)
 
-    df = pd.read_excel(FilePaths.wb_path, 0, header=0, 
-                       usecols=['Open', 'High', 'Chg from Open %', 'Float', 'Market Cap'])
+    df = plot_cache.load(['Open', 'High', 'Chg from Open %', 'Float', 'Market Cap'])
     df['High-to-Open %'] = ((df['High']/df['Open'])-1)*100
     df['High-to-Open %'] = df['High-to-Open %'].replace([np.inf, -np.inf], 0) # replace infinites with 0
 
-    df_mc = df['Market Cap'].loc[df['Market Cap'] != '-']
-    df_f = df['Float'].loc[df['Float'] != '-']
-    df_cfo = df['Chg from Open %']
-    
-    market_caps = {'nano': int(df_mc.loc[df_mc < 5e7].count()),
-                   'micro': int(df_mc.loc[(df_mc >= 5e7) & (df_mc <= 2.5e8)].count()),
-                   'small': int(df_mc.loc[df_mc >= 2.5e8].count())}
-    floats = {'low': int(df_f.loc[df_f < 1e7].count()),
-              'mid': int(df_f.loc[(df_f >= 1e7) & (df_f < 1e8)].count()),
-              'high': int(df_f.loc[df_f >= 1e8].count())}
-    change_percents = {'<-20': int(df_cfo.loc[df_cfo < 20].count()),
-                      '[-20, -10]': int(df_cfo.loc[(df_cfo >= -20) & (df_cfo <= -10)].count()),
-                      '(-10, -1)': int(df_cfo.loc[(df_cfo >= -10) & (df_cfo < 0)].count()),
-                      '[-1, 1]': int(df_cfo.loc[(df_cfo >= -1) & (df_cfo <= 1)].count()),
-                      '(1, 10)': int(df_cfo.loc[(df_cfo >= 0) & (df_cfo < 10)].count()),
-                      '[10, 20]': int(df_cfo.loc[(df_cfo >= 10) & (df_cfo <= 20)].count()),
-                      '>20': int(df_cfo.loc[df_cfo > 20].count())}
-    market_caps_labels = ['nano - 0-50M', 'micro - 50M-250M', 'small - >250M']
-    floats_labels = ['low - 0-10M', 'mid - 10M-100M', 'high - >100M']
+    high_to_open = df['High-to-Open %'].to_numpy()
+    chg_from_open = df['Chg from Open %'].to_numpy()
+    market_caps = dict(zip(MARKET_CAP_BUCKETS.names, MARKET_CAP_BUCKETS.counts(df['Market Cap'].to_numpy())))
+    floats = dict(zip(FLOAT_BUCKETS.names, FLOAT_BUCKETS.counts(df['Float'].to_numpy())))
+    change_percents = dict(zip(CHG_FROM_OPEN_BUCKETS.ranges(), CHG_FROM_OPEN_BUCKETS.counts(chg_from_open)))
+    market_caps_labels = MARKET_CAP_BUCKETS.labels()
+    floats_labels = FLOAT_BUCKETS.labels()
+    chg_min, chg_max = extremes(chg_from_open)
 
     def val_and_percent(pct_val: float, allvals: float) -> str:
         # https://matplotlib.org/stable/gallery/pie_and_polar_charts/pie_and_donut_labels.html#sphx-glr-gallery-pie-and-polar-charts-pie-and-donut-labels-py
@@ -260,8 +335,8 @@ def show_distributions() -> None:
     ax_hist1.set_ylabel('Frequency (log base 2)', fontdict=font_y)
     ax_hist1.set_yscale('log', base=2) # if histogram values are way too high, consider logarithmic scale
     ax_hist1.locator_params(axis='x', nbins=10)
-    df['High-to-Open %'].hist(ax=ax_hist1, bins=30, grid=False, edgecolor='black', color='lightblue',
-                              label=f'Highest: {df['High-to-Open %'].max(numeric_only=True):.2f} %')
+    ax_hist1.hist(high_to_open[~np.isnan(high_to_open)], bins=30, edgecolor='black', color='lightblue',
+                  label=f'Highest: {extremes(high_to_open)[1]:.2f} %')
     ax_hist1.legend(facecolor='grey')
 
     ax_hist2.set_facecolor('gainsboro')
@@ -269,9 +344,8 @@ def show_distributions() -> None:
     ax_hist2.set_xlabel('Chg from Open % = ((Close price/Open price)-1)*100', fontdict=font_x)
     ax_hist2.set_ylabel('Frequency (log base 2)', fontdict=font_y)
     ax_hist2.set_yscale('log', base=2)
-    df['Chg from Open %'].hist(ax=ax_hist2, bins=30, grid=False, edgecolor='black',
-                               label=f'Highest: {df['Chg from Open %'].max(numeric_only=True):.2f} % \n'+
-                                f'Lowest: {df['Chg from Open %'].min(numeric_only=True):.2f} %')
+    ax_hist2.hist(chg_from_open[~np.isnan(chg_from_open)], bins=30, edgecolor='black',
+                  label=f'Highest: {chg_max:.2f} % \nLowest: {chg_min:.2f} %')
     ax_hist2.legend(facecolor='grey')
 
     ax_pie1.pie([val for val in change_percents.values()], labels=change_percents.keys(), labeldistance=None,
@@ -300,37 +374,106 @@ def show_distributions() -> None:
     ax_pie1.legend(loc='upper right', bbox_to_anchor=(1.35, 0.95))
     ax_pie2.legend(loc='upper right', labels=market_caps_labels, bbox_to_anchor=(1.4, 1))
     ax_pie3.legend(loc='upper right', labels=floats_labels, bbox_to_anchor=(1.35, 1))
-    plt.show()
+    _show_or_save(save_path)
 
-def show_high_to_open_vs_float_and_mc() -> None:
+def show_high_to_open_vs_float_and_mc(save_path: Path | None = None) -> None:
     """Displays how float and market cap are correlated to high intraday moves.
     
     Measure of high moves is ((high-open)-1)*100 i.e. how much higher has price reached compared to open.
+
+    With more than DENSITY_THRESHOLD rows, points are aggregated into DENSITY_BINS bins on log-scaled y axis and drawn
+    as density maps instead, float and market cap side by side on shared axes, so drawing cost stays fixed however
+    long the history is.
     """
     plt.style.use(STYLE)
 
-    df = pd.read_excel(FilePaths.wb_path, 0, header=0, usecols=['Open', 'High', 'Float', 'Market Cap'])
+    df = plot_cache.load(['Open', 'High', 'Float', 'Market Cap'])
     df['High-to-Open %'] = ((df['High']/df['Open'])-1)*100
     df['High-to-Open %'] = df['High-to-Open %'].replace([np.inf, -np.inf], 0) # replace infinites with 0
-    df = df[['Float', 'High-to-Open %', 'Market Cap']].loc[(df['Float'] != '-') & (df['Market Cap'] != '-')]
+    df = df[['Float', 'High-to-Open %', 'Market Cap']].dropna()
+
+    x = df['High-to-Open %'].to_numpy()
+    y1 = df['Float'].to_numpy()
+    y2 = df['Market Cap'].to_numpy()
+    dense = len(x) > DENSITY_THRESHOLD
+    fig, axes = plt.subplots(1, 2 if dense else 1, sharex=True, sharey=True, squeeze=False)
+    axes = axes[0]
 
     font_x= {'family':'serif','color':'cornflowerblue','size':14}
     font_y = {'family':'serif','color':'cornflowerblue','size':14}
-    plt.title('Correlation between float/market cap and High-to-Open % values\n'
-              'High-to-Open % = ((High price/Open price)-1)*100')
-    plt.xlabel('High-to-Open %', fontdict=font_x)
-    plt.ylabel('Float / Market Cap (log10)', fontdict=font_y)
-    plt.locator_params(axis='x', nbins=20)
-    plt.ticklabel_format(style='plain', useOffset=False)
-    plt.axhline(y=1e7, color='gray', linestyle=':', label='10M threshold')
-    plt.yscale('log')
-
-    x = df['High-to-Open %'].astype('float')
-    y1 = df['Float'].astype('float')
-    y2 = df['Market Cap'].astype('float')
-    plt.scatter(x, y1, 12, color='deepskyblue', label='Float')
-    plt.scatter(x, y2, 12, color='gold', label='Market Cap')
-
-    plt.xlim(xmin=0.0)
-    plt.legend()
-    plt.show()
\ No newline at end of file
+    fig.suptitle('Correlation between float/market cap and High-to-Open % values\n'
+                 'High-to-Open % = ((High price/Open price)-1)*100')
+    axes[0].set_ylabel('Float / Market Cap (log10)', fontdict=font_y)
+    for ax in axes:
+        ax.set_xlabel('High-to-Open %', fontdict=font_x)
+        ax.locator_params(axis='x', nbins=20//len(axes))
+        ax.ticklabel_format(axis='x', style='plain', useOffset=False)
+        ax.axhline(y=1e7, color='gray', linestyle=':', label='10M threshold')
+        ax.set_yscale('log')
+
+    if not dense:
+        ax = axes[0]
+        ax.scatter(x, y1, 12, color='deepskyblue', label='Float')
+        ax.scatter(x, y2, 12, color='gold', label='Market Cap')
+        ax.set_xlim(xmin=0.0)
+        ax.legend()
+    else:
+        x_edges = np.linspace(0.0, max(float(x.max()), 1.0), DENSITY_BINS[0]+1)
+        y_edges = log_edges(np.concatenate([y1, y2]), DENSITY_BINS[1])
+        for ax, y, cmap, label in ((axes[0], y1, 'Blues', 'Float'), (axes[1], y2, 'YlOrBr', 'Market Cap')):
+            counts, _, _ = np.histogram2d(x, y, bins=(x_edges, y_edges))
+            mesh = ax.pcolormesh(x_edges, y_edges, np.ma.masked_equal(counts.T, 0), cmap=cmap, norm=LogNorm())
+            fig.colorbar(mesh, ax=ax, label='Rows per bin')
+            ax.set_title(f'{label} density of {len(x)} rows', loc='left')
+            ax.set_xlim(xmin=0.0)
+            ax.legend()
+    _show_or_save(save_path)
+
+def show_workbook_comparison(wb_names: list[str], save_path: Path | None = None) -> None:
+    """Compares daily values of several workbooks, aligned on date.
+
+    Draws one line per workbook in three panels: daily average High-to-Open %, daily average Chg from Open % and 
+    symbol count. Workbooks are loaded concurrently; dates missing from a workbook are left as gaps.
+
+    Args:
+        wb_names (list[str]): Names of workbooks to compare. Workbooks must have Date, Open, High and Chg from Open % 
+            columns in their main sheet.
+        save_path (Path | None = None): Save plot to this image file instead of showing it.
+    """
+    plt.style.use(STYLE)
+    wb_paths = [FilePaths.WB_FILES_ROOT_PATH/name/f'{name}.xlsx' for name in wb_names]
+    try:
+        frames = plot_cache.load_many(wb_paths, ['Date', 'Open', 'High', 'Chg from Open %'])
+    except FileNotFoundError as err:
+        print(f"Workbook not found: {err.filename}")
+        return
+    except KeyError as err:
+        print(f"All workbooks must have columns Date, Open, High and Chg from Open %: {err}")
+        return
+
+    high_to_open = {}
+    chg_from_open = {}
+    counts = {}
+    for name, df in zip(wb_names, frames):
+        df['High-to-Open %'] = (((df['High']/df['Open'])-1)*100).replace([np.inf, -np.inf], np.nan)
+        daily = df.groupby('Date')
+        high_to_open[name] = daily['High-to-Open %'].mean()
+        chg_from_open[name] = daily['Chg from Open %'].mean()
+        counts[name] = daily.size()
+    # outer join on date: every workbook is drawn against the same date positions
+    panels = [(pd.concat(high_to_open, axis=1).sort_index(), 'Average High-to-Open %'),
+              (pd.concat(chg_from_open, axis=1).sort_index(), 'Average Chg from Open %'),
+              (pd.concat(counts, axis=1).sort_index(), 'Symbol count')]
+    dates = panels[0][0].index.to_numpy()
+
+    fig, axes = plt.subplots(len(panels), 1, sharex=True)
+    fig.suptitle(f'Workbook comparison: {", ".join(wb_names)}')
+    for ax, (data, title) in zip(axes, panels):
+        ax.set_title(title, loc='left')
+        ax.yaxis.grid(color='gray', linestyle='--')
+        for name in wb_names:
+            _plot_line(ax, data[name], '.-', label=name)
+    axes[-1].xaxis.set_major_locator(plt.MaxNLocator(integer=True))
+    _label_positions(axes[-1], dates)
+    axes[0].legend()
+    _show_or_save(save_path)
\ No newline at end of file
@@ -0,0 +1,105 @@
+"""Headless batch rendering of plots to image files.
+
+Plots are rendered with the Agg backend in worker processes, so no display is needed and each date of 'daily cs' is
+drawn in parallel. Images are saved under workbook data/plots folder. Main sheet data and daily summary are cached
+before workers start, so workers load them from workbook data folder instead of reading the workbook again.
+"""
+
+from __future__ import annotations
+import concurrent.futures
+import logging
+from pathlib import Path
+
+import matplotlib
+
+import custom.small_cap1.plot as plot
+import custom.small_cap1.plot_cache as plot_cache
+from paths import FilePaths
+from query import QueryVars, QuerySchema
+from sheets import WorkbookSheets
+import workbook_tools
+
+logger = logging.getLogger('screenerfetch')
+
+# plot names, as in plot sub-menu, and their functions in plot.py
+PLOTS = {'avg daily': 'show_daily_average_candles',
+         'avg lines': 'show_average_lines',
+         'daily cs': 'show_daily_candles',
+         'dist': 'show_distributions',
+         'float': 'show_high_to_open_vs_float_and_mc'}
+FORMATS = ('png', 'svg')
+
+def _init_worker(wb_name: str, sheet_names: list[str], schema: QuerySchema) -> None:
+    matplotlib.use('Agg')
+    FilePaths.wb_name = wb_name
+    FilePaths.update_filepaths()
+    WorkbookSheets.sheet_names = sheet_names
+    QueryVars.schema = schema
+
+def _render(plot_name: str, date: str | None, save_path: Path) -> Path:
+    plot_function = getattr(plot, PLOTS[plot_name])
+    if date is None:
+        plot_function(save_path=save_path)
+    else:
+        plot_function(date, save_path=save_path)
+    return save_path
+
+def output_folder() -> Path:
+    """Returns folder of rendered images."""
+    return FilePaths.data_path/'plots'
+
+def render(plot_names: list[str],
+           since: str | None = None,
+           until: str | None = None,
+           image_format: str = 'png',
+           workers: int | None = None) -> list[Path]:
+    """Renders plots of current workbook to image files.
+
+    Args:
+        plot_names (list[str]): Plot names, keys of PLOTS.
+        since (str | None = None): With 'daily cs', first date (YYYY-MM-DD) to render. Defaults to first workbook date.
+        until (str | None = None): With 'daily cs', last date (YYYY-MM-DD) to render. Defaults to last workbook date.
+        image_format (str = 'png'): 'png' or 'svg'.
+        workers (int | None = None): Number of worker processes. Defaults to number of processors.
+
+    Returns:
+        list[Path]:
+        Paths of saved images, in render order. Plots which failed to render are left out.
+
+    Raises:
+        ValueError: Invalid plot name or image format.
+    """
+    for plot_name in plot_names:
+        if plot_name not in PLOTS:
+            raise ValueError(f"Unknown plot '{plot_name}'. Plots are: {', '.join(PLOTS)}.")
+    if image_format not in FORMATS:
+        raise ValueError(f"Unsupported image format '{image_format}'. Formats are: {', '.join(FORMATS)}.")
+
+    dates = plot_cache.load(['Date'])['Date'].unique().tolist()
+    if 'avg daily' in plot_names or 'avg lines' in plot_names:
+        workbook_tools.daily_summary()
+    tasks: list[tuple[str, str | None, Path]] = []
+    for plot_name in plot_names:
+        file_name = plot_name.replace(' ', '_')
+        if plot_name == 'daily cs':
+            for date in dates:
+                if (since is None or date >= since) and (until is None or date <= until):
+                    tasks.append((plot_name, date, output_folder()/f'{file_name}_{date}.{image_format}'))
+        else:
+            tasks.append((plot_name, None, output_folder()/f'{file_name}.{image_format}'))
+    logger.debug(f"plot_batch> render: {len(tasks)} images")
+    if not tasks:
+        return []
+
+    output_folder().mkdir(parents=True, exist_ok=True)
+    saved = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                                initargs=(FilePaths.wb_name, WorkbookSheets.sheet_names, 
+                                                          QueryVars.schema)) as executor:
+        futures = [executor.submit(_render, *task) for task in tasks]
+        for task, future in zip(tasks, futures):
+            try:
+                saved.append(future.result())
+            except Exception as err:
+                logger.warning(f"plot_batch> render: '{task[0]}' {task[1] or ''} failed: {err}")
+    return saved
@@ -0,0 +1,119 @@
+"""Main sheet data loader shared by all plot commands.
+
+Main sheet is read from the workbook only once: dates are normalized to 'YYYY-MM-DD' strings and all other columns
+except 'Symbol' are converted to numbers, with '-' and other non-numeric values as NaN. Result is kept in memory and in
+workbook data/plot_cache.pkl, both keyed by workbook modification time and size, so the workbook is read again only
+after it has changed.
+"""
+
+from __future__ import annotations
+import concurrent.futures
+import logging
+import os
+from pathlib import Path
+import pickle
+
+import pandas as pd
+
+from paths import FilePaths
+from row_index import date_key
+
+logger = logging.getLogger('screenerfetch')
+
+TEXT_COLUMNS = ('Date', 'Symbol')
+
+_memory_cache: dict[Path, tuple[tuple[int, int], pd.DataFrame]] = {}
+
+def _file_key(wb_path: Path) -> tuple[int, int]:
+    file_stat = os.stat(wb_path)
+    return file_stat.st_mtime_ns, file_stat.st_size
+
+def _cache_path(wb_path: Path) -> Path:
+    return wb_path.parent/'data'/'plot_cache.pkl'
+
+def _read_workbook(wb_path: Path) -> pd.DataFrame:
+    logger.debug(f"plot_cache> _read_workbook: Reading {wb_path.name}")
+    df = pd.read_excel(wb_path, 0, header=0)
+    df['Date'] = df['Date'].map(date_key)
+    for col in df.columns:
+        if col not in TEXT_COLUMNS:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df
+
+def _load_full(wb_path: Path) -> pd.DataFrame:
+    file_key = _file_key(wb_path)
+    cached = _memory_cache.get(wb_path)
+    if cached is not None and cached[0] == file_key:
+        return cached[1]
+    cache_path = _cache_path(wb_path)
+    try:
+        disk_cache = pd.read_pickle(cache_path)
+        df = disk_cache['data'] if disk_cache['key'] == file_key else None
+    except (OSError, EOFError, KeyError, TypeError, ValueError, pickle.UnpicklingError):
+        df = None
+    if df is None:
+        df = _read_workbook(wb_path)
+        if cache_path.parent.exists():
+            pd.to_pickle({'key': file_key, 'data': df}, cache_path)
+    _memory_cache[wb_path] = (file_key, df)
+    return df
+
+def load(columns: list[str] | None = None, wb_path: Path | None = None) -> pd.DataFrame:
+    """Returns main sheet data of a workbook.
+
+    Args:
+        columns (list[str] | None = None): Columns to return, in this order. None returns all columns.
+        wb_path (Path | None = None): Workbook path. Defaults to current workbook.
+
+    Returns:
+        pandas.DataFrame:
+        A copy of cached data, so callers can freely add or modify columns.
+    """
+    df = _load_full(wb_path or FilePaths.wb_path)
+    if columns is None:
+        return df.copy()
+    return df[columns].copy()
+
+def has_date(date_str: str, wb_path: Path | None = None) -> bool:
+    """Checks whether a date exists in main sheet.
+
+    Args:
+        date_str (str): Date string in a yyyy-mm-dd format.
+        wb_path (Path | None = None): Workbook path. Defaults to current workbook.
+
+    Returns:
+        bool:
+        True if date found, else False.
+    """
+    return bool((_load_full(wb_path or FilePaths.wb_path)['Date'] == date_str).any())
+
+def load_many(wb_paths: list[Path], columns: list[str] | None = None) -> list[pd.DataFrame]:
+    """Returns main sheet data of several workbooks.
+
+    Workbooks which are not cached in memory are loaded concurrently in worker processes, so loading time is bounded by
+    the largest workbook rather than the sum of all of them.
+
+    Args:
+        wb_paths (list[Path]): Workbook paths.
+        columns (list[str] | None = None): Columns to return, in this order. None returns all columns.
+
+    Returns:
+        list[pandas.DataFrame]:
+        Copies of cached data in the same order as wb_paths.
+
+    Raises:
+        FileNotFoundError: A workbook doesn't exist.
+    """
+    file_keys = {wb_path: _file_key(wb_path) for wb_path in wb_paths}
+    pending = [wb_path for wb_path, file_key in file_keys.items() 
+               if wb_path not in _memory_cache or _memory_cache[wb_path][0] != file_key]
+    logger.debug(f"plot_cache> load_many: Loading {len(pending)} of {len(file_keys)} workbooks")
+    if len(pending) > 1:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=len(pending)) as executor:
+            for wb_path, df in zip(pending, executor.map(_load_full, pending)):
+                _memory_cache[wb_path] = (file_keys[wb_path], df)
+    return [load(columns, wb_path) for wb_path in wb_paths]
+
+def clear() -> None:
+    """Empties in-memory cache."""
+    _memory_cache.clear()
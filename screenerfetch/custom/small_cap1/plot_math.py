@@ -0,0 +1,131 @@
+"""Vectorized statistics and downsampling used by plots."""
+
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from typing import Callable, Sequence
+
+def short_number(value: float) -> str:
+    """Formats a number with a K/M/B suffix, e.g. 2.5e8 -> '250M'."""
+    for divisor, suffix in ((1e9, 'B'), (1e6, 'M'), (1e3, 'K')):
+        if abs(value) >= divisor:
+            return f'{value/divisor:g}{suffix}'
+    return f'{value:g}'
+
+@dataclass(frozen=True)
+class Buckets:
+    """Value ranges of a frequency distribution.
+
+    Buckets are split at edges and include their lower edge: with edges (a, b), buckets are x < a, a <= x < b and
+    x >= b.
+
+    Attributes:
+        edges (tuple[float, ...]): Bucket edges in ascending order.
+        names (tuple[str, ...] | None): Bucket names, one more than edges. None to name buckets by their ranges.
+    """
+    edges: tuple[float, ...]
+    names: tuple[str, ...] | None = None
+
+    def __post_init__(self) -> None:
+        if list(self.edges) != sorted(self.edges):
+            raise ValueError("Bucket edges must be in ascending order.")
+        if self.names is not None and len(self.names) != len(self.edges)+1:
+            raise ValueError("There must be one more bucket name than bucket edges.")
+
+    def ranges(self, fmt: Callable[[float], str] = short_number) -> list[str]:
+        """Returns range of each bucket as text, e.g. ['<10', '[10, 20)', '>=20']."""
+        if not self.edges:
+            return ['all']
+        inner = [f'[{fmt(low)}, {fmt(high)})' for low, high in zip(self.edges, self.edges[1:])]
+        return [f'<{fmt(self.edges[0])}']+inner+[f'>={fmt(self.edges[-1])}']
+
+    def labels(self, fmt: Callable[[float], str] = short_number) -> list[str]:
+        """Returns bucket names followed by their ranges, or only ranges if buckets have no names."""
+        if self.names is None:
+            return self.ranges(fmt)
+        return [f'{name} - {bucket_range}' for name, bucket_range in zip(self.names, self.ranges(fmt))]
+
+    def counts(self, values: Sequence[float] | np.ndarray) -> np.ndarray:
+        """Counts values in each bucket with a single pass over values. NaN values are not counted.
+
+        Args:
+            values (Sequence[float] | numpy.ndarray): Numeric values.
+
+        Returns:
+            numpy.ndarray:
+            Count of each bucket.
+        """
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        return np.bincount(np.searchsorted(self.edges, values, side='right'), minlength=len(self.edges)+1)
+
+def extremes(values: Sequence[float] | np.ndarray) -> tuple[float, float]:
+    """Returns (min, max) of values ignoring NaN, or (NaN, NaN) if there are no values."""
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return np.nan, np.nan
+    return float(values.min()), float(values.max())
+
+def lttb(x: np.ndarray, y: np.ndarray, points: int) -> np.ndarray:
+    """Selects points of a line with largest-triangle-three-buckets downsampling.
+
+    First and last points are always kept. Points in between are split into equal buckets and from each bucket, the
+    point forming the largest triangle with the previously selected point and the average of the next bucket is kept.
+    This preserves visible peaks and troughs, unlike taking every nth point.
+
+    Args:
+        x (numpy.ndarray): X values in ascending order.
+        y (numpy.ndarray): Y values, without NaN.
+        points (int): Number of points to keep.
+
+    Returns:
+        numpy.ndarray:
+        Indices of kept points in ascending order; all indices if there are no more than points values.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if points >= n or points < 3:
+        return np.arange(n)
+    bucket_size = (n-2)/(points-2)
+    selected = np.empty(points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n-1
+    previous = 0
+    for bucket in range(points-2):
+        start = int(bucket*bucket_size)+1
+        end = int((bucket+1)*bucket_size)+1
+        next_end = min(int((bucket+2)*bucket_size)+1, n-1) if bucket < points-3 else n
+        next_start = min(end, next_end-1)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        areas = np.abs((x[previous]-avg_x)*(y[start:end]-y[previous])
+                       - (x[previous]-x[start:end])*(avg_y-y[previous]))
+        previous = start+int(areas.argmax())
+        selected[bucket+1] = previous
+    return selected
+
+def log_edges(values: np.ndarray, bins: int) -> np.ndarray:
+    """Returns bins+1 logarithmically spaced bin edges covering positive values.
+
+    Args:
+        values (numpy.ndarray): Values, of which only positive ones are covered.
+        bins (int): Number of bins.
+
+    Returns:
+        numpy.ndarray:
+        Bin edges in ascending order.
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[values > 0]
+    if len(values) == 0:
+        return np.logspace(0, 1, bins+1)
+    low, high = np.log10(values.min()), np.log10(values.max())
+    if low == high:
+        low, high = low-0.5, high+0.5
+    return np.logspace(low, high, bins+1)
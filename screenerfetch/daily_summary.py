@@ -0,0 +1,194 @@
+"""DailySummary class."""
+
+from __future__ import annotations
+import json
+import logging
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import openpyxl
+import pandas as pd
+
+from row_index import date_key
+
+if TYPE_CHECKING:
+    from typing import Any, Iterable
+
+logger = logging.getLogger('screenerfetch')
+
+STATS = ('count', 'sum', 'min', 'max', 'mean')
+
+def _number(value: Any) -> float | None:
+    """Returns a cell value as float, or None if it's not numeric. Float columns are stored as strings in xlsx."""
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+class DailySummary:
+    """Per-date aggregates of main worksheet numeric columns.
+
+    For each date, stores the number of rows, and count, sum, min and max of each column's numeric values; means are
+    derived from sums and counts. workbook_tools.save adds new rows to a stored summary, so reading daily values
+    costs one row per date instead of reading the whole sheet. Like RowIndex, a stored summary is keyed by workbook
+    file modification time and size: if workbook is changed any other way, e.g. rows are deleted or edited in Excel,
+    the summary is rebuilt on next load.
+    """
+    def __init__(self, columns: list[str], dates: dict[str, dict[str, Any]]) -> None:
+        self.columns = columns
+        self.dates = dates
+
+    @staticmethod
+    def _file_key(wb_path: Path) -> list[int]:
+        stat = os.stat(wb_path)
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def add_row(self, date: str, values: dict[str, Any]) -> None:
+        """Adds a row to the summary.
+
+        Args:
+            date (str): Row date in yyyy-mm-dd format.
+            values (dict[str, Any]): Column name -> cell value. Missing columns and non-numeric values are skipped.
+        """
+        day = self.dates.setdefault(date, {'rows': 0} | {col: [0, 0.0, None, None] for col in self.columns})
+        day['rows'] += 1
+        for col in self.columns:
+            number = _number(values.get(col))
+            if number is None:
+                continue
+            count, total, low, high = day[col]
+            day[col] = [count+1, total+number, number if low is None else min(low, number),
+                        number if high is None else max(high, number)]
+
+    @classmethod
+    def build(cls, wb_path: Path, sheet_name: str, columns: Iterable[str]) -> DailySummary:
+        """Builds a summary by reading all rows of a worksheet.
+
+        Args:
+            wb_path (Path): Workbook file path.
+            sheet_name (str): Worksheet name.
+            columns (Iterable[str]): Names of aggregated columns, as in xlsx headers. Columns missing from the sheet
+                are included without values.
+
+        Returns:
+            DailySummary:
+            New summary.
+        """
+        logger.debug(f"daily_summary> DailySummary.build: Sheet name '{sheet_name}'")
+        wb = openpyxl.load_workbook(wb_path, read_only=True)
+        ws = wb[sheet_name]
+        headers = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), ())
+        columns = list(columns)
+        positions = {col: headers.index(col) for col in columns if col in headers}
+        summary = cls(columns, {})
+        for row in ws.iter_rows(min_row=2, values_only=True):
+            key = date_key(row[0]) if row else None
+            if key is None:
+                continue
+            summary.add_row(key, {col: row[pos] for col, pos in positions.items() if pos < len(row)})
+        wb.close()
+        return summary
+
+    @classmethod
+    def load_current(cls, 
+                     wb_path: Path, 
+                     sheet_name: str, 
+                     summary_path: Path, 
+                     columns: Iterable[str] | None = None) -> DailySummary | None:
+        """Returns the stored summary if it's up to date with the workbook, without building a new one.
+
+        Args:
+            wb_path (Path): Workbook file path.
+            sheet_name (str): Worksheet name.
+            summary_path (Path): Summary json file path.
+            columns (Iterable[str] | None = None): Names of aggregated columns the summary must have, in order. None 
+                to accept any columns.
+
+        Returns:
+            DailySummary | None:
+            Stored summary, or None if there's none, workbook has changed since it was stored or it was built for other
+            columns.
+        """
+        try:
+            with open(summary_path) as f:
+                stored = json.load(f)
+            if (stored["file"] == cls._file_key(wb_path) and stored["sheet"] == sheet_name 
+                    and (columns is None or stored["columns"] == list(columns))):
+                return cls(stored["columns"], stored["dates"])
+        except (FileNotFoundError, json.decoder.JSONDecodeError, KeyError):
+            ...
+        return None
+
+    @classmethod
+    def load(cls, wb_path: Path, sheet_name: str, summary_path: Path, columns: Iterable[str]) -> DailySummary:
+        """Returns the stored summary if it's up to date with the workbook and columns, otherwise builds and stores a 
+        new one.
+
+        Args:
+            wb_path (Path): Workbook file path.
+            sheet_name (str): Worksheet name.
+            summary_path (Path): Summary json file path.
+            columns (Iterable[str]): Names of aggregated columns.
+
+        Returns:
+            DailySummary:
+            Summary matching current workbook file and columns.
+        """
+        columns = list(columns)
+        summary = cls.load_current(wb_path, sheet_name, summary_path, columns)
+        if summary is not None:
+            logger.debug("daily_summary> DailySummary.load: Using stored summary")
+            return summary
+        summary = cls.build(wb_path, sheet_name, columns)
+        summary.store(wb_path, sheet_name, summary_path)
+        return summary
+
+    def store(self, wb_path: Path, sheet_name: str, summary_path: Path) -> None:
+        """Stores summary as json, keyed by current workbook file. Call after workbook has been saved.
+
+        Args:
+            wb_path (Path): Workbook file path.
+            sheet_name (str): Worksheet name.
+            summary_path (Path): Summary json file path.
+        """
+        try:
+            with open(summary_path, 'w') as f:
+                json.dump({"file": self._file_key(wb_path), "sheet": sheet_name, "columns": self.columns,
+                           "dates": self.dates}, f)
+        except OSError:
+            logger.debug("daily_summary> DailySummary.store: Could not store summary")
+
+    def row_counts(self) -> pd.Series:
+        """Returns number of rows of each date, in date order."""
+        return pd.Series({date: day['rows'] for date, day in self.dates.items()}, dtype='int64').sort_index()
+
+    def frame(self, stat: str = 'mean') -> pd.DataFrame:
+        """Returns a statistic of each column per date.
+
+        Args:
+            stat (str='mean'): One of STATS: 'count', 'sum', 'min', 'max' or 'mean'.
+
+        Returns:
+            pandas.DataFrame:
+            Dates in yyyy-mm-dd format as index, in date order, and a column for each aggregated column. Dates with
+            no numeric values in a column have NaN, or 0 for 'count' and 'sum'.
+
+        Raises:
+            ValueError: Invalid stat.
+        """
+        if stat not in STATS:
+            raise ValueError(f"Invalid statistic '{stat}'. Use one of: {', '.join(STATS)}.")
+        data = {}
+        for col in self.columns:
+            values = {}
+            for date, day in self.dates.items():
+                count, total, low, high = day[col]
+                if stat == 'mean':
+                    values[date] = total/count if count else None
+                else:
+                    values[date] = {'count': count, 'sum': total, 'min': low, 'max': high}[stat]
+            data[col] = values
+        return pd.DataFrame(data, index=sorted(self.dates), columns=self.columns, dtype='float64')
@@ -0,0 +1,194 @@
+"""Workbook exports to SQLite and DuckDB database files."""
+
+from __future__ import annotations
+import logging
+import sqlite3
+from typing import TYPE_CHECKING
+
+import pandas as pd
+
+from paths import FilePaths
+from query import QueryVars
+from row_index import date_key
+from sheets import WorkbookSheets
+import workbook_tools
+
+if TYPE_CHECKING:
+    from typing import Any
+
+logger = logging.getLogger('screenerfetch')
+
+SQL_TYPES = {
+    'sqlite': {'date': 'TEXT', 'int': 'INTEGER', 'float': 'REAL', 'str': 'TEXT'},
+    'duckdb': {'date': 'DATE', 'int': 'BIGINT', 'float': 'DOUBLE', 'str': 'VARCHAR'}
+}
+FILE_SUFFIXES = {'sqlite': '.db', 'duckdb': '.duckdb'}
+SHEET2_COLUMNS = ['Date', 'Symbol', 'Notes', 'Intraday', 'Daily']
+OCCURRENCE_COLUMN = 'Occurrence'
+
+def _quote(name: str) -> str:
+    return '"'+name.replace('"', '""')+'"'
+
+def _column_types(headers: list[str]) -> list[str]:
+    """Returns value type of each main sheet column based on QueryVars.schema column of the same name.
+
+    First column is always the date. Columns which are not in the schema, e.g. in workbooks created with an older 
+    query, are stored as text.
+
+    Args:
+        headers (list[str]): Main sheet header names in column order.
+
+    Returns:
+        list[str]:
+        'date', 'int', 'float' or 'str' for each column.
+    """
+    dtypes = {spec.name: spec.dtype for spec in QueryVars.schema.columns[1:]}
+    return ['date']+[dtypes.get(header) or 'str' for header in headers[1:]]
+
+def _typed_frame(df: pd.DataFrame, types: list[str]) -> pd.DataFrame:
+    """Converts dataframe columns to database value types; '-' placeholders and empty cells become NULL values.
+
+    Args:
+        df (pandas.DataFrame): Sheet data.
+        types (list[str]): Value type of each column.
+
+    Returns:
+        pandas.DataFrame:
+        Converted data with object columns.
+    """
+    typed = pd.DataFrame(index=df.index)
+    for col, col_type in zip(df.columns, types):
+        if col_type == 'date':
+            typed[col] = df[col].map(date_key)
+        elif col_type == 'int':
+            typed[col] = pd.to_numeric(df[col], errors='coerce').astype('Int64')
+        elif col_type == 'float':
+            typed[col] = pd.to_numeric(df[col], errors='coerce')
+        else:
+            typed[col] = df[col].map(lambda v: None if v is None or pd.isna(v) else str(v))
+    typed = typed.astype(object)
+    return typed.where(typed.notna(), None)
+
+def _with_occurrences(df: pd.DataFrame) -> pd.DataFrame:
+    """Adds OCCURRENCE_COLUMN, numbering rows of the same date and symbol in sheet order from 0.
+
+    Repeated saves, e.g. in watch mode, add a row of the same symbol on the same date each time. The occurrence number 
+    tells these rows apart, so (date, symbol, occurrence) identifies each row as long as all rows of a date are read.
+    """
+    df = df.copy()
+    df[OCCURRENCE_COLUMN] = df.groupby([df.columns[0], df.columns[1]], dropna=False, sort=False).cumcount()
+    return df
+
+def _table_columns(connection: Any, engine: str, table: str) -> list[str] | None:
+    if engine == 'duckdb':
+        query = "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = ?"
+    else:
+        query = "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = ?"
+    if connection.execute(query, [table]).fetchone()[0] == 0:
+        return None
+    return [desc[0] for desc in connection.execute(f"SELECT * FROM {_quote(table)} LIMIT 0").description]
+
+def _create_table(connection: Any, 
+                  engine: str, 
+                  table: str, 
+                  headers: list[str], 
+                  types: list[str], 
+                  key: list[str]) -> None:
+    """Creates a table with a unique key, replacing an existing table if its columns differ.
+
+    First column is always the date and second the symbol.
+    """
+    existing = _table_columns(connection, engine, table)
+    if existing == headers:
+        return
+    if existing is not None:
+        print(f"Columns of table '{table}' have changed, rebuilding table.")
+        connection.execute(f"DROP TABLE {_quote(table)}")
+    col_defs = ', '.join(f"{_quote(h)} {SQL_TYPES[engine][t]}" for h, t in zip(headers, types))
+    key_cols = ', '.join(_quote(k) for k in key)
+    connection.execute(f"CREATE TABLE {_quote(table)} ({col_defs}, UNIQUE ({key_cols}))")
+    connection.execute(f"CREATE INDEX {_quote('idx_'+table+'_symbol')} ON {_quote(table)} ({_quote(headers[1])})")
+
+def _last_date(connection: Any, table: str, date_header: str) -> str | None:
+    last = connection.execute(f"SELECT MAX({_quote(date_header)}) FROM {_quote(table)}").fetchone()[0]
+    return None if last is None else str(last)
+
+def _insert(connection: Any, engine: str, table: str, df: pd.DataFrame, key: list[str], update: bool) -> None:
+    """Bulk inserts rows, skipping or updating rows with an existing key."""
+    if len(df.index) == 0:
+        return
+    headers = list(df.columns)
+    cols = ', '.join(_quote(h) for h in headers)
+    if update:
+        updates = ', '.join(f"{_quote(h)} = excluded.{_quote(h)}" for h in headers if h not in key)
+        conflict = f"ON CONFLICT ({', '.join(_quote(k) for k in key)}) DO UPDATE SET {updates}"
+    else:
+        conflict = "ON CONFLICT DO NOTHING"
+    if engine == 'duckdb':
+        connection.register('new_rows', df)
+        connection.execute(f"INSERT INTO {_quote(table)} ({cols}) SELECT {cols} FROM new_rows {conflict}")
+        connection.unregister('new_rows')
+    else:
+        placeholders = ', '.join('?' for _ in headers)
+        connection.executemany(f"INSERT INTO {_quote(table)} ({cols}) VALUES ({placeholders}) {conflict}",
+                               df.itertuples(index=False, name=None))
+
+def _connect(engine: str) -> Any:
+    db_path = FilePaths.data_path/str(FilePaths.wb_name+FILE_SUFFIXES[engine])
+    if engine == 'duckdb':
+        import duckdb
+        return duckdb.connect(str(db_path))
+    return sqlite3.connect(db_path)
+
+def export_database(engine: str = 'sqlite') -> None:
+    """Exports main sheet data, and sheet2 of small_cap1 workbooks, into a database file inside data folder.
+
+    Tables are named after worksheets and typed from QueryVars int and float columns. Main sheet table has an extra 
+    OCCURRENCE_COLUMN, so that rows of the same symbol and date from repeated saves are all kept. Repeated exports only 
+    read main sheet rows dated on or after the last exported date, and rows already in the table are skipped. Sheet2 
+    is small and user-edited, and has one row per date and symbol, so all of its rows are upserted. All writes happen 
+    in a single transaction.
+
+    Args:
+        engine (str='sqlite'): 'sqlite' or 'duckdb'. DuckDB requires package 'duckdb' to be installed.
+    """
+    logger.debug(f"database> export_database: Engine '{engine}'")
+    try:
+        connection = _connect(engine)
+    except ImportError:
+        print("DuckDB export requires package 'duckdb'; install it with 'pip install duckdb'.")
+        return
+    main_table = WorkbookSheets.sheet_names[0]
+    try:
+        connection.execute("BEGIN TRANSACTION")
+        headers = [h for h in pd.read_excel(FilePaths.wb_path, main_table, nrows=0).columns]
+        types = _column_types(headers)
+        key = [headers[0], headers[1], OCCURRENCE_COLUMN]
+        _create_table(connection, engine, main_table, headers+[OCCURRENCE_COLUMN], types+['int'], key)
+        since = _last_date(connection, main_table, headers[0])
+        logger.debug(f"database> export_database: Reading rows since {since}")
+        if since is None:
+            df = pd.read_excel(FilePaths.wb_path, main_table)
+        else:
+            df = workbook_tools.read_filtered_rows(since=since)
+        if df is None:
+            print(f"Could not read rows since last exported date '{since}', database not updated.")
+            connection.rollback()
+            return
+        df = df.dropna(subset=[headers[0]])
+        _insert(connection, engine, main_table, _with_occurrences(_typed_frame(df, types)), key, update=False)
+
+        if QueryVars.wb_type == 'small_cap1' and len(WorkbookSheets.sheet_names) > 1:
+            sheet2 = WorkbookSheets.sheet_names[1]
+            sheet2_types = ['date', 'str', 'str', 'str', 'str']
+            sheet2_key = SHEET2_COLUMNS[:2]
+            _create_table(connection, engine, sheet2, SHEET2_COLUMNS, sheet2_types, sheet2_key)
+            df2 = pd.read_excel(FilePaths.wb_path, sheet2, usecols=SHEET2_COLUMNS).dropna(subset=['Date'])
+            _insert(connection, engine, sheet2, _typed_frame(df2, sheet2_types), sheet2_key, update=True)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+    print(f'{FilePaths.wb_name}{FILE_SUFFIXES[engine]} updated in {FilePaths.wb_name}/data folder.')
@@ -0,0 +1,246 @@
+"""Concurrent request engine for TradingView scanner requests.
+
+Requests are sent from an asyncio event loop, each in its own worker thread. All requests pass through a shared
+concurrency limit and a token bucket rate limiter: every request takes one token, tokens refill at FetchEngine.rate per
+second and at most FetchEngine.burst tokens can be saved up.
+
+Concurrency limit adapts to how TradingView responds (additive increase, multiplicative decrease): each successful
+request raises the limit so that it grows by one per limit's worth of requests, up to FetchEngine.concurrency. Status
+429/503 responses and latency spikes halve it. Throttled requests are retried after the time given in Retry-After
+header, or after an exponential backoff, and no new requests are sent meanwhile. Limiter and bucket state persist
+between run() calls, so repeated fetches, e.g. in watch mode, keep the throughput they settled at.
+
+Use run() from synchronous code; it blocks until all requests have finished.
+"""
+
+from __future__ import annotations
+import asyncio
+import datetime
+import email.utils
+import logging
+import time
+from typing import TYPE_CHECKING
+
+import requests
+
+from query import FetchData
+
+if TYPE_CHECKING:
+    from typing import Any
+
+logger = logging.getLogger('screenerfetch')
+
+RETRY_STATUS_CODES = (429, 503)
+
+class TokenBucket:
+    """Token bucket rate limiter.
+
+    Tokens are only taken inside the event loop without awaiting in between, so no lock is needed.
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens+(now-self.updated)*self.rate)
+        self.updated = now
+
+    async def acquire(self) -> None:
+        """Waits until a token is available and takes it."""
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1-self.tokens)/self.rate)
+
+
+class AdaptiveLimit:
+    """Additive increase, multiplicative decrease concurrency limit.
+
+    Attributes:
+        maximum (int): Upper bound of limit.
+        limit (float): Current limit; requests in flight are kept at or below int(limit).
+        latency (float | None): Moving average of successful request latencies in seconds.
+        blocked_until (float): time.monotonic() value before which no new requests are sent.
+        last_decrease (float): time.monotonic() value of latest decrease.
+    """
+    SPIKE_FACTOR = 3.0
+    LATENCY_WEIGHT = 0.2
+
+    def __init__(self, maximum: int) -> None:
+        self.maximum = maximum
+        self.limit = float(maximum)
+        self.latency: float | None = None
+        self.blocked_until = 0.0
+        self.last_decrease = 0.0
+
+    def on_success(self, started: float, latency: float) -> None:
+        """Updates limit after a successful request.
+
+        Latency is always added to the moving average, also when it is a spike, so that a lasting increase in server 
+        latency becomes the new average instead of lowering the limit on every request.
+
+        Args:
+            started (float): time.monotonic() value when request was sent.
+            latency (float): Request latency in seconds.
+        """
+        average = self.latency
+        self.latency = latency if average is None else (1-self.LATENCY_WEIGHT)*average+self.LATENCY_WEIGHT*latency
+        if average is not None and latency > self.SPIKE_FACTOR*average:
+            self._decrease(started, f"latency spike {latency:.2f}s (average {average:.2f}s)")
+            return
+        if self.limit < self.maximum:
+            self.limit = min(self.maximum, self.limit+1/self.limit)
+            logger.debug(f"fetch_engine> AdaptiveLimit.on_success: Concurrency limit raised to {self.limit:.2f}")
+
+    def on_throttle(self, started: float, status_code: int, delay: float) -> None:
+        """Halves limit and blocks new requests for delay seconds.
+
+        Args:
+            started (float): time.monotonic() value when throttled request was sent.
+            status_code (int): Response status code.
+            delay (float): Seconds to wait before sending new requests.
+        """
+        self.blocked_until = max(self.blocked_until, time.monotonic()+delay)
+        logger.warning(f"fetch_engine> Throttled with status code {status_code}, pausing requests for {delay:.1f}s")
+        self._decrease(started, f"status code {status_code}")
+
+    def _decrease(self, started: float, reason: str) -> None:
+        # requests sent before the previous decrease were sent under the old limit, so they don't decrease it again
+        if started < self.last_decrease:
+            return
+        self.last_decrease = time.monotonic()
+        self.limit = max(1.0, self.limit/2)
+        logger.warning(f"fetch_engine> Concurrency limit lowered to {int(self.limit)} due to {reason}")
+
+
+class FetchEngine:
+    """Engine settings and shared limiters.
+
+    Attributes:
+        concurrency (int): Maximum number of requests in flight at once.
+        rate (float): Sustained requests per second.
+        burst (int): Number of requests that can be sent at once after an idle period.
+        page_size (int): Query ranges larger than this are split into pages which are fetched concurrently.
+        max_retries (int): How many times a throttled request is retried.
+        backoff (float): Base delay in seconds between retries when response has no Retry-After header. Doubles 
+            after each retry.
+    """
+    concurrency: int = 4
+    rate: float = 2.0
+    burst: int = 4
+    page_size: int = 500
+    max_retries: int = 3
+    backoff: float = 1.0
+    bucket: TokenBucket = TokenBucket(rate, burst)
+    limiter: AdaptiveLimit = AdaptiveLimit(concurrency)
+
+    @staticmethod
+    def configure(concurrency: int | None = None, rate: float | None = None, burst: int | None = None) -> None:
+        """Updates engine settings and resets limiters. Values left to None are not changed.
+
+        Raises:
+            ValueError: A value is not positive.
+        """
+        for name, value in (('concurrency', concurrency), ('rate', rate), ('burst', burst)):
+            if value is not None:
+                if value <= 0:
+                    raise ValueError(f"Fetch {name} must be positive.")
+                setattr(FetchEngine, name, value)
+        FetchEngine.bucket = TokenBucket(FetchEngine.rate, FetchEngine.burst)
+        FetchEngine.limiter = AdaptiveLimit(FetchEngine.concurrency)
+        logger.debug(f"fetch_engine> FetchEngine.configure: concurrency {FetchEngine.concurrency}, "
+                     f"rate {FetchEngine.rate}, burst {FetchEngine.burst}")
+
+
+def post(url: str, query: dict[str, Any]) -> requests.Response:
+    """Sends a query with FetchData.session if one is open, otherwise with a new connection."""
+    if FetchData.session is not None:
+        return FetchData.session.post(url=url, json=query, headers=FetchData.REQUEST_HEADERS)
+    return requests.post(url=url, json=query, headers=FetchData.REQUEST_HEADERS)
+
+def _retry_delay(response: requests.Response, attempt: int) -> float:
+    """Returns seconds to wait before retrying: Retry-After header value if given, else exponential backoff."""
+    retry_after = response.headers.get('Retry-After')
+    if retry_after is not None:
+        try:
+            return max(0.0, float(retry_after))
+        except (TypeError, ValueError):
+            try:
+                retry_time = email.utils.parsedate_to_datetime(retry_after)
+                return max(0.0, (retry_time-datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+            except (TypeError, ValueError):
+                ...
+    return FetchEngine.backoff*2**attempt
+
+
+class _Slots:
+    """In-flight request counter of a single run(), bounded by the adaptive limit."""
+
+    def __init__(self) -> None:
+        self.in_flight = 0
+        self.condition = asyncio.Condition()
+
+    async def __aenter__(self) -> None:
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.in_flight < int(FetchEngine.limiter.limit))
+            self.in_flight += 1
+
+    async def __aexit__(self, *_: Any) -> None:
+        async with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+
+async def _wait_unblocked(limiter: AdaptiveLimit) -> None:
+    while (wait := limiter.blocked_until-time.monotonic()) > 0:
+        await asyncio.sleep(wait)
+
+async def _send(url: str, query: dict[str, Any], slots: _Slots) -> tuple[Any, float]:
+    limiter = FetchEngine.limiter
+    for attempt in range(FetchEngine.max_retries+1):
+        # pauses and rate limit are waited for before taking a slot, so that slots are only held by requests in flight
+        while True:
+            await _wait_unblocked(limiter)
+            await FetchEngine.bucket.acquire()
+            async with slots:
+                if limiter.blocked_until > time.monotonic():
+                    continue
+                started = time.monotonic()
+                response = await asyncio.to_thread(post, url, query)
+                latency = time.monotonic()-started
+            break
+        if response.status_code == requests.codes.ok:
+            limiter.on_success(started, latency)
+            return response.json(), latency
+        if response.status_code not in RETRY_STATUS_CODES or attempt == FetchEngine.max_retries:
+            break
+        limiter.on_throttle(started, response.status_code, _retry_delay(response, attempt))
+    raise Exception(f"Status code {response.status_code}.")
+
+async def _send_all(request_list: list[tuple[str, dict[str, Any]]]) -> list[tuple[Any, float] | BaseException]:
+    slots = _Slots()
+    return await asyncio.gather(*(_send(url, query, slots) for url, query in request_list),
+                                return_exceptions=True)
+
+def run(request_list: list[tuple[str, dict[str, Any]]]) -> list[tuple[Any, float] | BaseException]:
+    """Sends all requests concurrently within engine limits and waits for them to finish.
+
+    Args:
+        request_list (list[tuple[str, dict[str, Any]]]): (url, query) pairs.
+
+    Returns:
+        list[tuple[Any, float] | BaseException]:
+        For each request in the same order, either a tuple of response json and latency in seconds, or the exception
+        raised by the request. A response with status code other than 200, after all retries, is returned as an 
+        Exception.
+    """
+    logger.debug(f"fetch_engine> run: {len(request_list)} requests")
+    if not request_list:
+        return []
+    return asyncio.run(_send_all(request_list))
@@ -0,0 +1,245 @@
+"""Intraday snapshot storage.
+
+Workbook rows only have a date, so several fetches of the same day can't be told apart. Intraday snapshots are stored
+with a full timestamp under workbook data/intraday folder instead, one compressed .npz file per day:
+
+    times       timestamps of all snapshots of the day
+    columns     column names, same as xlsx headers without the date column
+    snapshot    index into times for each row
+    removed     for each row, whether the symbol left the snapshots at that time
+    col0, ...   one array per column; numeric columns as floats, others as strings
+
+A row is only written when a symbol appears for the first time that day or any of its values change, so a symbol's
+values hold until its next row. When a symbol is missing from a snapshot, a removed row with empty values ends its
+previous values. Repeated fetches of unchanged data cost one timestamp each, keeping file size close to the amount of 
+distinct data rather than the number of fetches.
+
+Each append writes only its own rows, as a chunk file of the same format in a folder named after the day, so appending
+doesn't get slower as the day grows. Chunks are compacted into the day file when the day is read.
+"""
+
+from __future__ import annotations
+import datetime
+import logging
+import os
+from pathlib import Path
+import tempfile
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+from paths import FilePaths
+from query import QueryVars
+
+if TYPE_CHECKING:
+    from typing import Any
+
+logger = logging.getLogger('screenerfetch')
+
+def _folder() -> Path:
+    return FilePaths.data_path/'intraday'
+
+def _partition_path(day: datetime.date) -> Path:
+    return _folder()/f'{day.isoformat()}.npz'
+
+def _chunk_folder(day: datetime.date) -> Path:
+    return _folder()/day.isoformat()
+
+def _folder_mtime(folder: Path) -> int:
+    try:
+        return os.stat(folder).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+def _read_npz(path: Path) -> dict[str, np.ndarray] | None:
+    try:
+        with np.load(path) as npz:
+            return {key: npz[key] for key in npz.files}
+    except FileNotFoundError:
+        return None
+
+def _write_npz(path: Path, arrays: dict[str, np.ndarray]) -> None:
+    """Writes arrays to a temporary file which then replaces the previous file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix='.npz.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+def _merge(parts: list[dict[str, np.ndarray]]) -> dict[str, np.ndarray]:
+    """Concatenates snapshots of partitions with the same columns, in list order."""
+    offsets = np.cumsum([0]+[len(part['times']) for part in parts[:-1]])
+    merged = {'times': np.concatenate([part['times'] for part in parts]),
+              'columns': parts[0]['columns'],
+              'snapshot': np.concatenate([part['snapshot']+offset for part, offset in zip(parts, offsets)]),
+              'removed': np.concatenate([part['removed'] for part in parts])}
+    return merged | {f'col{i}': np.concatenate([part[f'col{i}'] for part in parts])
+                     for i in range(len(parts[0]['columns']))}
+
+def _read_part(path: Path) -> dict[str, np.ndarray] | None:
+    """Reads a day file or chunk. Files stored before removed rows were recorded have no removed rows."""
+    part = _read_npz(path)
+    if part is not None and 'removed' not in part:
+        part['removed'] = np.zeros(len(part['snapshot']), dtype=bool)
+    return part
+
+def _load_partition(day: datetime.date) -> dict[str, np.ndarray] | None:
+    """Loads a day partition. Chunks appended since the day was last loaded are compacted into the day file."""
+    partition = _read_part(_partition_path(day))
+    try:
+        chunk_paths = sorted(path for path in _chunk_folder(day).iterdir() if path.suffix == '.npz')
+    except FileNotFoundError:
+        chunk_paths = []
+    if not chunk_paths:
+        return partition
+    logger.debug(f"intraday> _load_partition: Compacting {len(chunk_paths)} chunks of {day}")
+    parts = [] if partition is None else [partition]
+    partition = _merge(parts+[_read_part(path) for path in chunk_paths])
+    _write_npz(_partition_path(day), partition)
+    for path in chunk_paths:
+        os.remove(path)
+    return partition
+
+def _snapshot_columns(symbol_data: list[list[Any]]) -> tuple[list[str], list[np.ndarray]]:
+    """Converts fetched symbol data into typed column arrays, using QueryVars.schema column types."""
+    names = []
+    arrays = []
+    for position, spec in enumerate(QueryVars.schema.data_columns):
+        values = [row[position] for row in symbol_data]
+        names.append(spec.name)
+        if spec.dtype in ('int', 'float'):
+            arrays.append(pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(np.float64))
+        else:
+            arrays.append(np.array(['' if v is None else str(v) for v in values], dtype=str))
+    return names, arrays
+
+def _last_rows(partition: dict[str, np.ndarray], n_columns: int) -> dict[str, tuple[Any, ...]]:
+    """Returns the latest stored values of each symbol in a partition, for symbols which haven't been removed."""
+    rows = zip(*(partition[f'col{i}'].tolist() for i in range(n_columns)))
+    last_rows = {}
+    for row, removed in zip(rows, partition['removed'].tolist()):
+        if removed:
+            last_rows.pop(row[0], None)
+        else:
+            last_rows[row[0]] = row
+    return last_rows
+
+def _same(old: tuple[Any, ...], new: tuple[Any, ...]) -> bool:
+    return all(a == b or (isinstance(a, float) and isinstance(b, float) and np.isnan(a) and np.isnan(b))
+               for a, b in zip(old, new))
+
+# Chunk folder -> (folder modification time, column names, latest stored values of each symbol) of days appended to 
+# by this process. Chunks written by another process change the folder modification time, which reloads the day.
+_day_states: dict[Path, tuple[int, list[str], dict[str, tuple[Any, ...]]]] = {}
+
+def append(symbol_data: list[list[Any]], timestamp: datetime.datetime | None = None) -> int:
+    """Stores fetched symbol data as an intraday snapshot.
+
+    Args:
+        symbol_data (list[list[Any]]): Fetched data, as in FetchData.query_data. First column is the symbol.
+        timestamp (datetime.datetime | None = None): Snapshot time. Defaults to current local time.
+
+    Returns:
+        int:
+        Number of symbols which are new or have changed values since their previous row. A removed row is written in 
+        addition for each symbol missing from symbol_data.
+
+    Raises:
+        ValueError: Query columns differ from columns of snapshots already stored for the same day.
+    """
+    timestamp = timestamp or datetime.datetime.now()
+    logger.debug(f"intraday> append: Snapshot {timestamp}")
+    names, new_columns = _snapshot_columns(symbol_data)
+    chunk_folder = _chunk_folder(timestamp.date())
+    state = _day_states.get(chunk_folder)
+    if state is None or state[0] != _folder_mtime(chunk_folder):
+        partition = _load_partition(timestamp.date())
+        if partition is None:
+            state = (0, names, {})
+        else:
+            columns = partition['columns'].tolist()
+            state = (0, columns, _last_rows(partition, len(columns)))
+    _, columns, last_rows = state
+    if columns != names:
+        raise ValueError(f"Query columns differ from intraday snapshots of {timestamp.date()}. "
+                         "Use a separate workbook for the new query.")
+
+    rows = list(zip(*(column.tolist() for column in new_columns)))
+    changed = [i for i, row in enumerate(rows) if row[0] not in last_rows or not _same(last_rows[row[0]], row)]
+    removed = sorted(last_rows.keys()-{row[0] for row in rows})
+    chunk = {'times': np.array([np.datetime64(timestamp, 'us')]),
+             'columns': np.array(names, dtype=str),
+             'snapshot': np.zeros(len(changed)+len(removed), dtype=np.int32),
+             'removed': np.array([False]*len(changed)+[True]*len(removed), dtype=bool)}
+    for i, column in enumerate(new_columns):
+        if i == 0:
+            removed_values = np.array(removed, dtype=str)
+        else:
+            removed_values = np.full(len(removed), np.nan if column.dtype == np.float64 else '', dtype=column.dtype)
+        chunk[f'col{i}'] = np.concatenate([column[changed], removed_values])
+    _write_npz(chunk_folder/f'{timestamp:%H%M%S%f}.npz', chunk)
+    last_rows.update((rows[i][0], rows[i]) for i in changed)
+    for symbol in removed:
+        del last_rows[symbol]
+    _day_states[chunk_folder] = (_folder_mtime(chunk_folder), columns, last_rows)
+    return len(changed)
+
+def history(symbol: str,
+            since: datetime.datetime,
+            until: datetime.datetime,
+            fill: bool = False) -> pd.DataFrame:
+    """Returns intraday values of a symbol within a time window, e.g. its pre-market evolution.
+
+    Args:
+        symbol (str): Symbol name.
+        since (datetime.datetime): Window start, inclusive.
+        until (datetime.datetime): Window end, inclusive.
+        fill (bool=False): Return a row for every snapshot in the window which includes the symbol, repeating 
+            unchanged values. By default only rows where values changed are returned, along with the symbol's values 
+            at window start. A row with empty values marks when the symbol left the snapshots.
+
+    Returns:
+        pandas.DataFrame:
+        'Time' column followed by snapshot columns, one row per timestamp.
+    """
+    logger.debug(f"intraday> history: {symbol} {since} - {until}")
+    frames = []
+    times = []
+    day = since.date()
+    while day <= until.date():
+        partition = _load_partition(day)
+        day += datetime.timedelta(days=1)
+        if partition is None:
+            continue
+        names = partition['columns'].tolist()
+        df = pd.DataFrame({name: partition[f'col{i}'] for i, name in enumerate(names)})
+        df.insert(0, 'Time', partition['times'][partition['snapshot']].astype('datetime64[ns]'))
+        df['removed'] = partition['removed']
+        frames.append(df[df[names[0]] == symbol])
+        times.append(partition['times'].astype('datetime64[ns]'))
+    if not frames:
+        return pd.DataFrame(columns=['Time'])
+    rows = pd.concat(frames, ignore_index=True)
+    if len(rows.index) == 0:
+        return rows.drop(columns='removed')
+    start = pd.Timestamp(since)
+    end = pd.Timestamp(until)
+    if fill:
+        snapshot_times = pd.DatetimeIndex(np.concatenate(times))
+        snapshot_times = snapshot_times[(snapshot_times >= max(start, rows['Time'].min())) & (snapshot_times <= end)]
+        filled = rows.astype({'removed': float}).set_index('Time')
+        filled = filled.reindex(pd.DatetimeIndex(rows['Time']).union(snapshot_times)).ffill().loc[snapshot_times]
+        filled = filled[filled['removed'] == 0].drop(columns='removed')
+        return filled.rename_axis('Time').reset_index()
+    before = rows[rows['Time'] < start].tail(1)
+    before = before[~before['removed']].drop(columns='removed')
+    rows = rows.drop(columns='removed')
+    in_window = rows[(rows['Time'] >= start) & (rows['Time'] <= end)]
+    if len(before.index) > 0 and (len(in_window.index) == 0 or in_window['Time'].iloc[0] > start):
+        in_window = pd.concat([before.assign(Time=start), in_window], ignore_index=True)
+    return in_window.reset_index(drop=True)
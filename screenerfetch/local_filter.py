@@ -0,0 +1,193 @@
+"""Local evaluation of query 'filter', 'sort' and 'range' values.
+
+Evaluates the same filter grammar TradingView scanner uses, e.g.
+
+    {"left": "premarket_change", "operation": "greater", "right": 7}
+
+on a dataframe of previously fetched screener data. This way, a single broad fetch can be narrowed down into several
+different workbooks without sending a new request for each of them.
+
+Right side of a comparison can refer to another column as {"column": "<name>"}. A plain string is a column name in 
+numeric comparisons greater, egreater, less and eless, and a literal value in equal and nequal, e.g. 
+{"left": "sector", "operation": "equal", "right": "Technology"}.
+
+All operations are vectorized over dataframe columns.
+"""
+
+from __future__ import annotations
+import logging
+from typing import TYPE_CHECKING
+
+import pandas as pd
+
+if TYPE_CHECKING:
+    from typing import Any, Callable
+
+logger = logging.getLogger('screenerfetch')
+
+def _numeric(series: pd.Series) -> pd.Series:
+    return pd.to_numeric(series, errors='coerce')
+
+NUMERIC_COMPARISONS = ('greater', 'egreater', 'less', 'eless')
+
+def _column_reference(right: Any, numeric: bool) -> str | None:
+    """Returns column name the right side of a comparison refers to, or None if it's a literal value."""
+    if isinstance(right, dict) and isinstance(right.get("column"), str):
+        return right["column"]
+    if isinstance(right, str) and numeric:
+        return right
+    return None
+
+def _right_values(df: pd.DataFrame, right: Any) -> Any:
+    """Returns right side of a numeric comparison: a column if right refers to one, else the value itself."""
+    column = _column_reference(right, True)
+    return right if column is None else _numeric(df[column])
+
+def _equal(df: pd.DataFrame, series: pd.Series, right: Any) -> pd.Series:
+    column = _column_reference(right, False)
+    return series == (right if column is None else df[column])
+
+def _in_range(series: pd.Series, right: Any) -> pd.Series:
+    if (isinstance(right, list) and len(right) == 2
+            and all(isinstance(val, (int, float)) and not isinstance(val, bool) for val in right)):
+        return _numeric(series).between(right[0], right[1])
+    return series.isin(right)
+
+def _has(series: pd.Series, right: Any) -> pd.Series:
+    values = right if isinstance(right, list) else [right]
+    exploded = series.map(lambda v: v.split(', ') if isinstance(v, str) else v).explode()
+    return exploded.isin(values).groupby(level=0).any().reindex(series.index, fill_value=False)
+
+def _is_empty(series: pd.Series) -> pd.Series:
+    return series.isna() | series.isin(['', '-'])
+
+OPERATIONS: dict[str, Callable[[pd.DataFrame, pd.Series, Any], pd.Series]] = {
+    'greater': lambda df, s, r: _numeric(s) > _right_values(df, r),
+    'egreater': lambda df, s, r: _numeric(s) >= _right_values(df, r),
+    'less': lambda df, s, r: _numeric(s) < _right_values(df, r),
+    'eless': lambda df, s, r: _numeric(s) <= _right_values(df, r),
+    'equal': lambda df, s, r: _equal(df, s, r),
+    'nequal': lambda df, s, r: ~_equal(df, s, r),
+    'in_range': lambda df, s, r: _in_range(s, r),
+    'not_in_range': lambda df, s, r: ~_in_range(s, r),
+    'has': lambda df, s, r: _has(s, r),
+    'has_none_of': lambda df, s, r: ~_has(s, r),
+    'match': lambda df, s, r: s.astype(str).str.contains(str(r), case=False, regex=False),
+    'nmatch': lambda df, s, r: ~s.astype(str).str.contains(str(r), case=False, regex=False),
+    'empty': lambda df, s, r: _is_empty(s),
+    'nempty': lambda df, s, r: ~_is_empty(s)
+}
+
+def _filter_expressions(query: dict[str, Any]) -> list[dict[str, Any]]:
+    """Returns all filter expressions of query 'filter' list and 'filter2' operand tree."""
+    expressions = list(query.get("filter", []))
+    nodes = [query["filter2"]] if "filter2" in query else []
+    while nodes:
+        node = nodes.pop()
+        if "expression" in node:
+            expressions.append(node["expression"])
+        elif "operation" in node:
+            nodes.append(node["operation"])
+        else:
+            nodes.extend(node.get("operands", []))
+    return expressions
+
+def _expression_mask(df: pd.DataFrame, expression: dict[str, Any]) -> pd.Series:
+    operation = expression["operation"]
+    if operation not in OPERATIONS:
+        raise ValueError(f"Filter operation '{operation}' is not supported in local evaluation.")
+    return OPERATIONS[operation](df, df[expression["left"]], expression.get("right")).fillna(False).astype(bool)
+
+def _operand_mask(df: pd.DataFrame, node: dict[str, Any]) -> pd.Series:
+    """Evaluates a 'filter2' node: an expression, or an 'and'/'or' operation over a list of operands."""
+    if "expression" in node:
+        return _expression_mask(df, node["expression"])
+    if "operation" in node:
+        return _operand_mask(df, node["operation"])
+    operator = node.get("operator", "and")
+    if operator not in ("and", "or"):
+        raise ValueError(f"Filter operator '{operator}' is not supported in local evaluation.")
+    mask = pd.Series(operator == "and", index=df.index)
+    for operand in node.get("operands", []):
+        if operator == "and":
+            mask &= _operand_mask(df, operand)
+        else:
+            mask |= _operand_mask(df, operand)
+    return mask
+
+def required_columns(query: dict[str, Any]) -> list[str]:
+    """Returns all data columns needed for evaluating a query locally.
+
+    Args:
+        query (dict[str, Any]): Query dictionary.
+
+    Returns:
+        list[str]:
+        Query columns, filter and filter2 columns and sort column, without duplicates.
+    """
+    columns = list(query.get("columns", []))
+    for query_filter in _filter_expressions(query):
+        columns.append(query_filter["left"])
+        right_column = _column_reference(query_filter.get("right"), query_filter["operation"] in NUMERIC_COMPARISONS)
+        if right_column is not None:
+            columns.append(right_column)
+    if "sort" in query:
+        columns.append(query["sort"]["sortBy"])
+    return list(dict.fromkeys(columns))
+
+def evaluate(df: pd.DataFrame, query: dict[str, Any]) -> pd.DataFrame:
+    """Applies query filters, sorting and range to a dataframe of screener data.
+
+    Dataframe must have a column for each value listed by required_columns(). Filters are combined with logical and,
+    just like TradingView does with query 'filter' lists, and with the result of 'filter2' and/or operand tree.
+
+    Args:
+        df (pandas.DataFrame): Screener data, one symbol per row and one query column per dataframe column. Column 's'
+            can contain full ticker names such as 'NASDAQ:NVDA'; this is used by query 'symbols' tickers.
+        query (dict[str, Any]): Query dictionary.
+
+    Returns:
+        pandas.DataFrame:
+        Matching rows, sorted and sliced to query range.
+
+    Raises:
+        ValueError: Query has unsupported values, or dataframe is missing required columns.
+    """
+    logger.debug("local_filter> evaluate")
+    missing = [col for col in required_columns(query) if col not in df.columns]
+    if missing:
+        raise ValueError(f"Cached data is missing columns: {', '.join(missing)}.")
+    df = df.reset_index(drop=True)
+    mask = pd.Series(True, index=df.index)
+    for query_filter in query.get("filter", []):
+        mask &= _expression_mask(df, query_filter)
+    if "filter2" in query:
+        mask &= _operand_mask(df, query["filter2"])
+    tickers = query.get("symbols", {}).get("tickers", [])
+    if tickers and 's' in df.columns:
+        mask &= df['s'].isin(tickers)
+    return sort_and_slice(df.loc[mask], query)
+
+def sort_and_slice(df: pd.DataFrame, query: dict[str, Any]) -> pd.DataFrame:
+    """Applies query 'sort' and 'range' values to a dataframe.
+
+    Args:
+        df (pandas.DataFrame): Screener data; must have query sortBy column if query has 'sort'.
+        query (dict[str, Any]): Query dictionary.
+
+    Returns:
+        pandas.DataFrame:
+        Sorted rows, sliced to query range.
+    """
+    result = df
+    if "sort" in query:
+        sort = query["sort"]
+        sort_col = result[sort["sortBy"]]
+        key = _numeric(sort_col) if _numeric(sort_col).notna().any() else sort_col
+        order = key.sort_values(ascending=sort.get("sortOrder", "asc") == "asc", kind='stable',
+                                na_position='first' if sort.get("nullsFirst", False) else 'last').index
+        result = result.loc[order]
+    if "range" in query:
+        start, end = query["range"]
+        result = result.iloc[start:end]
+    return result
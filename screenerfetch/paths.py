@@ -23,6 +23,7 @@ class FilePaths:
 
     TXT_NAME = 'api_data'
     TXT_PATH = WB_FILES_ROOT_PATH/f'{TXT_NAME}.txt'
+    SNAPSHOT_NAME = 'snapshot.pkl'
 
     @staticmethod
     def update_filepaths() -> None:
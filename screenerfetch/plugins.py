@@ -0,0 +1,114 @@
+"""Registry of custom workbook packages.
+
+Each package under screenerfetch/custom describes itself in a plugin.json file:
+
+    {
+        "description": "Short description shown when selecting a workbook type.",
+        "entry_points": {
+            "create": "c_workbook_tools:create_custom_wb",
+            "commands": "c_commands:select_custom_command"
+        }
+    }
+
+Entry points are 'module:attribute' names inside the package. Listing packages only reads these files; a package
+module is imported when one of its entry points is loaded, e.g. when a workbook of its type is created or its custom
+commands are entered. This way packages with heavy dependencies don't slow down starting the program.
+
+Entry points used by screenerfetch:
+    create: Creates a workbook of the package type. Required.
+    commands: Opens the custom command interface, see command 'custom'.
+    batch_plot: Saves plots as image files, see script option --plot.
+    live_view: Class of a plot view updated during watch mode, see script option --live. Its instances have methods
+        pause(seconds), used as watch mode sleep function, and close().
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+import importlib
+import json
+import logging
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from paths import FilePaths
+
+if TYPE_CHECKING:
+    from typing import Any
+
+logger = logging.getLogger('screenerfetch')
+
+METADATA_FILE = 'plugin.json'
+
+@dataclass(frozen=True)
+class CustomPackage:
+    """Metadata of a custom workbook package.
+
+    Attributes:
+        name (str): Package folder name, which is also the workbook type.
+        description (str): Short description of the workbook type.
+        entry_points (dict[str, str]): Entry point name -> 'module:attribute' inside the package.
+    """
+    name: str
+    description: str
+    entry_points: dict[str, str]
+
+    def load(self, entry_point: str) -> Any:
+        """Imports the module of an entry point and returns the attribute it names.
+
+        Args:
+            entry_point (str): Entry point name, e.g. 'create'.
+
+        Returns:
+            Any:
+            Entry point attribute, usually a function.
+
+        Raises:
+            KeyError: Package has no such entry point.
+        """
+        module_name, attribute = self.entry_points[entry_point].split(':')
+        logger.debug(f"plugins> CustomPackage.load: '{self.name}' entry point '{entry_point}'")
+        module = importlib.import_module(f'custom.{self.name}.{module_name}')
+        return getattr(module, attribute)
+
+def discover(custom_path: Path) -> dict[str, CustomPackage]:
+    """Reads metadata of all custom packages in a folder, without importing them.
+
+    Folders starting with '_' or '.' and folders without a valid plugin.json, including a 'create' entry point, are 
+    skipped.
+
+    Args:
+        custom_path (Path): Folder of custom packages.
+
+    Returns:
+        dict[str, CustomPackage]:
+        Package name -> package, in name order.
+    """
+    packages = {}
+    for folder in sorted(custom_path.iterdir()):
+        if folder.name.startswith(('_', '.')) or not folder.is_dir():
+            continue
+        try:
+            with open(folder/METADATA_FILE) as f:
+                metadata = json.load(f)
+            entry_points = dict(metadata["entry_points"])
+        except (FileNotFoundError, json.decoder.JSONDecodeError, KeyError, TypeError, ValueError) as err:
+            logger.debug(f"plugins> discover: Skipped '{folder.name}': {err!r}")
+            continue
+        if "create" not in entry_points:
+            logger.debug(f"plugins> discover: Skipped '{folder.name}': No 'create' entry point")
+            continue
+        packages[folder.name] = CustomPackage(folder.name, metadata.get("description", ''), entry_points)
+    return packages
+
+_packages: dict[str, CustomPackage] | None = None
+
+def packages() -> dict[str, CustomPackage]:
+    """Returns custom packages of screenerfetch/custom folder. Folder is read on first call only."""
+    global _packages
+    if _packages is None:
+        _packages = discover(FilePaths.PATH/'custom')
+    return _packages
+
+def get(wb_type: str) -> CustomPackage | None:
+    """Returns custom package of a workbook type, or None if there's no such package, e.g. for 'basic'."""
+    return packages().get(wb_type)
@@ -5,21 +5,28 @@
 
 from __future__ import annotations
 import copy
-import json
+from dataclasses import dataclass, field
 import logging
 from typing import TYPE_CHECKING
 
+import column_letters
 from paths import FilePaths
+from settings_store import SettingsStore
 
 if TYPE_CHECKING:
     from typing import Any
 
+    import requests
+
 logger = logging.getLogger('screenerfetch')
 
 class FetchData:
     """Wrapper class that stores request headers + screener data for excel workbooks.
     
     query_data should only be modified by calling commands.fetch().
+
+    session is None unless a long-running mode such as watch mode opens one; requests then reuse its connections 
+    instead of opening a new connection each time.
     """
     REQUEST_HEADERS = {
     'accept': 'application/json',
@@ -34,6 +41,116 @@ class FetchData:
     'user-agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:133.0) Gecko/20100101 Firefox/133.0'
     } 
     query_data: list[list[str]] = []
+    session: requests.Session | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class ColumnSpec:
+    """Precompiled metadata of a single workbook column.
+
+    Attributes:
+        index (int): 1-based xlsx column index.
+        letter (str): Xlsx column letter.
+        name (str): Display name, either a custom header name or query column name.
+        field (str): Query column name; 'date' for the date column.
+        dtype (str | None): 'date', 'int', 'float' or None for values which are stored as they are.
+        decimals (int | None): Decimal count of a float column, None if values are not rounded.
+        number_format (str): Xlsx cell number format.
+    """
+    index: int
+    letter: str
+    name: str
+    field: str
+    dtype: str | None
+    decimals: int | None
+    number_format: str
+
+    def convert(self, value: Any) -> Any:
+        """Converts a value to this column's numeric type.
+
+        Integers are rounded down, floats are rounded to column decimals and stored as strings to preserve trailing 
+        zeros. Other columns, '-' placeholders and empty values are returned unchanged.
+
+        Args:
+            value (Any): Cell or fetched data value.
+
+        Returns:
+            Any:
+            Converted value.
+
+        Raises:
+            ValueError, TypeError: Value can't be converted to a number.
+        """
+        if value is None or value == '-':
+            return value
+        if self.dtype == 'int':
+            return int(float(value))
+        if self.dtype == 'float' and self.decimals is not None:
+            return f"{float(value):.{self.decimals}f}"
+        return value
+
+
+@dataclass(frozen=True, slots=True)
+class QuerySchema:
+    """Immutable column schema of current query; built by QueryVars.update_query_variables.
+
+    Attributes:
+        columns (tuple[ColumnSpec, ...]): All columns in xlsx order, date column first.
+        data_columns (tuple[ColumnSpec, ...]): Columns of fetched data i.e. all but the date column.
+        numeric_columns (tuple[ColumnSpec, ...]): All int and float data columns, including float columns without 
+            decimals, whose values are saved as fetched.
+        converted_columns (tuple[ColumnSpec, ...]): Numeric columns whose values are converted when saved: int columns
+            and float columns with decimals.
+    """
+    columns: tuple[ColumnSpec, ...]
+    data_columns: tuple[ColumnSpec, ...] = field(init=False)
+    numeric_columns: tuple[ColumnSpec, ...] = field(init=False)
+    converted_columns: tuple[ColumnSpec, ...] = field(init=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, 'data_columns', self.columns[1:])
+        object.__setattr__(self, 'numeric_columns', tuple(
+            spec for spec in self.columns[1:] if spec.dtype in ('int', 'float')))
+        object.__setattr__(self, 'converted_columns', tuple(
+            spec for spec in self.numeric_columns if spec.dtype == 'int' or spec.decimals is not None))
+
+    @staticmethod
+    def build(query_cols: list[str],
+              column_headers: dict[str, str],
+              int_columns: list[str],
+              float_columns: list[str],
+              float_decimals: dict[str, int]) -> QuerySchema:
+        """Builds a schema from QueryVars.get_column_header_data values.
+
+        Args:
+            query_cols (list[str]): Query columns list.
+            column_headers (dict[str, str]): Header cells and their names, e.g. {'A1': 'Date', 'B1': 'Symbol'}.
+            int_columns (list[str]): Header cells of integer columns.
+            float_columns (list[str]): Header cells of float columns.
+            float_decimals (dict[str, int]): Header cells and their decimal counts.
+
+        Returns:
+            QuerySchema:
+            Column schema.
+        """
+        specs = []
+        for position, (cell, name) in enumerate(column_headers.items()):
+            letter = column_letters.split_cell(cell)[0]
+            decimals = None
+            if position == 0:
+                dtype, number_format = 'date', 'YYYY/MM/DD'
+            elif cell in int_columns:
+                dtype, number_format = 'int', '0'
+            elif cell in float_columns:
+                dtype = 'float'
+                decimals = float_decimals.get(cell)
+                number_format = 'General' if decimals is None else '0'+('.'+'0'*decimals if decimals > 0 else '')
+            else:
+                dtype, number_format = None, 'General'
+            specs.append(ColumnSpec(column_letters.index(letter), letter, name, 
+                                    'date' if position == 0 else query_cols[position-1], 
+                                    dtype, decimals, number_format))
+        return QuerySchema(tuple(specs))
 
 
 class QueryVars:
@@ -44,12 +161,14 @@ class QueryVars:
     -using command 'update query' & exiting update mode by typing 'back'.
     """
     market: str
+    markets: list[str]
     url: str
     my_query: dict[str, dict[str, Any] | list[Any]]
     custom_headers: dict[str, dict[str, str]]
     wb_type: str
 
     header_chars: list[str]
+    schema: QuerySchema
     col_headers: dict[str, str]
     int_cols: list[str]
     float_cols: list[str]
@@ -64,22 +183,18 @@ class QueryVars:
     def get_header_values() -> list[str]:
         """Return xlsx column character list depending on length of provided query columns.
 
-        Support up to 52 values (date + 51 query column values). Exceeding this limit will cause a crash.
+        Supports all Excel columns A-XFD i.e. date + 16383 query column values. Exceeding this limit returns an empty 
+        list.
 
         Returns:
             list[str]:
             List of all required excel column letters.
         """
-        total_cols = len(QueryVars.my_query["columns"])
-        header_chrs = [
-                f'{c}' for c in list(map(chr,range(ord('A'), ord('A')+len(QueryVars.my_query["columns"][:25])+1)))]
-        if 26 <= total_cols <= 52:
-            header_chrs += [
-                f'A{c}' for c in list(map(chr,range(ord('A'), ord('A')+len(QueryVars.my_query["columns"][25:]))))]
-        if total_cols > 52:
-            print("Column characters exceed 52. Returning empty list.")
+        total_cols = len(QueryVars.my_query["columns"])+1
+        if total_cols > column_letters.MAX_COLUMNS:
+            print(f"Column characters exceed {column_letters.MAX_COLUMNS}. Returning empty list.")
             return []
-        return header_chrs
+        return list(column_letters.COLUMN_LETTERS[:total_cols])
 
     @staticmethod
     def get_column_header_data(query_cols: list[str],
@@ -128,11 +243,11 @@ class QueryVars:
     def update_query_variables() -> None:
         """Updates all QueryVars values."""
         logger.debug("query.py> QueryVars.update_query_variables")
-        with open(FilePaths.settings_path/'settings.json') as f:
-            current_settings = json.load(f)
+        current_settings = SettingsStore.load(FilePaths.settings_path/'settings.json')
         QueryVars.market = current_settings['market']
         QueryVars.url = f'https://scanner.tradingview.com/{QueryVars.market}/scan'
         QueryVars.my_query = current_settings['query']
+        QueryVars.markets = list(QueryVars.my_query.get('markets', [QueryVars.market]))
         QueryVars.custom_headers = current_settings['headers']
         QueryVars.wb_type = current_settings['type']
 
@@ -142,8 +257,15 @@ class QueryVars:
                 QueryVars.get_column_header_data(QueryVars.my_query["columns"], 
                                                     QueryVars.custom_headers, 
                                                     QueryVars.header_chars))
-        QueryVars.date_col = [header[0] for header in QueryVars.col_headers.keys()][0]
+        QueryVars.schema = QuerySchema.build(QueryVars.my_query["columns"],
+                                             QueryVars.col_headers,
+                                             QueryVars.int_cols,
+                                             QueryVars.float_cols,
+                                             QueryVars.float_decimals)
+        QueryVars.date_col = column_letters.split_cell(list(QueryVars.col_headers.keys())[0])[0]
         QueryVars.txt_headers = [header for header in list(QueryVars.col_headers)[1:]]
-        QueryVars.sheet_xlsx_int_cols  = [ord(col_header[0].lower())-96 for col_header in QueryVars.int_cols]
-        QueryVars.sheet_xlsx_float_cols = [ord(col_header[0].lower())-96 for col_header in QueryVars.float_cols]
+        QueryVars.sheet_xlsx_int_cols  = [column_letters.index(column_letters.split_cell(col_header)[0]) 
+                                          for col_header in QueryVars.int_cols]
+        QueryVars.sheet_xlsx_float_cols = [column_letters.index(column_letters.split_cell(col_header)[0]) 
+                                           for col_header in QueryVars.float_cols]
         logger.debug("query.py> QueryVars.update_query_variables: All values updated")
\ No newline at end of file
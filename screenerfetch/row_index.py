@@ -0,0 +1,187 @@
+"""RowIndex class."""
+
+from __future__ import annotations
+import bisect
+import datetime
+import json
+import logging
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import openpyxl
+
+if TYPE_CHECKING:
+    from typing import Any, Iterable
+
+logger = logging.getLogger('screenerfetch')
+
+def date_key(value: Any) -> str | None:
+    """Returns a yyyy-mm-dd key string of a date cell value.
+
+    Args:
+        value (Any): Date cell value; usually a datetime object, but manually typed dates can be strings.
+
+    Returns:
+        str | None:
+        Date string, or None if cell was empty.
+    """
+    if value is None:
+        return None
+    if isinstance(value, datetime.datetime):
+        return str(value.date())
+    if isinstance(value, datetime.date):
+        return str(value)
+    return str(value).replace(' 00:00:00', '').replace('/', '-')
+
+class RowIndex:
+    """Date and symbol -> row number index of a worksheet.
+
+    Only date (A) and symbol (B) columns are read when building an index. Index is stored as json next to workbook
+    data and is rebuilt only if workbook file modification time or size has changed since. With an index, callers can
+    read only the rows they need instead of loading the whole sheet.
+    """
+    def __init__(self, dates: dict[str, list[int]], symbols: dict[str, list[int]]) -> None:
+        self.dates = dates
+        self.symbols = symbols
+        self.sorted_dates = sorted(dates)
+
+    @staticmethod
+    def _file_key(wb_path: Path) -> list[int]:
+        stat = os.stat(wb_path)
+        return [stat.st_mtime_ns, stat.st_size]
+
+    @classmethod
+    def build(cls, wb_path: Path, sheet_name: str) -> RowIndex:
+        """Builds an index by reading date and symbol columns of a worksheet.
+
+        Args:
+            wb_path (Path): Workbook file path.
+            sheet_name (str): Worksheet name.
+
+        Returns:
+            RowIndex:
+            New row index.
+        """
+        logger.debug(f"row_index> RowIndex.build: Sheet name '{sheet_name}'")
+        wb = openpyxl.load_workbook(wb_path, read_only=True)
+        index = cls.from_worksheet(wb[sheet_name])
+        wb.close()
+        return index
+
+    @classmethod
+    def from_worksheet(cls, ws: Any) -> RowIndex:
+        """Builds an index of an already loaded worksheet, e.g. one that is being edited before saving.
+
+        Args:
+            ws (Any): Openpyxl worksheet.
+
+        Returns:
+            RowIndex:
+            New row index.
+        """
+        dates: dict[str, list[int]] = {}
+        symbols: dict[str, list[int]] = {}
+        for row_num, (date_val, symbol) in enumerate(ws.iter_rows(min_row=2, max_col=2, values_only=True), start=2):
+            key = date_key(date_val)
+            if key is None:
+                continue
+            dates.setdefault(key, []).append(row_num)
+            symbols.setdefault(str(symbol), []).append(row_num)
+        return cls(dates, symbols)
+
+    @classmethod
+    def load(cls, wb_path: Path, sheet_name: str, index_path: Path) -> RowIndex:
+        """Returns a stored index if it's up to date with the workbook, otherwise builds and stores a new one.
+
+        Args:
+            wb_path (Path): Workbook file path.
+            sheet_name (str): Worksheet name.
+            index_path (Path): Index json file path.
+
+        Returns:
+            RowIndex:
+            Row index matching current workbook file.
+        """
+        file_key = RowIndex._file_key(wb_path)
+        try:
+            with open(index_path) as f:
+                stored = json.load(f)
+            if stored["file"] == file_key and stored["sheet"] == sheet_name:
+                logger.debug("row_index> RowIndex.load: Using stored index")
+                return cls(stored["dates"], stored["symbols"])
+        except (FileNotFoundError, json.decoder.JSONDecodeError, KeyError):
+            ...
+        index = cls.build(wb_path, sheet_name)
+        try:
+            with open(index_path, 'w') as f:
+                json.dump({"file": file_key, "sheet": sheet_name, "dates": index.dates, "symbols": index.symbols}, f)
+        except OSError:
+            logger.debug("row_index> RowIndex.load: Could not store index")
+        return index
+
+    def rows(self, since: str | None = None, until: str | None = None, symbols: Iterable[str] | None = None
+             ) -> list[int]:
+        """Returns sorted row numbers matching date range and symbols.
+
+        Args:
+            since (str | None): First included date in yyyy-mm-dd format. None for no lower limit.
+            until (str | None): Last included date in yyyy-mm-dd format. None for no upper limit.
+            symbols (Iterable[str] | None): Included symbol names. None for all symbols.
+
+        Returns:
+            list[int]:
+            Matching row numbers in ascending order.
+        """
+        start = 0 if since is None else bisect.bisect_left(self.sorted_dates, since)
+        end = len(self.sorted_dates) if until is None else bisect.bisect_right(self.sorted_dates, until)
+        date_rows = {row for d in self.sorted_dates[start:end] for row in self.dates[d]}
+        if symbols is not None:
+            symbol_rows = {row for s in symbols for row in self.symbols.get(s, [])}
+            date_rows &= symbol_rows
+        return sorted(date_rows)
+
+    def find(self, date: str, symbol: str) -> int | None:
+        """Returns the first row of a symbol on a date.
+
+        Args:
+            date (str): Date in yyyy-mm-dd format.
+            symbol (str): Symbol name.
+
+        Returns:
+            int | None:
+            Row number, or None if symbol has no row on date.
+        """
+        symbol_rows = set(self.symbols.get(symbol, ()))
+        return next((row for row in self.dates.get(date, ()) if row in symbol_rows), None)
+
+    def add(self, row: int, date: str, symbol: str) -> None:
+        """Adds a new row to the index, e.g. after appending it to a loaded worksheet.
+
+        Args:
+            row (int): Row number.
+            date (str): Date in yyyy-mm-dd format.
+            symbol (str): Symbol name.
+        """
+        if date not in self.dates:
+            bisect.insort(self.sorted_dates, date)
+        self.dates.setdefault(date, []).append(row)
+        self.symbols.setdefault(symbol, []).append(row)
+
+def row_spans(rows: list[int]) -> list[tuple[int, int]]:
+    """Groups sorted row numbers into (first, last) spans of consecutive rows.
+
+    Args:
+        rows (list[int]): Row numbers in ascending order.
+
+    Returns:
+        list[tuple[int, int]]:
+        Inclusive row spans.
+    """
+    spans: list[tuple[int, int]] = []
+    for row in rows:
+        if spans and spans[-1][1] == row-1:
+            spans[-1] = (spans[-1][0], row)
+        else:
+            spans.append((row, row))
+    return spans
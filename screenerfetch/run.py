@@ -1,20 +1,14 @@
 """Opens and controls the full command line interface program."""
 
-import json
 import logging
-import os
 import shutil
 
 import commands
-import custom
-import custom.small_cap1.c_commands
-import custom.small_cap1.c_workbook_tools
 from paths import FilePaths
+import plugins
 from query import QueryVars
+from settings_store import SettingsStore
 from sheets import WorkbookSheets
-# put custom workbook packages here
-import custom.small_cap1
-#
 
 logger = logging.getLogger('screenerfetch')
 
@@ -25,39 +19,31 @@ def _custom_create(wb_type: str) -> None:
         wb_type (str): Workbook type.
     """
     logger.debug("run> _custom_create")
-    # Add workbook creation command of any custom package here
-    match wb_type:
-        case 'basic':
-            commands.create()
-        case 'small_cap1':
-            custom.small_cap1.c_workbook_tools.create_custom_wb()
+    if wb_type == 'basic':
+        commands.create()
+        return
+    plugins.packages()[wb_type].load('create')()
 
 def _select_custom_package() -> None:
     """Selects current custom package based on settings.json "type" value."""
     logger.debug("run> _custom_package")
-    with open(FilePaths.settings_path/'settings.json') as f:
-        wb_type = json.load(f)["type"]
-    if wb_type in os.listdir(FilePaths.PATH/'custom'):
-        # add interface access command for any custom package here
-        match wb_type:
-            case 'small_cap1':
-                custom.small_cap1.c_commands.select_custom_command()
+    wb_type = SettingsStore.load(FilePaths.settings_path/'settings.json')["type"]
+    package = plugins.get(wb_type)
+    if package is not None and 'commands' in package.entry_points:
+        package.load('commands')()
         return
     print(f"Unsupported custom package type '{wb_type}'.")
 
 def _create_new_wb() -> None:
     logger.debug("run> _create_new_wb")
     print("Select workbook type.\n# Supported types:\nbasic")
-    for type in os.listdir(FilePaths.PATH/'custom'):
-        if type.startswith(('_', '.')):
-            continue
-        else:
-            print(type)
+    for package in plugins.packages().values():
+        print(f"{package.name} => {package.description}" if package.description else package.name)
     type_input = input('[wb type]>>>')
     if type_input.startswith(('_', '.')):
         print("Invalid characters in custom type.")
         return
-    elif type_input in os.listdir(FilePaths.PATH/'custom') or type_input == 'basic':
+    elif type_input in plugins.packages() or type_input == 'basic':
         _custom_create(type_input)
         QueryVars.update_query_variables()
         print(f"Workbook '{FilePaths.wb_name}' formated to support type '{type_input}'.")
@@ -67,16 +53,14 @@ def _create_new_wb() -> None:
 def _initialize_workbook() -> None:
     """Sets initial values for filepaths, workbook sheets and query variables."""
     logger.debug("run> _initialize_workbook")
-    with open(FilePaths.WB_FILES_ROOT_PATH/'current_wb.json') as f:
-        wb_name_dict = json.load(f)
+    wb_name_dict = SettingsStore.load(FilePaths.WB_FILES_ROOT_PATH/'current_wb.json')
     FilePaths.wb_name = wb_name_dict["wb_name"]
     FilePaths.update_filepaths()
     try:
         WorkbookSheets.update_sheets()
     except FileNotFoundError:
-        with open(FilePaths.WB_FILES_ROOT_PATH/'current_wb.json', 'w') as f:
-            wb_name_dict["wb_name"] = '_default'
-            json.dump(wb_name_dict, f, indent=4)
+        wb_name_dict["wb_name"] = '_default'
+        SettingsStore.dump(FilePaths.WB_FILES_ROOT_PATH/'current_wb.json', wb_name_dict)
         FilePaths.wb_name = wb_name_dict["wb_name"]
         FilePaths.update_filepaths()
     WorkbookSheets.update_sheets()
@@ -100,10 +84,17 @@ def open_cli() -> None:
             "selected workbook on CLI as 'WB=...'\n"
         "q/update query => update query data, market and (optional) custom header values.\n"
         "f/fetch => fetch data from TradingView API based on query.MY_QUERY.\n"
+        "fm/fetch markets => like fetch, but sends a request to each query market concurrently and merges results. "
+            "Prints latency\n\t\t   and row count of each market.\n"
+        "fl/fetch local => filter data of the latest fetch of a workbook with current query instead of sending a new "
+            "request. Query filter\n\t\t  columns must be included in the fetched query columns.\n"
         f"s/save => shows fetched data by opening data/{FilePaths.TXT_NAME}.txt. Add '+' in front of each symbol "+
             f"you'd wish to add, then save file.\n "
             f"\t  Data for each symbol is stored in workbooks/{FilePaths.wb_name}.xlsx file.\n"
         f"sa/saveall => saves all fetched data to {FilePaths.wb_name}.xlsx.\n"
+        "si/save intraday => saves all fetched data as a timestamped snapshot in data/intraday folder, so several "
+            "fetches per day\n\t\t    can be told apart.\n"
+        "ih/intraday history => prints intraday snapshot values of a symbol within a time window.\n"
         f"txt/open txt => opens {FilePaths.wb_name}.txt file where you see the fetched data.\n"
         f"e/excel => opens {FilePaths.wb_name}.xlsx file which contains all symbols you saved.\n"
         f"copy => copy your current {FilePaths.wb_name}.xlsx file into {FilePaths.wb_manual_copy_name}.xlsx; replaces " 
@@ -175,10 +166,18 @@ def open_cli() -> None:
                 commands.update_wb_file_name()
             case 'f' | 'fetch':
                 commands.fetch()
+            case 'fm' | 'fetch markets':
+                commands.fetch(per_market=True)
+            case 'fl' | 'fetch local':
+                commands.fetch_local()
             case 's' | 'save':
                 commands.save()
             case 'sa' | 'saveall':
                 commands.saveall()
+            case 'si' | 'save intraday':
+                commands.save_intraday()
+            case 'ih' | 'intraday history':
+                commands.intraday_history()
             case 'txt' | 'open txt':
                 commands.show_txt()
             case 'e' | 'excel':
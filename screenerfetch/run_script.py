@@ -3,15 +3,32 @@
 If command line args are passed, instead of opening the full program, will run specified commands then close.
 """
 
+from __future__ import annotations
 import argparse
-import json
 import shutil
+from typing import TYPE_CHECKING
 
 import commands
+from fetch_engine import FetchEngine
 from paths import FilePaths
+import plugins
 import run
+from settings_store import SettingsStore
+import watch
 import workbook_tools
 
+if TYPE_CHECKING:
+    from typing import Any
+
+def _custom_entry_point(entry_point: str, option: str) -> Any:
+    """Returns an entry point of current workbook's custom package, or None if it's not supported."""
+    wb_type = SettingsStore.load(FilePaths.settings_path/'settings.json')["type"]
+    package = plugins.get(wb_type)
+    if package is None or entry_point not in package.entry_points:
+        print(f"{option} is not supported by '{wb_type}' workbooks.")
+        return None
+    return package.load(entry_point)
+
 def execute_args_commands() -> None:
     """Runs commands based on passed command-line arguments and closes.
 
@@ -19,7 +36,7 @@ def execute_args_commands() -> None:
 
     Arguments are processed in order. Flag -h is always read first and will only display help, ignoring further flags.  
     For the rest, order is following:
-    -wb -> -f -> -s -> -sa -> -c -> --export  
+    -wb -> -f -> -fl -> -s -> -sa -> -si -> --refresh -> -c -> --export -> --history -> --plot -> --watch  
     This means writing 'py screenerfetch -f -c --export -sa' does -f -> -sa -> -c -> --export.
     """
     parser = argparse.ArgumentParser("screenerfetch")
@@ -29,35 +46,120 @@ def execute_args_commands() -> None:
     parser.add_argument("-f", "--fetch", action='store_true',
                          help="fetch data from Tradingview API based on your current workbook query.txt."
                          " To edit query data, run screenerfetch without args to access full cli -> q/update query")
+    parser.add_argument("--per-market", action='store_true',
+                         help="with -f, send a request to each query market concurrently and merge the results, "
+                         "instead of a single request to 'global' market. Prints latency and row count of each market")
+    parser.add_argument("-fl", "--fetch-local", nargs='?', const='', metavar='WB',
+                         help="filter data of the latest fetch of workbook WB, or current workbook if not given, with "
+                         "current workbook query, without sending a new request. Query filter columns must be included "
+                         "in the columns of the fetched query")
     parser.add_argument("-s", "--save", action='store_true',
                          help="opens api_data.txt where you can select which symbols to save in current xlsx file"
                          "Saving is possible only after data has been fetched with -f/--fetch")
     parser.add_argument("-sa", "--saveall", action='store_true',
                          help="save all fetched data in .xlsx file. Saving is possible only after "
                          "data has been fetched with -f/--fetch")
+    parser.add_argument("-si", "--save-intraday", action='store_true',
+                         help="save all fetched data as a timestamped snapshot in data/intraday folder instead of the "
+                         "xlsx file. Saving is possible only after data has been fetched with -f/--fetch")
+    parser.add_argument("--refresh", nargs='+', type=str,
+                         help="fetch data of all listed workbooks at once and save all of it to each workbook")
+    parser.add_argument("--concurrency", type=int,
+                         help=f"maximum number of requests in flight at once; default {FetchEngine.concurrency}")
+    parser.add_argument("--rate", type=float,
+                         help=f"maximum sustained requests per second; default {FetchEngine.rate}")
     parser.add_argument("-c", "--autocopy", action='store_true',
                          help="makes/overwrites autocopy of current xlsx file. This won't override normal copy.")
     parser.add_argument("--export", const='all', nargs='?', type=str,
                          help="export workbook data into specified data format: 'csv', 'txt', 'json'. "
-                         "Default value 'all' creates all files inside workbook data folder")
+                         "Default value 'all' creates all files inside workbook data folder. "
+                         "'sqlite' or 'duckdb' exports new rows into a database file inside workbook data folder")
+    parser.add_argument("--since", type=str,
+                         help="with --export, only export rows dated on or after this date (YYYY-MM-DD). "
+                         "With --history, window start (YYYY-MM-DD or 'YYYY-MM-DD HH:MM'). With --plot, first date")
+    parser.add_argument("--until", type=str,
+                         help="with --export, only export rows dated on or before this date (YYYY-MM-DD). "
+                         "With --history, window end (YYYY-MM-DD or 'YYYY-MM-DD HH:MM'). With --plot, last date")
+    parser.add_argument("--symbols", nargs='+', type=str,
+                         help="with --export, only export rows of these symbols")
+    parser.add_argument("--columns", nargs='+', type=str,
+                         help="with --export, only export these columns. Use header names as they appear in xlsx file")
+    parser.add_argument("--history", nargs=1, type=str,
+                         help="print intraday snapshot values of a symbol; use --since and --until to select time "
+                         "window. Default window is today")
+    parser.add_argument("--plot", nargs='+', type=str,
+                         help="small_cap1 workbooks: save these plots as image files in workbook data/plots folder "
+                         "without displaying them. Plots are 'avg daily', 'avg lines', 'daily cs', dist and float; "
+                         "names with spaces must be quoted, e.g. --plot 'daily cs' dist. "
+                         "Use --since and --until to select dates of 'daily cs'; dates are rendered in parallel")
+    parser.add_argument("--image-format", type=str, default='png',
+                         help="with --plot, image file format: png or svg; default png")
+    parser.add_argument("--watch", action='store_true',
+                         help="keep running and fetch and save all data on a schedule, until stopped with Ctrl+C. "
+                         "Latency of each cycle is printed")
+    parser.add_argument("--interval", type=int, default=5,
+                         help="with --watch, minutes between cycles; default 5")
+    parser.add_argument("--at", nargs='+', type=str,
+                         help="with --watch, fetch daily at these times (HH:MM) instead of an interval")
+    parser.add_argument("--window", type=str,
+                         help="with --watch, only run interval cycles between these times, e.g. 04:00-09:30")
+    parser.add_argument("--tz", type=str,
+                         help="with --watch, time zone of --at and --window times, e.g. America/New_York. "
+                         "Default is local time")
+    parser.add_argument("--intraday", action='store_true',
+                         help="with --watch, save each cycle as a timestamped intraday snapshot instead of xlsx rows")
+    parser.add_argument("--live", action='store_true',
+                         help="with --watch, small_cap1 workbooks: show daily average candles and symbol counts in a "
+                         "window which updates after each saved cycle")
     args = parser.parse_args()
     
+    try:
+        FetchEngine.configure(args.concurrency, args.rate)
+    except ValueError as err:
+        print(err)
+        return
     run._initialize_workbook()
     if args.change_wb:
-        with open(FilePaths.WB_FILES_ROOT_PATH/'current_wb.json') as f:
-            settings = json.load(f)
+        settings = SettingsStore.load(FilePaths.WB_FILES_ROOT_PATH/'current_wb.json')
         settings["wb_name"] = args.change_wb[0]
-        with open(FilePaths.WB_FILES_ROOT_PATH/'current_wb.json', 'w') as f:
-            json.dump(settings, f, indent=4)
+        SettingsStore.dump(FilePaths.WB_FILES_ROOT_PATH/'current_wb.json', settings)
         run._initialize_workbook()
         commands.update_wb_file_name(args.change_wb)
     if args.fetch:
-        commands.fetch()
+        commands.fetch(args.per_market)
+    if args.fetch_local is not None:
+        commands.fetch_local(args.fetch_local or FilePaths.wb_name)
     if args.save:
         commands.save()
     if args.saveall:
         commands.saveall()
+    if args.save_intraday:
+        commands.save_intraday()
+    if args.refresh:
+        commands.refresh(args.refresh, args.per_market)
     if args.autocopy:
         shutil.copy2(FilePaths.wb_path, FilePaths.wb_autocopy_path)
     if args.export:
-        workbook_tools.export_wb(args.export)
\ No newline at end of file
+        workbook_tools.export_wb(args.export, args.since, args.until, args.symbols, args.columns)
+    if args.history:
+        commands.intraday_history(args.history[0], args.since, args.until)
+    if args.plot:
+        batch_plot = _custom_entry_point('batch_plot', '--plot')
+        if batch_plot is not None:
+            batch_plot(args.plot, args.since, args.until, args.image_format)
+    if args.watch:
+        try:
+            schedule = watch.WatchSchedule.from_args(args.interval, args.at, args.window, args.tz)
+        except ValueError as err:
+            print(err)
+            return
+        if not args.live:
+            watch.watch(schedule, args.per_market, args.intraday)
+        elif args.intraday:
+            print("--live can't be used with --intraday, as intraday snapshots are not saved to workbook.")
+        elif (live_view := _custom_entry_point('live_view', '--live')) is not None:
+            view = live_view()
+            try:
+                watch.watch(schedule, args.per_market, args.intraday, sleep=view.pause)
+            finally:
+                view.close()
\ No newline at end of file
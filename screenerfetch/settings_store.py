@@ -0,0 +1,79 @@
+"""SettingsStore class."""
+
+import copy
+import json
+import logging
+import os
+from pathlib import Path
+import stat
+import tempfile
+from typing import Any
+
+logger = logging.getLogger('screenerfetch')
+
+class SettingsStore:
+    """Cached reads and atomic writes of json settings files such as settings.json and current_wb.json.
+
+    Each file is parsed once and served from cache until its modification time or size changes, so files edited
+    outside the program are still reloaded. Writes go to a temporary file which then replaces the original, meaning
+    other screenerfetch processes never read a half-written file.
+    """
+    _cache: dict[Path, tuple[tuple[int, int], Any]] = {}
+
+    @staticmethod
+    def _file_key(path: Path) -> tuple[int, int]:
+        file_stat = os.stat(path)
+        return file_stat.st_mtime_ns, file_stat.st_size
+
+    @staticmethod
+    def load(path: Path) -> Any:
+        """Returns parsed json file contents.
+
+        Returned object is a copy, so callers can freely modify it before passing it to dump().
+
+        Args:
+            path (Path): Json file path.
+
+        Returns:
+            Any:
+            Json file contents.
+
+        Raises:
+            FileNotFoundError: File doesn't exist.
+            json.decoder.JSONDecodeError: File is not valid json.
+        """
+        file_key = SettingsStore._file_key(path)
+        cached = SettingsStore._cache.get(path)
+        if cached is None or cached[0] != file_key:
+            logger.debug(f"settings_store> SettingsStore.load: Parsing {path.name}")
+            with open(path) as f:
+                cached = (file_key, json.load(f))
+            SettingsStore._cache[path] = cached
+        return copy.deepcopy(cached[1])
+
+    @staticmethod
+    def dump(path: Path, data: Any) -> None:
+        """Writes data to a json file atomically and updates cache.
+
+        Args:
+            path (Path): Json file path.
+            data (Any): Json serializable data.
+        """
+        logger.debug(f"settings_store> SettingsStore.dump: Writing {path.name}")
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix='.tmp')
+        try:
+            os.chmod(temp_path, stat.S_IMODE(os.stat(path).st_mode) if path.exists() else 0o644)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        SettingsStore._cache[path] = (SettingsStore._file_key(path), copy.deepcopy(data))
+
+    @staticmethod
+    def clear() -> None:
+        """Empties cache."""
+        SettingsStore._cache.clear()
@@ -0,0 +1,176 @@
+"""StyledRows class and shared named cell styles."""
+
+from __future__ import annotations
+import json
+import logging
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from openpyxl.styles import Alignment, NamedStyle
+
+if TYPE_CHECKING:
+    import openpyxl
+
+    from query import ColumnSpec, QuerySchema
+
+logger = logging.getLogger('screenerfetch')
+
+DATE_STYLE = 'datetime'
+DATE_FORMAT = 'YYYY/MM/DD'
+
+def column_style(spec: ColumnSpec) -> str | None:
+    """Returns name of the named style shared by all cells of a main worksheet column.
+
+    Args:
+        spec (ColumnSpec): Column.
+
+    Returns:
+        str | None:
+        'datetime' for the date column, e.g. 'float 0.00' for numeric columns, None for columns stored as they are.
+    """
+    if spec.dtype == 'date':
+        return DATE_STYLE
+    if spec.dtype in ('int', 'float'):
+        return f'{spec.dtype} {spec.number_format}'
+    return None
+
+def add_named_styles(wb: openpyxl.Workbook, schema: QuerySchema) -> None:
+    """Registers styles of all schema columns styled by column_style, unless workbook already has them.
+
+    Before a named style can be assigned by name, e.g. cell.style = 'datetime', it has to be registered in the
+    workbook. Every cell assigned to a named style shares it, instead of each cell getting its own format.
+
+    Args:
+        wb (openpyxl.Workbook): Loaded workbook.
+        schema (QuerySchema): Query columns.
+    """
+    existing = set(wb.named_styles)
+    if DATE_STYLE not in existing:
+        wb.add_named_style(NamedStyle(name=DATE_STYLE, number_format=DATE_FORMAT))
+        existing.add(DATE_STYLE)
+    for spec in schema.columns:
+        name = column_style(spec)
+        if name is not None and name not in existing:
+            wb.add_named_style(NamedStyle(name=name, number_format=spec.number_format,
+                                          alignment=Alignment(horizontal='right')))
+            existing.add(name)
+
+class StyledRows:
+    """Last styled row of each worksheet.
+
+    apply() styles date and number columns of rows after the last styled row in a single pass over each sheet, so
+    rows which already have their styles are not touched again. Like RowIndex, stored rows are keyed by workbook file
+    modification time and size: if workbook is changed without updating them, all rows are styled again on next
+    apply().
+
+    Attributes:
+        rows (dict[str, int]): Worksheet name -> last styled row number.
+    """
+    def __init__(self, rows: dict[str, int]) -> None:
+        self.rows = rows
+
+    @staticmethod
+    def _file_key(wb_path: Path) -> list[int]:
+        stat = os.stat(wb_path)
+        return [stat.st_mtime_ns, stat.st_size]
+
+    @classmethod
+    def load_current(cls, wb_path: Path, path: Path) -> StyledRows | None:
+        """Returns stored rows if they're up to date with the workbook.
+
+        Args:
+            wb_path (Path): Workbook file path.
+            path (Path): Styled rows json file path.
+
+        Returns:
+            StyledRows | None:
+            Stored rows, or None if there are none or workbook has changed since they were stored.
+        """
+        try:
+            with open(path) as f:
+                stored = json.load(f)
+            if stored["file"] == cls._file_key(wb_path):
+                return cls(stored["rows"])
+        except (FileNotFoundError, json.decoder.JSONDecodeError, KeyError):
+            ...
+        return None
+
+    @classmethod
+    def load(cls, wb_path: Path, path: Path) -> StyledRows:
+        """Returns stored rows if they're up to date with the workbook, otherwise rows with nothing styled.
+
+        Args:
+            wb_path (Path): Workbook file path.
+            path (Path): Styled rows json file path.
+
+        Returns:
+            StyledRows:
+            Styled rows of current workbook file.
+        """
+        styled = cls.load_current(wb_path, path)
+        if styled is None:
+            logger.debug("styles> StyledRows.load: No current styled rows, all rows will be styled")
+            return cls({})
+        return styled
+
+    def store(self, wb_path: Path, path: Path) -> None:
+        """Stores rows as json, keyed by current workbook file. Call after workbook has been saved.
+
+        Args:
+            wb_path (Path): Workbook file path.
+            path (Path): Styled rows json file path.
+        """
+        try:
+            with open(path, 'w') as f:
+                json.dump({"file": self._file_key(wb_path), "rows": self.rows}, f)
+        except OSError:
+            logger.debug("styles> StyledRows.store: Could not store styled rows")
+
+    def apply(self, wb: openpyxl.Workbook, sheet_names: list[str], schema: QuerySchema, first_row: int | None = None
+              ) -> int:
+        """Styles rows which are not styled yet.
+
+        Main worksheet, the first of sheet_names, gets date and number styles of schema columns. Other worksheets
+        get the date style in their first column. Empty cells are skipped.
+
+        Args:
+            wb (openpyxl.Workbook): Loaded workbook.
+            sheet_names (list[str]): Worksheet names, main worksheet first.
+            schema (QuerySchema): Query columns of main worksheet.
+            first_row (int | None = None): Style all rows from this row on, even if they are already styled. None to
+                style only rows after last styled row.
+
+        Returns:
+            int:
+            Number of styled rows over all worksheets.
+        """
+        add_named_styles(wb, schema)
+        date_alignment = Alignment(horizontal='left')
+        main_columns = [(spec.index-1, name) for spec in schema.columns if (name := column_style(spec)) is not None]
+        styled = 0
+        for position, sheet_name in enumerate(sheet_names):
+            if sheet_name not in wb.sheetnames:
+                continue
+            ws = wb[sheet_name]
+            columns = main_columns if position == 0 else [(0, DATE_STYLE)]
+            start = max(first_row if first_row is not None else self.rows.get(sheet_name, 1)+1, 2)
+            last_styled = start-1
+            max_col = max(index for index, _ in columns)+1
+            for row_num, row in enumerate(ws.iter_rows(min_row=start, max_col=max_col), start=start):
+                has_values = False
+                for index, name in columns:
+                    cell = row[index]
+                    if cell.value is None:
+                        continue
+                    cell.style = name
+                    if name == DATE_STYLE:
+                        cell.alignment = date_alignment
+                    has_values = True
+                if has_values:
+                    last_styled = row_num
+                    styled += 1
+            # trailing empty rows are not marked as styled, so rows appended there later get styled
+            self.rows[sheet_name] = last_styled
+        logger.debug(f"styles> StyledRows.apply: {styled} rows styled")
+        return styled
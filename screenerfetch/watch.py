@@ -0,0 +1,209 @@
+"""Watch mode: a resident fetch-and-save loop for scheduled data collection.
+
+Instead of starting a new screenerfetch process for every scheduled fetch, watch mode keeps imports, query variables,
+an HTTP session and the main workbook loaded between cycles. Workbook is reloaded only if its file was modified
+outside watch mode, e.g. by editing it in Excel.
+"""
+
+from __future__ import annotations
+from dataclasses import dataclass
+import datetime
+import logging
+import os
+import time
+from typing import TYPE_CHECKING
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import openpyxl
+import requests
+
+import commands
+import commands_utils
+import intraday
+from paths import FilePaths
+from query import FetchData
+import workbook_tools
+
+if TYPE_CHECKING:
+    from typing import Callable
+
+logger = logging.getLogger('screenerfetch')
+
+def _parse_time(value: str) -> datetime.time:
+    try:
+        return datetime.datetime.strptime(value, '%H:%M').time()
+    except ValueError:
+        raise ValueError(f"Invalid time '{value}', use HH:MM format.") from None
+
+@dataclass(frozen=True, slots=True)
+class WatchSchedule:
+    """Fire times of watch mode cycles.
+
+    Cycles fire either at fixed clock times, or every interval_minutes aligned to the clock (with 5 minutes: 04:00,
+    04:05, ...). Interval cycles can be limited to a daily window, such as pre-market hours.
+
+    Attributes:
+        interval_minutes (int): Minutes between cycles. Ignored if at_times is given.
+        at_times (tuple[datetime.time, ...]): Fixed daily fire times.
+        window (tuple[datetime.time, datetime.time] | None): First and last fire time of a day for interval cycles.
+        tz (datetime.tzinfo | None): Time zone of all times, e.g. market time zone. None uses local time.
+    """
+    interval_minutes: int = 5
+    at_times: tuple[datetime.time, ...] = ()
+    window: tuple[datetime.time, datetime.time] | None = None
+    tz: datetime.tzinfo | None = None
+
+    @staticmethod
+    def from_args(interval: int, at: list[str] | None, window: str | None, tz: str | None) -> WatchSchedule:
+        """Builds a schedule from command-line argument values.
+
+        Args:
+            interval (int): Minutes between cycles.
+            at (list[str] | None): Fixed fire times in HH:MM format.
+            window (str | None): Daily window in HH:MM-HH:MM format.
+            tz (str | None): IANA time zone name, e.g. 'America/New_York'.
+
+        Returns:
+            WatchSchedule:
+            Schedule object.
+
+        Raises:
+            ValueError: An argument value is invalid.
+        """
+        if interval < 1:
+            raise ValueError("Interval must be at least 1 minute.")
+        window_times = None
+        if window is not None:
+            try:
+                start, end = window.split('-')
+            except ValueError:
+                raise ValueError(f"Invalid window '{window}', use HH:MM-HH:MM format.") from None
+            window_times = (_parse_time(start), _parse_time(end))
+            if window_times[0] > window_times[1]:
+                raise ValueError("Window start must be before window end.")
+        try:
+            zone = ZoneInfo(tz) if tz is not None else None
+        except ZoneInfoNotFoundError:
+            raise ValueError(f"Unknown time zone '{tz}'.") from None
+        return WatchSchedule(interval, tuple(sorted(_parse_time(t) for t in at or [])), window_times, zone)
+
+    def now(self) -> datetime.datetime:
+        """Returns current time in schedule time zone."""
+        return datetime.datetime.now(self.tz).replace(tzinfo=None)
+
+    def next_fire(self, after: datetime.datetime) -> datetime.datetime:
+        """Returns the first fire time later than after.
+
+        Args:
+            after (datetime.datetime): Naive datetime in schedule time zone.
+
+        Returns:
+            datetime.datetime:
+            Next fire time.
+        """
+        day = after.date()
+        if self.at_times:
+            for fire_day in (day, day+datetime.timedelta(days=1)):
+                for at_time in self.at_times:
+                    fire = datetime.datetime.combine(fire_day, at_time)
+                    if fire > after:
+                        return fire
+        midnight = datetime.datetime.combine(day, datetime.time())
+        step = datetime.timedelta(minutes=self.interval_minutes)
+        fire = midnight+step*((after-midnight)//step+1)
+        if self.window is None:
+            return fire
+        start, end = (datetime.datetime.combine(day, t) for t in self.window)
+        if fire < start:
+            return start
+        if fire > end:
+            return start+datetime.timedelta(days=1)
+        return fire
+
+
+class _ResidentWorkbook:
+    """Main workbook kept in memory between cycles; reloaded only if the file changes on disk."""
+
+    def __init__(self) -> None:
+        self.wb: openpyxl.Workbook | None = None
+        self.file_key: tuple[int, int] | None = None
+
+    @staticmethod
+    def _file_key() -> tuple[int, int]:
+        file_stat = os.stat(FilePaths.wb_path)
+        return file_stat.st_mtime_ns, file_stat.st_size
+
+    def get(self) -> openpyxl.Workbook:
+        if self.wb is None or self.file_key != self._file_key():
+            logger.debug("watch> _ResidentWorkbook.get: Loading workbook")
+            self.wb = openpyxl.load_workbook(FilePaths.wb_path)
+        return self.wb
+
+    def saved(self) -> None:
+        self.file_key = self._file_key()
+
+
+def _run_cycle(per_market: bool, save_intraday: bool, resident_wb: _ResidentWorkbook) -> int:
+    """Fetches data and saves all of it to the main workbook, or as an intraday snapshot.
+
+    Args:
+        per_market (bool): Fetch each query market separately, see commands.fetch().
+        save_intraday (bool): Save an intraday snapshot instead of workbook rows.
+        resident_wb (_ResidentWorkbook): Workbook to save into.
+
+    Returns:
+        int:
+        Number of saved rows.
+    """
+    if commands.fetch(per_market) != 0:
+        return 0
+    if save_intraday:
+        return intraday.append(FetchData.query_data)
+    workbook_tools.save(FetchData.query_data, commands_utils.get_date(), wb=resident_wb.get())
+    resident_wb.saved()
+    return len(FetchData.query_data)
+
+def watch(schedule: WatchSchedule,
+          per_market: bool = False,
+          save_intraday: bool = False,
+          max_cycles: int | None = None,
+          sleep: Callable[[float], None] = time.sleep) -> None:
+    """Runs fetch-and-save cycles on schedule until interrupted with Ctrl+C.
+
+    After each cycle, prints the fire-to-saved latency: time from scheduled fire time until data was saved. Failed
+    cycles, e.g. due to network errors, are reported and the next cycle runs normally.
+
+    Args:
+        schedule (WatchSchedule): Cycle fire times.
+        per_market (bool=False): Fetch each query market separately, see commands.fetch().
+        save_intraday (bool=False): Save each cycle as an intraday snapshot, see intraday.py. Only new or changed rows 
+            are stored, so saved row count can be lower than fetched row count.
+        max_cycles (int | None = None): Stop after this many cycles. None runs until interrupted.
+        sleep (Callable[[float], None] = time.sleep): Function used for waiting until next fire time.
+    """
+    logger.debug(f"watch> watch: {schedule}")
+    FetchData.session = requests.Session()
+    resident_wb = _ResidentWorkbook()
+    cycle = 0
+    print(f"[watch]->watching workbook '{FilePaths.wb_name}', press Ctrl+C to stop.")
+    try:
+        while max_cycles is None or cycle < max_cycles:
+            fire = schedule.next_fire(schedule.now())
+            print(f"[watch]->next cycle at {fire:%Y-%m-%d %H:%M}")
+            wait = (fire-schedule.now()).total_seconds()
+            if wait > 0:
+                sleep(wait)
+            cycle += 1
+            try:
+                rows = _run_cycle(per_market, save_intraday, resident_wb)
+            except Exception as err:
+                logger.debug(f"watch> watch: Cycle {cycle} failed: {err}")
+                print(f"[watch]->cycle {cycle} failed: {err}")
+                continue
+            latency = (schedule.now()-fire).total_seconds()
+            print(f"[watch]->cycle {cycle}: {rows} rows saved, fire-to-saved latency {latency:.2f}s")
+    except KeyboardInterrupt:
+        print("\n[watch]->stopped.")
+    finally:
+        FetchData.session.close()
+        FetchData.session = None
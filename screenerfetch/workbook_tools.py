@@ -1,21 +1,47 @@
 """Functions for excel workbook data manipulation."""
 
-import copy
+from __future__ import annotations
 import datetime
-import json
 import logging
 import os
+from typing import TYPE_CHECKING
 
 import openpyxl
 from openpyxl.styles import Font, Alignment, NamedStyle
 import pandas as pd
 
+import database
+from daily_summary import DailySummary
 from paths import FilePaths
 from query import QueryVars
+from row_index import RowIndex
+from settings_store import SettingsStore
 from sheets import WorkbookSheets
+from styles import DATE_STYLE, StyledRows, add_named_styles, column_style
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from typing import Any, Callable
 
 logger = logging.getLogger('screenerfetch')
 
+# Callbacks notified after save() has written rows, see subscribe().
+_save_subscribers: list[Callable[[str, list[dict[str, Any]]], None]] = []
+
+def subscribe(callback: Callable[[str, list[dict[str, Any]]], None]) -> None:
+    """Registers a callback which is called after each save() with the saved rows.
+
+    Args:
+        callback (Callable[[str, list[dict[str, Any]]], None]): Called with the date of saved rows in yyyy-mm-dd 
+            format and a list of saved rows, each a dict of column name -> written value.
+    """
+    _save_subscribers.append(callback)
+
+def unsubscribe(callback: Callable[[str, list[dict[str, Any]]], None]) -> None:
+    """Removes a callback registered with subscribe()."""
+    if callback in _save_subscribers:
+        _save_subscribers.remove(callback)
+
 def _create_workbook_files() -> None:
     logger.debug("workbook_tools> _create_workbook_files")
     try:
@@ -24,13 +50,12 @@ def _create_workbook_files() -> None:
         print(f"{FilePaths.wb_name}, {FilePaths.wb_name}/settings and {FilePaths.wb_name}/data created.")
     except FileExistsError:
         logger.debug("workbook_tools> _create_workbook_files: At least one of the files already exists")
-    with open(FilePaths.settings_path/'settings.json', 'w') as sf:
-            set_settings = {"type": "basic", 
-                            "market": "global",
-                            "headers": {},
-                            "query": {"columns": ["name"], "range": [0,1]}
-            }
-            json.dump(set_settings, sf, indent=4)
+    set_settings = {"type": "basic", 
+                    "market": "global",
+                    "headers": {},
+                    "query": {"columns": ["name"], "range": [0,1]}
+    }
+    SettingsStore.dump(FilePaths.settings_path/'settings.json', set_settings)
     print(f"{FilePaths.wb_name}/settings/settings.json created.")
     logger.debug("workbook_tools> _create_workbook_files: settings.json created")
     with open(FilePaths.settings_path/'query.txt', 'w') as qf:
@@ -49,12 +74,26 @@ def _create_workbook_files() -> None:
     print(f"{FilePaths.wb_name}/settings/headers.txt created.")
     logger.debug("workbook_tools> _create_workbook_files: headers.txt created")
 
+def count_rows(ws: Any) -> int:
+    """Returns the amount of rows with a non-empty first column value in a loaded worksheet.
+
+    Args:
+        ws (Any): Openpyxl worksheet.
+
+    Returns:
+        int:
+        Non-empty row count, which is also the last non-empty row as long as column A has no gaps.
+    """
+    return sum(1 for (value,) in ws.iter_rows(min_col=1, max_col=1, values_only=True) if value is not None)
+
 def get_last_row(sheet_name: str) -> int:
     """Returns the last non-empty row index of main worksheet.
 
     Suprisingly, there's no automatic non-empty row counter function so I used the following because of its simplicity:
     https://singhaldhruv.medium.com/python-and-openpyxl-counting-non-empty-rows-in-excel-made-easy-36d708671918
 
+    If workbook is already loaded, use count_rows instead.
+
     Args:
         sheet_name (str): Worksheet name.
 
@@ -65,7 +104,7 @@ def get_last_row(sheet_name: str) -> int:
     logger.debug(f"workbook_tools> get_last_row: Sheet name '{sheet_name}'")
     wb = openpyxl.load_workbook(FilePaths.wb_path)
     ws = wb[sheet_name]
-    rows = (len([row for row in ws if not all([row[0].value is None])]))
+    rows = count_rows(ws)
     wb.close()
     return rows
 
@@ -88,12 +127,20 @@ def check_date(date_str: str) -> bool:
     print("Date value not found.")
     return False
 
-def save(symbol_data: list[list[str]], date_str: str, auto_update_nums: bool = True) -> None:
+def save(symbol_data: list[list[str]], 
+         date_str: str, 
+         auto_update_nums: bool = True, 
+         wb: openpyxl.Workbook | None = None) -> None:
     """Saves passed symbol_data to the main workbook file.
     
     Adds the date_str in front of symbol_data before adding all the symbol data workbook.
 
-    Finally, perfoms an automatic str -> int/float conversion on selected columns; see more on that under update_values_to_nums(). You can disable this auto-update by setting AUTO_UPDATE_NUMS = False.
+    Values are written by iterating QueryVars.schema: with auto_update_nums, int and float columns are converted to 
+    numbers and given their shared number style while writing, so no separate update_values_to_nums pass is needed. 
+    Saved rows are recorded as styled, so update_datetime won't style them again.
+
+    If the stored daily summary is up to date with the workbook, new rows are added to it as well. Callbacks registered
+    with subscribe() are notified of the saved rows.
 
     Note: there's a faster way to add rows, with 'append' method, but it adds them after last visible row. 
     This means if you've scrolled the sheet down a lot, it will place the next row in a seemingly random
@@ -101,32 +148,61 @@ def save(symbol_data: list[list[str]], date_str: str, auto_update_nums: bool = T
 
     Args:
         symbol_data (list[list[str]]): 2D list where each inner list contains all data for a specific symbol.
-            date_str: Date in DD/MM/YYYY format.
-        date_str (str): Current date.
-        auto_update_nums (bool): Whether to call auto-update current int and float columns. Default is True.
+        date_str (str): Current date in DD/MM/YYYY format.
+        auto_update_nums (bool): Whether to convert values of int and float columns. Default is True.
+        wb (openpyxl.Workbook | None = None): Already loaded main workbook. If None, workbook is loaded from file.
     """
     logger.debug("workbook_tools> save")
 
-    wb = openpyxl.load_workbook(FilePaths.wb_path)
+    if wb is None:
+        wb = openpyxl.load_workbook(FilePaths.wb_path)
     ws = wb[WorkbookSheets.sheet_names[0]]
     if ws is not None:
         d, m, y = date_str.split('/')
-        starting_row = get_last_row(WorkbookSheets.sheet_names[0])+1
-        next_row = starting_row
-        full_data = copy.deepcopy(symbol_data)
-        for row in full_data:
-            for i, elem in zip(range(1, len(row)+1), row):
-                ws.cell(column=i+1, row=next_row).value = elem
-                ws.cell(column=i+1, row=next_row).alignment = Alignment(horizontal='right')
+        date_value = datetime.datetime(int(y), int(m), int(d)).date()
+        next_row = count_rows(ws)+1
+        align_left = Alignment(horizontal='left')
+        align_right = Alignment(horizontal='right')
+        converted_columns = set(QueryVars.schema.converted_columns) if auto_update_nums else set()
+        summary = DailySummary.load_current(FilePaths.wb_path, WorkbookSheets.sheet_names[0], _summary_path(), 
+                                            _summary_columns())
+        styled = StyledRows.load_current(FilePaths.wb_path, _styled_rows_path())
+        add_named_styles(wb, QueryVars.schema)
+        saved_rows = []
+        for row in symbol_data:
+            values = {}
+            for spec, elem in zip(QueryVars.schema.data_columns, row):
+                cell = ws.cell(column=spec.index, row=next_row)
+                if spec in converted_columns:
+                    try:
+                        elem = spec.convert(elem)
+                        cell.style = column_style(spec)
+                    except (TypeError, ValueError):
+                        ...
+                cell.value = elem
+                cell.alignment = align_right
+                values[spec.name] = elem
+            if summary is not None:
+                summary.add_row(str(date_value), values)
+            saved_rows.append(values)
             current = ws.cell(column=1, row=next_row)
-            current.value = datetime.datetime(int(y), int(m), int(d)).date()
-            current.style = "datetime"
-            current.alignment = Alignment(horizontal='left')
+            current.value = date_value
+            current.style = DATE_STYLE
+            current.alignment = align_left
             next_row += 1
         wb.save(FilePaths.wb_path)
+        if summary is not None:
+            summary.store(FilePaths.wb_path, WorkbookSheets.sheet_names[0], _summary_path())
+        if styled is not None:
+            styled.rows[WorkbookSheets.sheet_names[0]] = max(styled.rows.get(WorkbookSheets.sheet_names[0], 1), 
+                                                             next_row-1)
+            styled.store(FilePaths.wb_path, _styled_rows_path())
         logger.debug("workbook_tools> save: Data saved succesfully")
-        if auto_update_nums:
-            update_values_to_nums(starting_row)
+        for callback in _save_subscribers:
+            try:
+                callback(str(date_value), saved_rows)
+            except Exception as err:
+                logger.warning(f"workbook_tools> save: Save subscriber failed: {err}")
         print('Saving succesful!')
         return
     print('Saving process failed.')
@@ -134,7 +210,7 @@ def save(symbol_data: list[list[str]], date_str: str, auto_update_nums: bool = T
 def update_values_to_nums(start_row: int = 2) -> None:
     """Update all values of listed columns to float/int type.
      
-    Selected columns can be changed in query.py by editing CUSTOM_HEADERS.
+    Selected columns can be changed by editing custom headers with 'update query' -> 'headers'.
 
     Remember to verify that 
      -column characters and numbers match AND
@@ -144,28 +220,15 @@ def update_values_to_nums(start_row: int = 2) -> None:
         start_row (int=2): Row number where updating starts. Default is 2.
     """
     logger.debug(f"workbook_tools> update_values_to_nums: Start row {start_row}")
-    int_columns = QueryVars.int_cols
-    xlsx_int_columns = QueryVars.sheet_xlsx_int_cols
-    float_columns = QueryVars.float_cols
-    float_decimals = QueryVars.float_decimals
-    xlsx_float_columns = QueryVars.sheet_xlsx_float_cols
-
     wb = openpyxl.load_workbook(FilePaths.wb_path)
     ws = wb[WorkbookSheets.sheet_names[0]]
     if ws is not None:
-        for r in range(start_row, get_last_row(WorkbookSheets.sheet_names[0])+1):
-            for f_col in range(len(float_columns)):
-                try:
-                    decimals = float_decimals[float_columns[f_col]]
-                    ws[float_columns[f_col][0]+str(r)] = (
-                        f"{float((ws.cell(row=r, column=xlsx_float_columns[f_col]).value)):.{decimals}f}") # type: ignore
-                except (TypeError, ValueError, KeyError):
-                    ...
-            for i_col in range(len(int_columns)):
+        for r in range(start_row, count_rows(ws)+1):
+            for spec in QueryVars.schema.converted_columns:
+                cell = ws.cell(row=r, column=spec.index)
                 try:
-                    ws[int_columns[i_col][0]+str(r)].number_format = '0'
-                    ws[int_columns[i_col][0]+str(r)] = (
-                        int(ws.cell(row=r, column=xlsx_int_columns[i_col]).value)) # type: ignore
+                    cell.value = spec.convert(cell.value)
+                    cell.number_format = spec.number_format
                 except (TypeError, ValueError):
                     ...
         wb.save(FilePaths.wb_path)
@@ -173,33 +236,54 @@ def update_values_to_nums(start_row: int = 2) -> None:
         print('Values updated to numbers.')
         return
 
-def update_datetime(first_row: int = 2) -> None:
-    """Update date column values to datetime yyyy-mm-dd format.
-    
-    Sometimes cells update their values to correct yyyy-mm-dd format, and get the full
-    yyyy-mm-dd;hh-mm-ss format. To remove the non-date part, this function will go through all
-    the column values, starting from first_row and ending on last non-empty row value.
+def _styled_rows_path() -> Path:
+    return FilePaths.data_path/'styled_rows.json'
 
-    first_row gets passed a base value 2 (1 would be the date header), but this value can be
-    any value >= 2.
+def update_datetime(first_row: int | None = None) -> None:
+    """Update date and number formats of all worksheets in one pass.
+
+    Dates get the shared 'datetime' style, which displays them in yyyy-mm-dd format without the time part, and int 
+    and float columns of the main worksheet get shared number styles. Other worksheets have their first column styled 
+    as dates. Rows which have been styled before, including all rows added by save(), are skipped unless first_row is 
+    given. Workbook is saved once, and only if any rows were styled.
 
-    Currently updates *all* dates in the second sheet as well.
-    
     Args:
-        first_row (int=2): Row number where updating begins. Is always >= 2 as row 1 points to headers.
+        first_row (int | None = None): Row number where updating begins, restyling all rows after it. Must be >= 2 as 
+            row 1 points to headers. None to update only rows which haven't been styled yet.
     """
     logger.debug(f"workbook_tools> update_datetime: First row {first_row}")
+    if first_row is not None and (not isinstance(first_row, int) or first_row < 2):
+        print('Argument must be an integer value greater than or equal to 2 (>= 2).')
+        return
+    styled = StyledRows.load(FilePaths.wb_path, _styled_rows_path())
     wb = openpyxl.load_workbook(FilePaths.wb_path)
-    ws = wb[WorkbookSheets.sheet_names[0]]
-    if ws is not None:
-        if isinstance(first_row, int) and first_row >= 2:
-            for i in range(first_row, get_last_row(WorkbookSheets.sheet_names[0])+1):
-                ws.cell(row=i, column=1).style = "datetime"
-                ws.cell(row=i, column=1).alignment = Alignment(horizontal='left')            
-            wb.save(FilePaths.wb_path)
-            print('Date format updated.')
-            return
-    print('Argument must be an integer value greater than or equal to 2 (>= 2).')
+    count = styled.apply(wb, WorkbookSheets.sheet_names, QueryVars.schema, first_row)
+    if count == 0:
+        print('All rows are already formatted.')
+        return
+    summary = DailySummary.load_current(FilePaths.wb_path, WorkbookSheets.sheet_names[0], _summary_path())
+    wb.save(FilePaths.wb_path)
+    styled.store(FilePaths.wb_path, _styled_rows_path())
+    if summary is not None:
+        summary.store(FilePaths.wb_path, WorkbookSheets.sheet_names[0], _summary_path())
+    print(f'Date format updated on {count} rows.')
+
+def save_styled(wb: openpyxl.Workbook) -> None:
+    """Saves a loaded workbook after styling rows which haven't been styled yet, see update_datetime.
+
+    Use when saving changes to other worksheets than the main one: main worksheet data is unchanged, so a stored daily 
+    summary stays up to date.
+
+    Args:
+        wb (openpyxl.Workbook): Loaded main workbook.
+    """
+    styled = StyledRows.load(FilePaths.wb_path, _styled_rows_path())
+    styled.apply(wb, WorkbookSheets.sheet_names, QueryVars.schema)
+    summary = DailySummary.load_current(FilePaths.wb_path, WorkbookSheets.sheet_names[0], _summary_path())
+    wb.save(FilePaths.wb_path)
+    styled.store(FilePaths.wb_path, _styled_rows_path())
+    if summary is not None:
+        summary.store(FilePaths.wb_path, WorkbookSheets.sheet_names[0], _summary_path())
 
 def update_headers() -> None:
     """Update xlsx workbook file header columns."""
@@ -218,30 +302,150 @@ def update_headers() -> None:
         print("Xlsx file headers updated.")
     return
 
-def export_wb(type: str) -> None:
+def _summary_path() -> Path:
+    return FilePaths.data_path/'daily_summary.json'
+
+def _summary_columns() -> list[str]:
+    return [spec.name for spec in QueryVars.schema.numeric_columns]
+
+def daily_summary() -> DailySummary:
+    """Returns per-date aggregates of main worksheet numeric columns.
+
+    Summary is read from workbook data folder, and only rebuilt from the workbook if it has changed other than by 
+    saving new rows, e.g. rows were deleted.
+
+    Returns:
+        DailySummary:
+        Summary of current workbook.
+    """
+    logger.debug("workbook_tools> daily_summary")
+    return DailySummary.load(FilePaths.wb_path, WorkbookSheets.sheet_names[0], _summary_path(), _summary_columns())
+
+def _column_positions(headers: list[str | None], columns: list[str] | None) -> list[int] | None:
+    """Returns positions of selected columns in headers, in selection order.
+
+    Args:
+        headers (list[str | None]): Main worksheet header cell values, None for empty cells.
+        columns (list[str] | None): Selected column header names. None for all columns with a header.
+
+    Returns:
+        list[int] | None:
+        Column positions, or None if a column name was invalid.
+    """
+    if columns is None:
+        return [pos for pos, header in enumerate(headers) if header is not None]
+    invalid = [col for col in columns if col not in headers]
+    if invalid:
+        names = [header for header in headers if header is not None]
+        print(f"Invalid column name(s): {', '.join(invalid)}.\nAvailable columns: {', '.join(names)}")
+        return None
+    return [headers.index(col) for col in columns]
+
+def read_filtered_rows(since: str | None = None, 
+                       until: str | None = None, 
+                       symbols: list[str] | None = None, 
+                       columns: list[str] | None = None) -> pd.DataFrame | None:
+    """Reads main worksheet rows matching a date range and symbols, including only selected columns.
+
+    Uses row_index.RowIndex to find matching rows, which are then read in a single pass from the first to the last 
+    matching row.
+
+    Args:
+        since (str | None): First included date in yyyy-mm-dd format. None for no lower limit.
+        until (str | None): Last included date in yyyy-mm-dd format. None for no upper limit.
+        symbols (list[str] | None): Included symbol names. None for all symbols.
+        columns (list[str] | None): Included column header names. None for all columns.
+
+    Returns:
+        pandas.DataFrame | None:
+        Filtered data, or None if a date or column name was invalid.
+    """
+    logger.debug(f"workbook_tools> read_filtered_rows: since {since}, until {until}, symbols {symbols}, "
+                 f"columns {columns}")
+    for date_str in (since, until):
+        if date_str is not None:
+            try:
+                datetime.date.fromisoformat(date_str)
+            except ValueError:
+                print(f"Invalid date '{date_str}': use format YYYY-MM-DD.")
+                return None
+    index = RowIndex.load(FilePaths.wb_path, WorkbookSheets.sheet_names[0], FilePaths.data_path/'row_index.json')
+    rows = index.rows(since, until, symbols)
+
+    wb = openpyxl.load_workbook(FilePaths.wb_path, read_only=True)
+    ws = wb[WorkbookSheets.sheet_names[0]]
+    headers = list(next(ws.iter_rows(min_row=1, max_row=1, values_only=True)))
+    col_positions = _column_positions(headers, columns)
+    if col_positions is None:
+        wb.close()
+        return None
+    min_col, max_col = min(col_positions)+1, max(col_positions)+1
+    data = []
+    if rows:
+        # Read-only worksheets parse the sheet from the top on each iter_rows call, so read all rows in one pass.
+        included = set(rows)
+        for row_number, row in enumerate(ws.iter_rows(min_row=rows[0], max_row=rows[-1], min_col=min_col, 
+                                                      max_col=max_col, values_only=True), start=rows[0]):
+            if row_number in included:
+                data.append([row[pos-min_col+1] for pos in col_positions])
+    wb.close()
+    return pd.DataFrame(data, columns=[headers[pos] for pos in col_positions])
+
+def export_wb(type: str, 
+              since: str | None = None, 
+              until: str | None = None, 
+              symbols: list[str] | None = None, 
+              columns: list[str] | None = None) -> None:
     """Exports workbook data to specific format'.
+
+    If any of the filter arguments are passed, only matching rows and columns are read and exported. Filtered exports 
+    are named '<wb name>-extract' so that they don't replace full exports.
     
     Args:
-        type (str): File format - 'txt', 'csv' or 'json'. Can also pass 'all' to export all supported file types.
+        type (str): File format - 'txt', 'csv' or 'json'. Can also pass 'all' to export all these file types, or 
+            'sqlite'/'duckdb' to export into a database file; see database.export_database.
+        since (str | None): First included date in yyyy-mm-dd format. None for no lower limit.
+        until (str | None): Last included date in yyyy-mm-dd format. None for no upper limit.
+        symbols (list[str] | None): Included symbol names. None for all symbols.
+        columns (list[str] | None): Included column header names. None for all columns.
     """
     logger.debug(f"workbook_tools> export_wb: Output file type '{type}'")
-    df = pd.read_excel(FilePaths.wb_path, WorkbookSheets.sheet_names[0])
+    if type in ('sqlite', 'duckdb'):
+        if (since, until, symbols, columns) != (None, None, None, None):
+            print("Filters are not supported with database exports, exporting all new rows.")
+        database.export_database(type)
+        return
+    if type not in ('txt', 'csv', 'json', 'all'):
+        print("Invalid file type.")
+        return
+    if since is None and until is None and symbols is None:
+        file_name = FilePaths.wb_name
+        if columns is None:
+            df = pd.read_excel(FilePaths.wb_path, WorkbookSheets.sheet_names[0])
+        else:
+            headers = list(pd.read_excel(FilePaths.wb_path, WorkbookSheets.sheet_names[0], nrows=0).columns)
+            if _column_positions(headers, columns) is None:
+                return
+            df = pd.read_excel(FilePaths.wb_path, WorkbookSheets.sheet_names[0], usecols=columns)[columns]
+    else:
+        file_name = FilePaths.wb_name+'-extract'
+        filtered_df = read_filtered_rows(since, until, symbols, columns)
+        if filtered_df is None:
+            return
+        df = filtered_df
     if type == 'txt': 
-        df.to_csv(FilePaths.data_path/str(FilePaths.wb_name+'.txt'), sep='\t', index=False)
+        df.to_csv(FilePaths.data_path/str(file_name+'.txt'), sep='\t', index=False)
     elif type == 'csv':
-        df.to_csv(FilePaths.data_path/str(FilePaths.wb_name+'.csv'), index=False)
+        df.to_csv(FilePaths.data_path/str(file_name+'.csv'), index=False)
     elif type == 'json':
-        df.to_json(FilePaths.data_path/str(FilePaths.wb_name+'.json'), indent=1)
+        df.to_json(FilePaths.data_path/str(file_name+'.json'), indent=1)
     elif type == 'all':
-        df.to_csv(FilePaths.data_path/str(FilePaths.wb_name+'.txt'), sep='\t', index=False)
-        df.to_csv(FilePaths.data_path/str(FilePaths.wb_name+'.csv'), index=False)
-        df.to_json(FilePaths.data_path/str(FilePaths.wb_name+'.json'), indent=1)
+        df.to_csv(FilePaths.data_path/str(file_name+'.txt'), sep='\t', index=False)
+        df.to_csv(FilePaths.data_path/str(file_name+'.csv'), index=False)
+        df.to_json(FilePaths.data_path/str(file_name+'.json'), indent=1)
         print(f"Created txt, csv and json files in {FilePaths.wb_name}/data.")
         return
-    else:
-        print("Invalid file type.")
-        return
-    print(f'{FilePaths.wb_name}.'+type+f' created in {FilePaths.wb_name}/data folder.')
+    print(f'{file_name}.'+type+f' created in {FilePaths.wb_name}/data folder.')
 
 def remove_duplicates() -> None:
     """Remove duplicate rows from current .xlsx file.
@@ -0,0 +1,31 @@
+"""Unit tests for column_letters.py"""
+
+import pytest
+
+import column_letters
+
+@pytest.mark.parametrize("index, letter", [
+    (1, 'A'),
+    (26, 'Z'),
+    (27, 'AA'),
+    (52, 'AZ'),
+    (53, 'BA'),
+    (702, 'ZZ'),
+    (703, 'AAA'),
+    (16384, 'XFD')
+])
+def test_letter_and_index(index, letter):
+    assert column_letters.letter(index) == letter
+    assert column_letters.index(letter) == index
+
+def test_letter_out_of_range():
+    with pytest.raises(IndexError):
+        column_letters.letter(0)
+    with pytest.raises(IndexError):
+        column_letters.letter(column_letters.MAX_COLUMNS+1)
+
+def test_split_cell():
+    assert column_letters.split_cell('A1') == ('A', 1)
+    assert column_letters.split_cell('AB12') == ('AB', 12)
+    with pytest.raises(ValueError):
+        column_letters.split_cell('12A')
@@ -6,7 +6,8 @@ import pandas as pd
 import pytest
 
 import commands_utils
-from query import QueryVars, FetchData
+from paths import FilePaths
+from query import QueryVars, QuerySchema, FetchData
 import helpers.helper_data as helper_data
 
 @pytest.fixture()
@@ -37,7 +38,7 @@ def test_round_to_int(input, output):
 def test_requests_api_data(mocker, query_vars):
     query_vars.url = ""
     query_vars.my_query = {}
-    mock_requests = mocker.patch("commands_utils.requests.post")
+    mock_requests = mocker.patch("fetch_engine.requests.post")
     mock_requests.return_value.status_code = 200
     mock_requests.return_value.json.return_value = helper_data.json_data_test
 
@@ -48,6 +49,48 @@ def test_requests_api_data(mocker, query_vars):
     with pytest.raises(Exception, match=r"Could not fetch any data from API."):
         api_test = commands_utils.requests_api_data()
 
+def test_build_requests(mocker):
+    mocker.patch.object(commands_utils.FetchEngine, "page_size", 100)
+    query = {"columns": ["name"], "markets": ["america", "germany"], "sort": {"sortBy": "change"}, "range": [50, 250]}
+    request_list = commands_utils.build_requests(query, "url")
+    assert [(market, url, page["range"]) for market, url, page in request_list] == [
+        ('', "url", [50, 150]), ('', "url", [150, 250])]
+    request_list = commands_utils.build_requests(query, "url", per_market=True)
+    assert [(market, page["markets"], page["range"]) for market, _, page in request_list] == [
+        ('america', ['america'], [0, 100]), ('america', ['america'], [100, 200]), ('america', ['america'], [200, 250]),
+        ('germany', ['germany'], [0, 100]), ('germany', ['germany'], [100, 200]), ('germany', ['germany'], [200, 250])]
+    assert request_list[0][1] == 'https://scanner.tradingview.com/america/scan'
+    assert request_list[0][2]["columns"] == ["name", "change"]
+    assert query["columns"] == ["name"]
+
+def test_requests_market_data(mocker, query_vars):
+    market_data = {
+        'america': {'totalCount': 2, 'data': [{'s': 'NASDAQ:NVDA', 'd': ['NVDA', 5.0]},
+                                              {'s': 'NYSE:TSLA', 'd': ['TSLA', 1.0]}]},
+        'germany': {'totalCount': 2, 'data': [{'s': 'XETR:SAP', 'd': ['SAP', 3.0]},
+                                              {'s': 'NASDAQ:NVDA', 'd': ['NVDA', 5.0]}]}
+    }
+    def post(url, json, headers):
+        response = mocker.Mock()
+        response.status_code = 200
+        response.json.return_value = market_data[json["markets"][0]]
+        return response
+    query_vars.markets = ['america', 'germany']
+    query_vars.my_query = {"columns": ["name"], "markets": ['america', 'germany'],
+                           "sort": {"sortBy": "change", "sortOrder": "desc"}, "range": [1, 3]}
+    mock_requests = mocker.patch("fetch_engine.requests.post", side_effect=post)
+
+    api_test = commands_utils.requests_market_data()
+    assert mock_requests.call_count == 2
+    assert mock_requests.call_args.kwargs["json"]["columns"] == ["name", "change"]
+    assert mock_requests.call_args.kwargs["json"]["range"] == [0, 3]
+    assert api_test == {'totalCount': 3, 'data': [{'s': 'XETR:SAP', 'd': ['SAP']}, {'s': 'NYSE:TSLA', 'd': ['TSLA']}]}
+
+    mock_requests.side_effect = None
+    mock_requests.return_value.status_code = 404
+    with pytest.raises(Exception, match=r"Could not fetch any data from API."):
+        commands_utils.requests_market_data()
+
 @pytest.mark.parametrize("column", [
     "name", "open", "close", "low", "high", "volume", "float_shares_outstanding_current", "market_cap_basic"
 ])
@@ -57,6 +100,7 @@ def test_clean_fetched_data(column: str, query_vars):
         {}, 
         helper_data. header_chars_test)
     query_vars.txt_headers = [header for header in list(query_vars.col_headers)[1:]]
+    query_vars.schema = QuerySchema.build(helper_data.query_test["columns"], query_vars.col_headers, [], [], {})
 
     test_df: pd.DataFrame = commands_utils.clean_fetched_data(helper_data.json_data_test)
     expected_df = pd.DataFrame(
@@ -90,6 +134,8 @@ def test_clean_fetched_data_custom_headers(column: str, query_vars):
     assert query_vars.int_cols == ['D1', 'F1', 'G1', 'I1']
     assert query_vars.float_cols == ['C1']
     assert query_vars.float_decimals == {"C1": 2}
+    query_vars.schema = QuerySchema.build(helper_data.query_test["columns"], query_vars.col_headers, 
+                                          query_vars.int_cols, query_vars.float_cols, query_vars.float_decimals)
 
     test_df = commands_utils.clean_fetched_data(helper_data.json_data_test)
     expected_df = pd.DataFrame(
@@ -123,6 +169,12 @@ def test_create_screener_data(query_vars):
         {}, 
         helper_data.header_chars_test)
     query_vars.txt_headers = [header for header in list(query_vars.col_headers)[1:]]
+    _, int_cols, float_cols, float_decimals = query_vars.get_column_header_data(
+        helper_data.query_test["columns"],
+        helper_data.headers_test, 
+        helper_data.header_chars_test)
+    query_vars.schema = QuerySchema.build(helper_data.query_test["columns"], query_vars.col_headers, 
+                                          int_cols, float_cols, float_decimals)
 
     test_df: pd.DataFrame = commands_utils.clean_fetched_data(helper_data.json_data_test)
     df_dict = test_df.to_dict()
@@ -171,4 +223,21 @@ def test_delete_workbook(mocker):
     assert commands_utils.delete_workbook("test") == 0
 
     mock_listdir.assert_called_once()
-    mock_rmtree.assert_called_once()
\ No newline at end of file
+    mock_rmtree.assert_called_once()
+
+def test_snapshot_per_workbook(monkeypatch, tmp_path, capsys):
+    monkeypatch.setattr(FilePaths, 'WB_FILES_ROOT_PATH', tmp_path)
+    query = {"columns": ["name", "close"], "sort": {"sortBy": "close", "sortOrder": "desc"}}
+    for wb_name, closes in (('broad', [1.0, 3.0]), ('narrow', [2.0])):
+        (tmp_path/wb_name/'data').mkdir(parents=True)
+        monkeypatch.setattr(FilePaths, 'wb_name', wb_name, raising=False)
+        commands_utils.save_snapshot({"totalCount": len(closes), 
+                                      "data": [{"s": f"X:S{i}", "d": [f"S{i}", c]} for i, c in enumerate(closes)]},
+                                     query)
+
+    assert commands_utils.filter_snapshot(query, 'broad')["data"] == [{"s": "X:S1", "d": ["S1", 3.0]}, 
+                                                                      {"s": "X:S0", "d": ["S0", 1.0]}]
+    assert commands_utils.filter_snapshot(query, 'narrow')["totalCount"] == 1
+    assert commands_utils.filter_snapshot(query, 'missing') is None
+    assert commands_utils.filter_snapshot({"columns": ["name"], "filter": [{"operation": "greater"}]}, 'broad') is None
+    assert "missing key 'left'" in capsys.readouterr().out
\ No newline at end of file
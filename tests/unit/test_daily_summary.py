@@ -0,0 +1,84 @@
+"""Unit tests for daily_summary.py"""
+
+import datetime
+
+import openpyxl
+import pytest
+
+from custom.small_cap1.settings import SmallCap1Values
+from daily_summary import DailySummary
+from query import QueryVars, QuerySchema
+
+ROWS = [
+    (datetime.datetime(2025, 1, 2), 'NVDA', '1.50', 100),
+    (datetime.datetime(2025, 1, 2), 'AAPL', '2.50', '-'),
+    (datetime.datetime(2025, 1, 3), 'NVDA', '-', 300),
+]
+
+@pytest.fixture()
+def wb_path(tmp_path):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = 'Data'
+    ws.append(['Date', 'Symbol', 'Open', 'Volume'])
+    for row in ROWS:
+        ws.append(row)
+    path = tmp_path/'test.xlsx'
+    wb.save(path)
+    return path
+
+def test_build(wb_path):
+    summary = DailySummary.build(wb_path, 'Data', ['Open', 'Volume', 'Missing'])
+    assert summary.columns == ['Open', 'Volume', 'Missing']
+    assert summary.frame('count')['Missing'].tolist() == [0, 0]
+    assert summary.row_counts().to_dict() == {'2025-01-02': 2, '2025-01-03': 1}
+    means = summary.frame('mean')
+    assert means['Open'].iloc[0] == 2.0
+    assert means['Open'].isna().iloc[1]
+    assert means['Volume'].tolist() == [100, 300]
+    assert summary.frame('count')['Open'].tolist() == [2, 0]
+    assert summary.frame('max')['Open'].iloc[0] == 2.5
+    with pytest.raises(ValueError):
+        summary.frame('median')
+
+def test_add_row(wb_path):
+    summary = DailySummary.build(wb_path, 'Data', ['Open', 'Volume'])
+    summary.add_row('2025-01-03', {'Open': '4.00', 'Volume': 100})
+    summary.add_row('2025-01-06', {'Open': None})
+    assert summary.row_counts().to_dict() == {'2025-01-02': 2, '2025-01-03': 2, '2025-01-06': 1}
+    assert summary.frame('sum')['Volume'].tolist() == [100, 400, 0]
+    assert summary.frame('min')['Open'].iloc[1] == 4.0
+
+def test_load(wb_path, tmp_path):
+    summary_path = tmp_path/'daily_summary.json'
+    assert DailySummary.load_current(wb_path, 'Data', summary_path) is None
+    summary = DailySummary.load(wb_path, 'Data', summary_path, ['Open'])
+    assert DailySummary.load_current(wb_path, 'Data', summary_path).dates == summary.dates
+    assert DailySummary.load_current(wb_path, 'Data', summary_path, ['Open']).dates == summary.dates
+    assert DailySummary.load_current(wb_path, 'Data', summary_path, ['Open', 'Volume']) is None
+    assert DailySummary.load(wb_path, 'Data', summary_path, ['Open', 'Volume']).columns == ['Open', 'Volume']
+
+    wb = openpyxl.load_workbook(wb_path)
+    wb['Data'].delete_rows(4)
+    wb.save(wb_path)
+    assert DailySummary.load_current(wb_path, 'Data', summary_path) is None
+    assert list(DailySummary.load(wb_path, 'Data', summary_path, ['Open']).dates) == ['2025-01-02']
+
+def test_build_small_cap1(tmp_path):
+    settings = SmallCap1Values.SETTINGS
+    query_cols = settings["query"]["columns"]
+    schema = QuerySchema.build(query_cols, *QueryVars.get_column_header_data(
+        query_cols, settings["headers"], list(settings["headers"])))
+    columns = [spec.name for spec in schema.numeric_columns]
+    assert {'Open', 'Price', 'Low', 'High', 'Pre-market Open', 'Volume'} <= set(columns)
+
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = 'Data'
+    ws.append([spec.name for spec in schema.columns])
+    ws.append([datetime.datetime(2025, 1, 2), 'NVDA'] + [str(i) for i in range(len(columns))])
+    path = tmp_path/'small_cap1.xlsx'
+    wb.save(path)
+    means = DailySummary.build(path, 'Data', columns).frame('mean')
+    assert list(means.columns) == columns
+    assert means.iloc[0].tolist() == list(range(len(columns)))
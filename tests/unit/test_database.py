@@ -0,0 +1,63 @@
+"""Unit tests for database.py"""
+
+import datetime
+import sqlite3
+
+import pandas as pd
+
+import database
+from query import QueryVars, QuerySchema
+
+def test_typed_frame():
+    df = pd.DataFrame({'Date': [datetime.datetime(2025, 1, 2), datetime.datetime(2025, 1, 3)],
+                       'Symbol': ['NVDA', 'AAPL'],
+                       'Volume': ['-', 1000.0],
+                       'Price': ['1.50', '-']})
+    typed = database._typed_frame(df, ['date', 'str', 'int', 'float'])
+    assert typed.values.tolist() == [['2025-01-02', 'NVDA', None, 1.5], ['2025-01-03', 'AAPL', 1000, None]]
+
+def test_column_types(monkeypatch):
+    monkeypatch.setattr(QueryVars, 'schema', QuerySchema.build(
+        ['name', 'open', 'volume'], {'A1': 'Date', 'B1': 'Symbol', 'C1': 'Open', 'D1': 'Volume'}, ['D1'], ['C1'], {}),
+        raising=False)
+    assert database._column_types(['Day', 'Symbol', 'Volume', 'Old', 'Open']) == ['date', 'str', 'int', 'str', 'float']
+
+def test_with_occurrences():
+    df = pd.DataFrame([['2025-01-02', 'NVDA'], ['2025-01-02', 'AAPL'], ['2025-01-02', 'NVDA'], ['2025-01-03', 'NVDA']],
+                      columns=['Date', 'Symbol'])
+    assert database._with_occurrences(df)[database.OCCURRENCE_COLUMN].tolist() == [0, 0, 1, 0]
+
+def test_insert_skips_existing_rows():
+    connection = sqlite3.connect(':memory:')
+    headers = ['Date', 'Symbol', 'Price']
+    key = ['Date', 'Symbol']
+    assert database._table_columns(connection, 'sqlite', 'sheet1') is None
+    database._create_table(connection, 'sqlite', 'sheet1', headers, ['date', 'str', 'float'], key)
+    assert database._table_columns(connection, 'sqlite', 'sheet1') == headers
+    df = pd.DataFrame([['2025-01-02', 'NVDA', 1.0], ['2025-01-02', 'AAPL', 2.0]], columns=headers)
+    database._insert(connection, 'sqlite', 'sheet1', df, key, update=False)
+    df = pd.DataFrame([['2025-01-02', 'NVDA', 5.0], ['2025-01-03', 'NVDA', 3.0]], columns=headers)
+    database._insert(connection, 'sqlite', 'sheet1', df, key, update=False)
+
+    assert connection.execute('SELECT * FROM sheet1 ORDER BY Date, Symbol').fetchall() == [
+        ('2025-01-02', 'AAPL', 2.0), ('2025-01-02', 'NVDA', 1.0), ('2025-01-03', 'NVDA', 3.0)]
+    assert database._last_date(connection, 'sheet1', 'Date') == '2025-01-03'
+
+    database._insert(connection, 'sqlite', 'sheet1', 
+                     pd.DataFrame([['2025-01-02', 'NVDA', 5.0]], columns=headers), key, update=True)
+    assert connection.execute("SELECT Price FROM sheet1 WHERE Symbol = 'NVDA' AND Date = '2025-01-02'").fetchone() == (
+        5.0,)
+
+def test_insert_keeps_repeated_saves():
+    connection = sqlite3.connect(':memory:')
+    headers = ['Date', 'Symbol', 'Price', database.OCCURRENCE_COLUMN]
+    key = ['Date', 'Symbol', database.OCCURRENCE_COLUMN]
+    database._create_table(connection, 'sqlite', 'sheet1', headers, ['date', 'str', 'float', 'int'], key)
+    df = pd.DataFrame([['2025-01-02', 'NVDA', 1.0], ['2025-01-02', 'NVDA', 1.5]], columns=headers[:3])
+    database._insert(connection, 'sqlite', 'sheet1', database._with_occurrences(df), key, update=False)
+    df = pd.DataFrame([['2025-01-02', 'NVDA', 1.0], ['2025-01-02', 'NVDA', 1.5], ['2025-01-02', 'NVDA', 2.0]],
+                      columns=headers[:3])
+    database._insert(connection, 'sqlite', 'sheet1', database._with_occurrences(df), key, update=False)
+
+    assert connection.execute('SELECT Price, Occurrence FROM sheet1 ORDER BY Occurrence').fetchall() == [
+        (1.0, 0), (1.5, 1), (2.0, 2)]
@@ -0,0 +1,125 @@
+"""Unit tests for fetch_engine.py"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+import fetch_engine
+from fetch_engine import FetchEngine, TokenBucket
+
+@pytest.fixture()
+def engine():
+    FetchEngine.configure(concurrency=2, rate=1000, burst=10)
+    yield FetchEngine
+    FetchEngine.configure(concurrency=4, rate=2.0, burst=4)
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=20, capacity=2)
+
+    async def take(n):
+        for _ in range(n):
+            await bucket.acquire()
+
+    start = time.monotonic()
+    asyncio.run(take(2))
+    assert time.monotonic()-start < 0.04
+    asyncio.run(take(4))
+    assert time.monotonic()-start >= 0.19
+
+def test_configure_invalid():
+    with pytest.raises(ValueError):
+        FetchEngine.configure(concurrency=0)
+
+def test_run(mocker, engine):
+    in_flight = []
+    max_in_flight = []
+    lock = threading.Lock()
+    def post(url, json, headers):
+        with lock:
+            in_flight.append(url)
+            max_in_flight.append(len(in_flight))
+        time.sleep(0.02)
+        with lock:
+            in_flight.remove(url)
+        response = mocker.Mock()
+        response.status_code = 404 if url == 'bad' else 200
+        response.json.return_value = {'url': url}
+        return response
+    mocker.patch("fetch_engine.requests.post", side_effect=post)
+
+    results = fetch_engine.run([(f'url{i}', {}) for i in range(5)]+[('bad', {})])
+    assert [result[0] for result in results[:5]] == [{'url': f'url{i}'} for i in range(5)]
+    assert str(results[5]) == "Status code 404."
+    assert max(max_in_flight) == 2
+    assert fetch_engine.run([]) == []
+
+def test_run_throttled(mocker, engine):
+    responses = iter([(429, {'Retry-After': '0'}), (503, {}), (200, {})])
+    def post(url, json, headers):
+        response = mocker.Mock()
+        response.status_code, response.headers = next(responses)
+        response.json.return_value = {'url': url}
+        return response
+    mocker.patch("fetch_engine.requests.post", side_effect=post)
+    mocker.patch.object(FetchEngine, "backoff", 0)
+
+    results = fetch_engine.run([('url', {})])
+    assert results[0][0] == {'url': 'url'}
+    assert FetchEngine.limiter.limit == 2
+
+    responses = iter([(429, {})]*(FetchEngine.max_retries+1))
+    assert str(fetch_engine.run([('url', {})])[0]) == "Status code 429."
+
+def test_adaptive_limit():
+    limiter = fetch_engine.AdaptiveLimit(4)
+    limiter.on_throttle(time.monotonic(), 429, 0)
+    assert limiter.limit == 2
+    limiter.on_throttle(limiter.last_decrease-1, 429, 0)
+    assert limiter.limit == 2
+    limiter.on_success(time.monotonic(), 0.1)
+    assert limiter.limit == 2.5
+    limiter.on_success(time.monotonic(), 1.0)
+    assert limiter.limit == 1.25
+    for _ in range(10):
+        limiter.on_success(time.monotonic(), 0.1)
+    assert limiter.limit == 4
+
+def test_adaptive_limit_latency_step():
+    limiter = fetch_engine.AdaptiveLimit(4)
+    for _ in range(5):
+        limiter.on_success(time.monotonic(), 0.1)
+    limiter.on_success(time.monotonic(), 0.4)
+    assert limiter.limit == 2
+    for _ in range(20):
+        limiter.on_success(time.monotonic(), 0.4)
+    assert limiter.limit == 4
+    assert limiter.latency == pytest.approx(0.4, rel=0.01)
+
+def test_send_blocked_without_slot(mocker, engine):
+    response = mocker.Mock()
+    response.status_code = 200
+    mocker.patch("fetch_engine.requests.post", return_value=response)
+    FetchEngine.limiter.blocked_until = time.monotonic()+0.1
+
+    async def send():
+        slots = fetch_engine._Slots()
+        task = asyncio.create_task(fetch_engine._send('url', {}, slots))
+        await asyncio.sleep(0.05)
+        assert slots.in_flight == 0
+        await task
+        assert slots.in_flight == 0
+
+    asyncio.run(send())
+
+@pytest.mark.parametrize("headers, attempt, delay", [
+    ({'Retry-After': '5'}, 0, 5),
+    ({}, 0, 1),
+    ({}, 2, 4),
+    ({'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'}, 0, 0)
+])
+def test_retry_delay(mocker, headers, attempt, delay):
+    response = mocker.Mock()
+    response.headers = headers
+    assert fetch_engine._retry_delay(response, attempt) == delay
@@ -0,0 +1,85 @@
+"""Unit tests for custom/small_cap1/image_catalog.py"""
+
+import json
+import os
+
+import openpyxl
+import pytest
+
+from custom.small_cap1.c_workbook_tools import _link_images
+from custom.small_cap1.image_catalog import ImageCatalog, image_name, images_folder
+from paths import FilePaths
+
+@pytest.fixture
+def folder(tmp_path):
+    folder = tmp_path/'images'
+    folder.mkdir()
+    for name in ('NVDA 2025-01-02.png', 'NVDA 2025-01-02 D.png', 'AAPL 2025-01-03 D.png', 'notes.txt',
+                 'NVDA 2025-01-02.jpg'):
+        (folder/name).touch()
+    return folder
+
+def _set_mtime(folder, mtime_ns):
+    os.utime(folder, ns=(mtime_ns, mtime_ns))
+
+def test_image_name():
+    assert image_name('NVDA', '2025-01-02', 'intraday') == 'NVDA 2025-01-02.png'
+    assert image_name('NVDA', '2025-01-02', 'daily') == 'NVDA 2025-01-02 D.png'
+
+def test_scan(folder, tmp_path):
+    catalog = ImageCatalog.scan(folder)
+    assert catalog.files == {'NVDA 2025-01-02.png': ['NVDA', '2025-01-02', 'intraday'],
+                             'NVDA 2025-01-02 D.png': ['NVDA', '2025-01-02', 'daily'],
+                             'AAPL 2025-01-03 D.png': ['AAPL', '2025-01-03', 'daily']}
+    assert catalog.mtime == os.stat(folder).st_mtime_ns
+    assert catalog.images('NVDA', '2025-01-02') == {'intraday': folder/'NVDA 2025-01-02.png',
+                                                    'daily': folder/'NVDA 2025-01-02 D.png'}
+    assert catalog.images('AAPL', '2025-01-03') == {'daily': folder/'AAPL 2025-01-03 D.png'}
+    assert catalog.images('AAPL', '2025-01-02') == {}
+
+    known = {'AAPL 2025-01-03 D.png': ['AAPL', '2025-01-03', 'reused'],
+             'TSLA 2025-01-03.png': ['TSLA', '2025-01-03', 'intraday']}
+    catalog = ImageCatalog.scan(folder, known)
+    assert catalog.files['AAPL 2025-01-03 D.png'] == ['AAPL', '2025-01-03', 'reused']
+    assert 'TSLA 2025-01-03.png' not in catalog.files
+    assert ImageCatalog.scan(tmp_path/'missing').files == {}
+
+def test_load(folder, tmp_path):
+    catalog_path = tmp_path/'image_catalog.json'
+    _set_mtime(folder, 1_000_000_000)
+    assert len(ImageCatalog.load(folder, catalog_path).files) == 3
+    with open(catalog_path) as f:
+        stored = json.load(f)
+    assert (stored["folder"], stored["mtime"]) == (str(folder), 1_000_000_000)
+
+    # unchanged folder: stored catalog is used as is, without scanning
+    (folder/'TSLA 2025-01-03.png').touch()
+    _set_mtime(folder, 1_000_000_000)
+    assert 'TSLA 2025-01-03.png' not in ImageCatalog.load(folder, catalog_path).files
+
+    _set_mtime(folder, 2_000_000_000)
+    catalog = ImageCatalog.load(folder, catalog_path)
+    assert catalog.images('TSLA', '2025-01-03') == {'intraday': folder/'TSLA 2025-01-03.png'}
+    (folder/'NVDA 2025-01-02 D.png').unlink()
+    _set_mtime(folder, 3_000_000_000)
+    assert ImageCatalog.load(folder, catalog_path).images('NVDA', '2025-01-02') == {
+        'intraday': folder/'NVDA 2025-01-02.png'}
+
+    catalog_path.write_text('{')
+    assert len(ImageCatalog.load(folder, catalog_path).files) == 3
+
+def test_link_images(monkeypatch, tmp_path):
+    monkeypatch.setattr(FilePaths, 'PATH', tmp_path)
+    monkeypatch.setattr(FilePaths, 'data_path', tmp_path, raising=False)
+    images_folder().mkdir(parents=True)
+    for name in ('NVDA 2025-01-02.png', 'NVDA 2025-01-02 D.png', 'AAPL 2025-01-03 D.png'):
+        (images_folder()/name).touch()
+    ws = openpyxl.Workbook().active
+
+    linked, missing = _link_images(ws, [(2, 'NVDA', '2025-01-02'), (3, 'AAPL', '2025-01-03'),
+                                        (4, 'TSLA', '2025-01-03')])
+    assert linked == 2
+    assert missing == ['AAPL 2025-01-03.png', 'TSLA 2025-01-03.png', 'TSLA 2025-01-03 D.png']
+    assert ws['D2'].hyperlink.target == str(images_folder()/'NVDA 2025-01-02.png')
+    assert ws['E3'].hyperlink.target == str(images_folder()/'AAPL 2025-01-03 D.png')
+    assert (ws['D3'].value, ws['E3'].value, ws['D4'].hyperlink) == (None, 'Image', None)
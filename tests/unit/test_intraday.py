@@ -0,0 +1,90 @@
+"""Unit tests for intraday.py"""
+
+import copy
+import datetime
+
+import pytest
+
+import intraday
+from paths import FilePaths
+from query import QueryVars, QuerySchema
+import helpers.helper_data as helper_data
+
+@pytest.fixture()
+def intraday_wb(mocker, tmp_path):
+    mocker.patch.object(FilePaths, "data_path", tmp_path, create=True)
+    col_headers, int_cols, float_cols, float_decimals = QueryVars.get_column_header_data(
+        helper_data.query_test["columns"],
+        helper_data.headers_test,
+        helper_data.header_chars_test)
+    mocker.patch.object(QueryVars, "schema",
+                        QuerySchema.build(helper_data.query_test["columns"], col_headers,
+                                          int_cols, float_cols, float_decimals),
+                        create=True)
+    return tmp_path
+
+def _time(minute):
+    return datetime.datetime(2025, 1, 6, 4, minute)
+
+def test_append(intraday_wb):
+    data = copy.deepcopy(helper_data.saved_query_data)
+    assert intraday.append(data, _time(0)) == 5
+    assert intraday.append(data, _time(5)) == 0
+    data[4][2] = 150
+    assert intraday.append(data, _time(10)) == 1
+    data.append(['TEST', '-', 1, 1.0, 1, 100, '-', 1000])
+    assert intraday.append(data, _time(15)) == 1
+    assert [f.name for f in (intraday_wb/'intraday').iterdir()] == ['2025-01-06']
+    assert len(list((intraday_wb/'intraday'/'2025-01-06').iterdir())) == 4
+
+    assert intraday.history('NVDA', _time(0), _time(15))['close'].tolist() == [140, 150]
+    assert sorted(f.name for f in (intraday_wb/'intraday').iterdir()) == ['2025-01-06', '2025-01-06.npz']
+    assert list((intraday_wb/'intraday'/'2025-01-06').iterdir()) == []
+    intraday._day_states.clear()
+    assert intraday.append(data, _time(20)) == 0
+    data[0][2] = 1
+    assert intraday.append(data, _time(25)) == 1
+    assert len(intraday.history('NVDA', _time(0), _time(25), fill=True).index) == 6
+
+def test_append_changed_columns(intraday_wb, mocker):
+    intraday.append(helper_data.saved_query_data, _time(0))
+    mocker.patch.object(QueryVars, "schema", QuerySchema(QueryVars.schema.columns[:-1]))
+    with pytest.raises(ValueError):
+        intraday.append([row[:-1] for row in helper_data.saved_query_data], _time(5))
+
+def test_append_removed_symbol(intraday_wb):
+    data = copy.deepcopy(helper_data.saved_query_data)
+    assert intraday.append(data, _time(0)) == 5
+    assert intraday.append([row for row in data if row[0] != 'NVDA'], _time(5)) == 0
+    assert intraday.append([row for row in data if row[0] != 'NVDA'], _time(10)) == 0
+    assert intraday.append(data, _time(15)) == 1
+
+    history = intraday.history('NVDA', _time(0), _time(15))
+    assert history['Time'].tolist() == [_time(0), _time(5), _time(15)]
+    assert history['close'].isna().tolist() == [False, True, False]
+    assert 'removed' not in history.columns
+    history = intraday.history('NVDA', _time(0), _time(15), fill=True)
+    assert history['Time'].tolist() == [_time(0), _time(15)]
+    assert len(intraday.history('NVDA', _time(7), _time(12)).index) == 0
+    assert len(intraday.history('NVDA', _time(7), _time(12), fill=True).index) == 0
+    intraday._day_states.clear()
+    assert intraday.append(data, _time(20)) == 0
+
+def test_history(intraday_wb):
+    data = copy.deepcopy(helper_data.saved_query_data)
+    for minute, close in ((0, 140), (5, 140), (10, 150), (15, 150), (20, 160)):
+        data[4][2] = close
+        intraday.append(data, _time(minute))
+
+    history = intraday.history('NVDA', _time(0), _time(20))
+    assert history['Time'].tolist() == [_time(0), _time(10), _time(20)]
+    assert history['close'].tolist() == [140, 150, 160]
+    history = intraday.history('NVDA', _time(7), _time(15))
+    assert history['Time'].tolist() == [_time(7), _time(10)]
+    assert history['close'].tolist() == [140, 150]
+    history = intraday.history('NVDA', _time(7), _time(15), fill=True)
+    assert history['Time'].tolist() == [_time(10), _time(15)]
+    assert history['close'].tolist() == [150, 150]
+    assert len(intraday.history('MISSING', _time(0), _time(20)).index) == 0
+    next_day = datetime.timedelta(days=1)
+    assert len(intraday.history('NVDA', _time(0)+next_day, _time(20)+next_day).index) == 0
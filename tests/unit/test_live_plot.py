@@ -0,0 +1,51 @@
+"""Unit tests for custom/small_cap1/live_plot.py"""
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+import custom.small_cap1.live_plot as live_plot
+from daily_summary import DailySummary
+import workbook_tools
+
+COLUMNS = ['Low', 'High', 'Price', 'Open']
+
+def _row(low, high, price, open_):
+    return dict(zip(COLUMNS, (low, high, price, open_)))
+
+@pytest.fixture
+def summary(monkeypatch):
+    summary = DailySummary(COLUMNS, {})
+    monkeypatch.setattr(workbook_tools, 'daily_summary', lambda: summary)
+    monkeypatch.setattr(workbook_tools, '_save_subscribers', [])
+    yield summary
+    plt.close('all')
+    plt.ioff()
+
+def test_live_average_candles(summary):
+    summary.add_row('2025-01-02', _row(1.0, 3.0, 2.0, 1.5))
+    view = live_plot.LiveAverageCandles()
+    assert workbook_tools._save_subscribers == [view.on_save]
+    fig = view.artists.fig
+    np.testing.assert_array_equal(view.artists.counts_line.get_ydata(), [1])
+
+    view.on_save('2025-01-02', [_row(2.0, 5.0, 4.0, 2.5)])
+    view.on_save('2025-01-03', [_row(1.0, 2.0, 1.5, 1.0), _row(1.0, 4.0, 2.5, 2.0), {'Symbol': 'NVDA'}])
+    assert view.artists.fig is fig
+    np.testing.assert_array_equal(view.artists.counts_line.get_ydata(), [2, 3])
+    assert len(view.artists.bodies.get_paths()) == 2
+    assert view.artists.ax_candles.get_ylim() == (0, 5.0)
+
+    view.close()
+    assert workbook_tools._save_subscribers == []
+    assert not plt.fignum_exists(fig.number)
+
+def test_live_average_candles_empty(summary):
+    view = live_plot.LiveAverageCandles()
+    assert view.artists is None
+    view.on_save('2025-01-02', [_row(1.0, 3.0, 2.0, 1.5)])
+    assert view.artists is not None
+    np.testing.assert_array_equal(view.artists.counts_line.get_ydata(), [1])
+    view.close()
@@ -0,0 +1,91 @@
+"""Unit tests for local_filter.py"""
+
+import pandas as pd
+import pytest
+
+from local_filter import evaluate, required_columns
+
+@pytest.fixture
+def snapshot():
+    return pd.DataFrame({
+        's': ['NASDAQ:NVDA', 'NASDAQ:AAPL', 'NYSE:TSLA', 'NASDAQ:ABCD'],
+        'name': ['NVDA', 'AAPL', 'TSLA', 'ABCD'],
+        'close': [120.5, 230.1, 410.0, 1.2],
+        'premarket_change': [8.5, -1.0, None, 45.0],
+        'float_shares_outstanding': [2.4e10, 1.5e10, 3.2e9, 4e6],
+        'type': ['stock', 'stock', 'stock', 'fund'],
+        'typespecs': [['common'], ['common'], ['common'], ['etf']]
+    })
+
+def _symbols(df):
+    return df['name'].tolist()
+
+def test_required_columns():
+    query = {"columns": ["name", "close"],
+             "filter": [{"left": "premarket_change", "operation": "greater", "right": 7},
+                        {"left": "close", "operation": "less", "right": "premarket_change"}],
+             "sort": {"sortBy": "float_shares_outstanding", "sortOrder": "asc"}}
+    assert required_columns(query) == ["name", "close", "premarket_change", "float_shares_outstanding"]
+
+def test_evaluate_filters(snapshot):
+    query = {"columns": ["name"],
+             "filter": [{"left": "premarket_change", "operation": "greater", "right": 7},
+                        {"left": "close", "operation": "in_range", "right": [1, 200]}]}
+    assert _symbols(evaluate(snapshot, query)) == ['NVDA', 'ABCD']
+    query["filter"].append({"left": "typespecs", "operation": "has_none_of", "right": ["etf"]})
+    assert _symbols(evaluate(snapshot, query)) == ['NVDA']
+    query = {"columns": ["name"], "filter": [{"left": "type", "operation": "in_range", "right": ["fund"]}]}
+    assert _symbols(evaluate(snapshot, query)) == ['ABCD']
+    query = {"columns": ["name"], "filter": [{"left": "premarket_change", "operation": "empty"}]}
+    assert _symbols(evaluate(snapshot, query)) == ['TSLA']
+    query = {"columns": ["name"], "symbols": {"tickers": ["NYSE:TSLA", "NASDAQ:AAPL"]}}
+    assert _symbols(evaluate(snapshot, query)) == ['AAPL', 'TSLA']
+
+def test_evaluate_column_reference(snapshot):
+    snapshot['Technology'] = snapshot['type']
+    snapshot['sector'] = ['Technology', 'Technology', 'stock', 'Finance']
+    query = {"columns": ["name"], "filter": [{"left": "sector", "operation": "equal", "right": "Technology"}]}
+    assert _symbols(evaluate(snapshot, query)) == ['NVDA', 'AAPL']
+    query["filter"][0]["operation"] = "nequal"
+    assert _symbols(evaluate(snapshot, query)) == ['TSLA', 'ABCD']
+    query = {"columns": ["name"], "filter": [{"left": "sector", "operation": "equal", "right": {"column": "type"}}]}
+    assert required_columns(query) == ["name", "sector", "type"]
+    assert _symbols(evaluate(snapshot, query)) == ['TSLA']
+    query = {"columns": ["name"],
+             "filter": [{"left": "close", "operation": "less", "right": {"column": "premarket_change"}}]}
+    assert _symbols(evaluate(snapshot, query)) == ['ABCD']
+    query = {"columns": ["name"], "filter": [{"left": "sector", "operation": "equal", "right": {"column": "missing"}}]}
+    with pytest.raises(ValueError):
+        evaluate(snapshot, query)
+
+def test_evaluate_sort_and_range(snapshot):
+    query = {"columns": ["name"],
+             "sort": {"sortBy": "premarket_change", "sortOrder": "desc"},
+             "range": [0, 3]}
+    assert _symbols(evaluate(snapshot, query)) == ['ABCD', 'NVDA', 'AAPL']
+    query["sort"]["nullsFirst"] = True
+    assert _symbols(evaluate(snapshot, query)) == ['TSLA', 'ABCD', 'NVDA']
+    query = {"columns": ["name"], "sort": {"sortBy": "name", "sortOrder": "asc"}, "range": [1, 2]}
+    assert _symbols(evaluate(snapshot, query)) == ['ABCD']
+
+def test_evaluate_filter2(snapshot):
+    stock = {"operation": {"operator": "and", "operands": [
+        {"expression": {"left": "type", "operation": "equal", "right": "stock"}},
+        {"expression": {"left": "typespecs", "operation": "has", "right": ["common"]}}]}}
+    cheap = {"expression": {"left": "close", "operation": "less", "right": 5}}
+    query = {"columns": ["name"],
+             "filter": [{"left": "premarket_change", "operation": "nempty"}],
+             "filter2": {"operator": "and", "operands": [{"operation": {"operator": "or", "operands": [stock, cheap]}}]}}
+    assert required_columns(query) == ["name", "premarket_change", "close", "typespecs", "type"]
+    assert _symbols(evaluate(snapshot, query)) == ['NVDA', 'AAPL', 'ABCD']
+    query["filter2"]["operands"].append({"operation": {"operator": "and", "operands": [stock]}})
+    assert _symbols(evaluate(snapshot, query)) == ['NVDA', 'AAPL']
+
+@pytest.mark.parametrize("query", [
+    {"columns": ["name", "volume"]},
+    {"columns": ["name"], "filter": [{"left": "close", "operation": "crosses", "right": 5}]},
+    {"columns": ["name"], "filter2": {"operator": "xor", "operands": []}}
+])
+def test_evaluate_unsupported(snapshot, query):
+    with pytest.raises(ValueError):
+        evaluate(snapshot, query)
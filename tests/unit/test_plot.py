@@ -0,0 +1,56 @@
+"""Unit tests for custom/small_cap1/plot.py"""
+
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.collections import QuadMesh
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pytest
+
+import custom.small_cap1.plot as plot
+
+@pytest.fixture
+def ax():
+    fig, ax = plt.subplots()
+    yield ax
+    plt.close(fig)
+
+def test_plot_line_gaps(ax):
+    plot._plot_line(ax, [1, 2, np.nan, np.nan, 5, 6, np.nan, 8])
+    line = ax.lines[0]
+    np.testing.assert_array_equal(line.get_xdata(), [0, 1, np.nan, 4, 5, np.nan, 7])
+    np.testing.assert_array_equal(line.get_ydata(), [1, 2, np.nan, 5, 6, np.nan, 8])
+
+def test_plot_line_downsampled_gap(ax):
+    y = np.sin(np.arange(2000)/50)
+    y[700:800] = np.nan
+    plot._plot_line(ax, y)
+    x = ax.lines[0].get_xdata()
+    assert len(x) == plot.LINE_POINTS+1
+    gap = np.flatnonzero(np.isnan(x))
+    assert len(gap) == 1 and x[gap[0]-1] < 700 and x[gap[0]+1] >= 800
+
+def _float_and_mc(n):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({'Open': rng.uniform(1, 10, n), 'High': rng.uniform(10, 20, n),
+                         'Float': 10**rng.uniform(5, 9, n), 'Market Cap': 10**rng.uniform(6, 10, n)})
+
+@pytest.mark.parametrize('n, panels', [(50, 1), (200, 2)])
+def test_high_to_open_vs_float_and_mc(monkeypatch, n, panels):
+    monkeypatch.setattr(plot.plot_cache, 'load', lambda columns: _float_and_mc(n))
+    monkeypatch.setattr(plot, 'DENSITY_THRESHOLD', 100)
+    figures = []
+    monkeypatch.setattr(plot, '_show_or_save', lambda save_path: figures.append(plt.gcf()))
+    plot.show_high_to_open_vs_float_and_mc()
+    fig = figures[0]
+    axes = [ax for ax in fig.axes if ax.get_yscale() == 'log' and ax.get_label() != '<colorbar>']
+    assert len(axes) == panels
+    if panels == 2:
+        meshes = [ax.collections for ax in axes]
+        assert all(len(collections) == 1 and isinstance(collections[0], QuadMesh) for collections in meshes)
+        # each panel holds one series: float and market cap counts both sum to all rows
+        assert [int(collections[0].get_array().sum()) for collections in meshes] == [n, n]
+    else:
+        assert len(axes[0].collections) == 2
+    plt.close(fig)
@@ -0,0 +1,79 @@
+"""Unit tests for custom/small_cap1/plot_batch.py"""
+
+import concurrent.futures
+
+import pandas as pd
+import pytest
+
+import custom.small_cap1.plot as plot
+import custom.small_cap1.plot_batch as plot_batch
+import workbook_tools
+from paths import FilePaths
+from query import QueryVars
+from sheets import WorkbookSheets
+
+class InlineExecutor:
+    """Runs submitted calls immediately in the test process and records worker initializer arguments."""
+    initargs = []
+
+    def __init__(self, max_workers=None, initializer=None, initargs=()):
+        InlineExecutor.initargs.append(initargs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def submit(self, function, *args):
+        future = concurrent.futures.Future()
+        try:
+            future.set_result(function(*args))
+        except Exception as err:
+            future.set_exception(err)
+        return future
+
+@pytest.fixture
+def calls(monkeypatch, tmp_path):
+    calls = []
+    def record(name):
+        def plot_function(*args, save_path):
+            if args == ('2025-01-03',):
+                raise ValueError('no data')
+            calls.append((name, *args, save_path))
+        return plot_function
+    for name in plot_batch.PLOTS.values():
+        monkeypatch.setattr(plot, name, record(name))
+    monkeypatch.setattr(plot_batch.plot_cache, 'load',
+                        lambda columns: pd.DataFrame({'Date': ['2025-01-02', '2025-01-02', '2025-01-03',
+                                                               '2025-01-06']}))
+    monkeypatch.setattr(workbook_tools, 'daily_summary', lambda: calls.append(('daily_summary',)))
+    monkeypatch.setattr(FilePaths, 'data_path', tmp_path, raising=False)
+    monkeypatch.setattr(FilePaths, 'wb_name', 'test', raising=False)
+    monkeypatch.setattr(WorkbookSheets, 'sheet_names', ['Data', 'Data2'], raising=False)
+    monkeypatch.setattr(QueryVars, 'schema', 'schema', raising=False)
+    monkeypatch.setattr(InlineExecutor, 'initargs', [])
+    monkeypatch.setattr(plot_batch.concurrent.futures, 'ProcessPoolExecutor', InlineExecutor)
+    return calls
+
+def test_render(calls, tmp_path):
+    saved = plot_batch.render(['float', 'daily cs'], since='2025-01-03', image_format='svg')
+    plots = tmp_path/'plots'
+    assert plots.is_dir()
+    assert saved == [plots/'float.svg', plots/'daily_cs_2025-01-06.svg']
+    assert calls == [('show_high_to_open_vs_float_and_mc', plots/'float.svg'),
+                     ('show_daily_candles', '2025-01-06', plots/'daily_cs_2025-01-06.svg')]
+    assert InlineExecutor.initargs == [('test', ['Data', 'Data2'], 'schema')]
+
+    calls.clear()
+    saved = plot_batch.render(['avg daily', 'daily cs'], until='2025-01-02')
+    assert saved == [plots/'avg_daily.png', plots/'daily_cs_2025-01-02.png']
+    assert calls[0] == ('daily_summary',)
+    assert plot_batch.render(['daily cs'], since='2025-02-01') == []
+
+def test_render_invalid(calls):
+    with pytest.raises(ValueError):
+        plot_batch.render(['avg daily', 'pie'])
+    with pytest.raises(ValueError):
+        plot_batch.render(['dist'], image_format='jpg')
+    assert calls == []
@@ -0,0 +1,107 @@
+"""Unit tests for custom/small_cap1/plot_cache.py"""
+
+import datetime
+import os
+
+import openpyxl
+import pytest
+
+import custom.small_cap1.plot_cache as plot_cache
+from paths import FilePaths
+
+ROWS = [
+    (datetime.datetime(2025, 1, 2), 'NVDA', '1.50', 100),
+    (datetime.datetime(2025, 1, 2), 'AAPL', '-', 200),
+    (datetime.datetime(2025, 1, 3), 'NVDA', '2.50', 300),
+]
+
+def _create_workbook(path, rows):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = 'Data'
+    ws.append(['Date', 'Symbol', 'Open', 'Volume'])
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    plot_cache.clear()
+    yield
+    plot_cache.clear()
+
+@pytest.fixture
+def reads(monkeypatch):
+    reads = []
+    read_workbook = plot_cache._read_workbook
+    def counted(wb_path):
+        reads.append(wb_path)
+        return read_workbook(wb_path)
+    monkeypatch.setattr(plot_cache, '_read_workbook', counted)
+    return reads
+
+@pytest.fixture
+def wb_path(tmp_path, monkeypatch):
+    (tmp_path/'data').mkdir()
+    path = tmp_path/'test.xlsx'
+    _create_workbook(path, ROWS)
+    monkeypatch.setattr(FilePaths, 'wb_path', path, raising=False)
+    return path
+
+def test_load(wb_path, reads):
+    df = plot_cache.load()
+    assert df['Date'].tolist() == ['2025-01-02', '2025-01-02', '2025-01-03']
+    assert df['Symbol'].tolist() == ['NVDA', 'AAPL', 'NVDA']
+    assert df['Open'].iloc[0] == 1.5 and df['Open'].isna().iloc[1]
+    assert plot_cache.load(['Volume', 'Date']).columns.tolist() == ['Volume', 'Date']
+    assert len(reads) == 1
+
+    # callers get copies
+    df['Open'] = 0
+    assert plot_cache.load(['Open'])['Open'].iloc[0] == 1.5
+
+    # disk cache is used after memory cache is emptied
+    plot_cache.clear()
+    assert plot_cache.load(['Volume'])['Volume'].tolist() == [100, 200, 300]
+    assert len(reads) == 1
+    assert (wb_path.parent/'data'/'plot_cache.pkl').exists()
+
+def test_load_changed_workbook(wb_path, reads):
+    plot_cache.load()
+    stat = os.stat(wb_path)
+    _create_workbook(wb_path, ROWS+[(datetime.datetime(2025, 1, 6), 'TSLA', '3.00', 400)])
+    os.utime(wb_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert plot_cache.load(['Symbol'])['Symbol'].tolist() == ['NVDA', 'AAPL', 'NVDA', 'TSLA']
+    assert len(reads) == 2
+
+    # same size, different modification time
+    os.utime(wb_path, ns=(stat.st_atime_ns, stat.st_mtime_ns+1_000_000_000))
+    plot_cache.load()
+    assert len(reads) == 3
+
+    (wb_path.parent/'data'/'plot_cache.pkl').write_bytes(b'not a pickle')
+    plot_cache.clear()
+    assert len(plot_cache.load().index) == 4
+    assert len(reads) == 4
+
+def test_has_date(wb_path):
+    assert plot_cache.has_date('2025-01-03')
+    assert not plot_cache.has_date('2025-01-04')
+
+def test_load_many(tmp_path, reads):
+    wb_paths = []
+    for name, symbol in (('a', 'NVDA'), ('b', 'AAPL'), ('c', 'TSLA')):
+        path = tmp_path/f'{name}.xlsx'
+        _create_workbook(path, [(datetime.datetime(2025, 1, 2), symbol, '1.00', 100)])
+        wb_paths.append(path)
+    plot_cache.load(wb_path=wb_paths[1])
+
+    order = [wb_paths[2], wb_paths[0], wb_paths[1]]
+    frames = plot_cache.load_many(order, ['Symbol'])
+    assert [df['Symbol'].iloc[0] for df in frames] == ['TSLA', 'NVDA', 'AAPL']
+    # workbooks loaded by worker processes are kept in memory cache
+    assert [df['Symbol'].iloc[0] for df in plot_cache.load_many(order, ['Symbol'])] == ['TSLA', 'NVDA', 'AAPL']
+    assert reads == [wb_paths[1]]
+
+    with pytest.raises(FileNotFoundError):
+        plot_cache.load_many([tmp_path/'missing.xlsx'])
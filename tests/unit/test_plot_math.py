@@ -0,0 +1,57 @@
+"""Unit tests for custom/small_cap1/plot_math.py"""
+
+import numpy as np
+import pytest
+
+from custom.small_cap1.plot_math import Buckets, log_edges, lttb, short_number
+
+def _loop_counts(edges, values):
+    """Counts values bucket by bucket, like show_distributions did before Buckets."""
+    bounds = [-np.inf]+list(edges)+[np.inf]
+    return [sum(1 for v in values if not np.isnan(v) and low <= v and (v < high or high == np.inf))
+            for low, high in zip(bounds, bounds[1:])]
+
+def test_short_number():
+    assert [short_number(v) for v in (2.5e8, 1e9, 5e4, -2e6, 12)] == ['250M', '1B', '50K', '-2M', '12']
+
+@pytest.mark.parametrize("edges", [(5e7, 2.5e8), (-20, -10, -1, 1, 10, 20), ()])
+def test_buckets_counts(edges):
+    rng = np.random.default_rng(0)
+    values = np.concatenate([rng.normal(0, 3e8, 1000), rng.normal(0, 15, 1000), edges, [np.nan, -np.inf, np.inf]])
+    assert Buckets(edges).counts(values).tolist() == _loop_counts(edges, values)
+
+def test_buckets_boundaries():
+    buckets = Buckets((-1, 1), ('down', 'flat', 'up'))
+    assert buckets.counts([-1, 1, -1.0001, 0.9999, np.nan]).tolist() == [1, 2, 1]
+    assert buckets.counts([]).tolist() == [0, 0, 0]
+    assert buckets.labels() == ['down - <-1', 'flat - [-1, 1)', 'up - >=1']
+    assert Buckets(()).ranges() == ['all']
+    with pytest.raises(ValueError):
+        Buckets((2, 1))
+    with pytest.raises(ValueError):
+        Buckets((1, 2), ('a', 'b'))
+
+@pytest.mark.parametrize("n, points", [(1000, 100), (10, 3), (501, 500), (7, 5)])
+def test_lttb(n, points):
+    x = np.arange(n)
+    y = np.sin(x/7)
+    kept = lttb(x, y, points)
+    assert len(kept) == points
+    assert (kept[0], kept[-1]) == (0, n-1)
+    assert (np.diff(kept) > 0).all()
+
+def test_lttb_keeps_peak():
+    y = np.zeros(1000)
+    y[437] = 10
+    assert 437 in lttb(np.arange(1000), y, 20)
+
+@pytest.mark.parametrize("n, points", [(10, 10), (10, 20), (10, 2), (0, 5)])
+def test_lttb_all_points(n, points):
+    assert lttb(np.arange(n), np.arange(n), points).tolist() == list(range(n))
+
+def test_log_edges():
+    edges = log_edges(np.array([0.0, -5.0, 10.0, 1000.0, np.nan]), 4)
+    np.testing.assert_allclose(edges, [10, 10**1.5, 100, 10**2.5, 1000])
+    np.testing.assert_allclose(log_edges(np.array([100.0, 100.0]), 2), [10**1.5, 100, 10**2.5])
+    np.testing.assert_allclose(log_edges(np.array([0.0, -1.0]), 2), [1, 10**0.5, 10])
+    np.testing.assert_allclose(log_edges(np.array([]), 2), [1, 10**0.5, 10])
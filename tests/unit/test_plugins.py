@@ -0,0 +1,27 @@
+"""Unit tests for plugins.py"""
+
+import json
+
+import pytest
+
+from paths import FilePaths
+import plugins
+
+def test_discover(tmp_path):
+    for name, metadata in (('valid', {"description": "Valid", "entry_points": {"create": "tools:create"}}),
+                           ('no_create', {"entry_points": {"commands": "c_commands:select"}}),
+                           ('_private', {"entry_points": {"create": "tools:create"}})):
+        (tmp_path/name).mkdir()
+        (tmp_path/name/plugins.METADATA_FILE).write_text(json.dumps(metadata))
+    (tmp_path/'no_metadata').mkdir()
+    (tmp_path/'invalid').mkdir()
+    (tmp_path/'invalid'/plugins.METADATA_FILE).write_text('{')
+    packages = plugins.discover(tmp_path)
+    assert list(packages) == ['valid']
+    assert packages['valid'] == plugins.CustomPackage('valid', 'Valid', {"create": "tools:create"})
+
+def test_load():
+    package = plugins.discover(FilePaths.PATH/'custom')['small_cap1']
+    assert package.load('create').__name__ == 'create_custom_wb'
+    with pytest.raises(KeyError):
+        package.load('missing')
@@ -6,7 +6,7 @@ import pathlib
 import pytest
 
 from paths import FilePaths
-from query import QueryVars
+from query import QueryVars, QuerySchema
 import helpers.helper_data as helper_data
 
 @pytest.fixture
@@ -34,6 +34,12 @@ def test_header_values(query_vars):
                                              'Q','R','S','T','U','V','W','X','Y','Z','AA']
     for counter in range(0, 27):
         query_vars.my_query["columns"].append(f"val{counter}")
+    assert query_vars.get_header_values()[-3:] == ['AZ', 'BA', 'BB']
+    assert len(query_vars.get_header_values()) == 54
+    for counter in range(0, 200):
+        query_vars.my_query["columns"].append(f"wide_val{counter}")
+    assert query_vars.get_header_values()[-1] == 'IT'
+    query_vars.my_query["columns"] = ['name']*16384
     assert query_vars.get_header_values() == []
 
 def test_get_column_header_data():
@@ -49,8 +55,7 @@ def test_get_column_header_data():
 
 def test_update_query_variables(mocker, file_paths, query_vars):
     file_paths.settings_path = pathlib.Path(__file__) # any pathlib.Path suffices
-    mock_open = mocker.patch("query.open")
-    mock_json_load = mocker.patch("query.json.load")
+    mock_json_load = mocker.patch("query.SettingsStore.load")
     mock_json_load.return_value = helper_data.settings_test
     QueryVars.update_query_variables()
     
@@ -73,4 +78,28 @@ def test_update_query_variables(mocker, file_paths, query_vars):
     assert QueryVars.sheet_xlsx_int_cols == [4,6,7,9]
     assert QueryVars.sheet_xlsx_float_cols == [3]
 
-    assert mock_open.call_count == 1
\ No newline at end of file
+    assert [spec.index for spec in QueryVars.schema.columns] == [1, 2, 3, 4, 5, 6, 7, 8, 9]
+    assert [spec.name for spec in QueryVars.schema.data_columns] == [
+        'Symbol', 'open', 'close', 'low', 'High', 'volume', 'Float', 'Market Cap']
+    assert QueryVars.schema.numeric_columns == QueryVars.schema.converted_columns
+    assert [(spec.letter, spec.dtype, spec.decimals) for spec in QueryVars.schema.converted_columns] == [
+        ('C', 'float', 2), ('D', 'int', None), ('F', 'int', None), ('G', 'int', None), ('I', 'int', None)]
+
+    assert mock_json_load.call_count == 1
+
+
+def test_column_spec_convert():
+    schema = QuerySchema.build(['name', 'open', 'volume', 'float'], 
+                               {'A1': 'Date', 'B1': 'Symbol', 'C1': 'Open', 'D1': 'Volume', 'E1': 'Float'},
+                               ['D1'], ['C1', 'E1'], {'C1': 2})
+    symbol, open_price, volume, float_shares = schema.data_columns
+    assert schema.columns[0].dtype == 'date'
+    assert symbol.convert('NVDA') == 'NVDA'
+    assert (open_price.convert(100.999), open_price.number_format) == ('101.00', '0.00')
+    assert (volume.convert('123.9'), volume.number_format) == (123, '0')
+    assert volume.convert('-') == '-'
+    assert float_shares.convert(1.23456) == 1.23456
+    assert schema.numeric_columns == (open_price, volume, float_shares)
+    assert schema.converted_columns == (open_price, volume)
+    with pytest.raises(ValueError):
+        volume.convert('abc')
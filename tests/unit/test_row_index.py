@@ -0,0 +1,54 @@
+"""Unit tests for row_index.py"""
+
+import datetime
+
+import openpyxl
+import pytest
+
+from row_index import RowIndex, date_key, row_spans
+
+@pytest.fixture
+def row_index():
+    return RowIndex({'2025-01-02': [2, 3], '2025-01-03': [4, 5, 6], '2025-01-06': [7]},
+                    {'NVDA': [2, 4], 'AAPL': [3, 5], 'TSLA': [6, 7]})
+
+@pytest.mark.parametrize("value, output", [
+    (datetime.datetime(2025, 1, 2), '2025-01-02'),
+    (datetime.date(2025, 1, 2), '2025-01-02'),
+    ('2025/01/02', '2025-01-02'),
+    ('2025-01-02 00:00:00', '2025-01-02'),
+    (None, None)
+])
+def test_date_key(value, output):
+    assert date_key(value) == output
+
+def test_rows(row_index):
+    assert row_index.rows() == [2, 3, 4, 5, 6, 7]
+    assert row_index.rows(since='2025-01-03') == [4, 5, 6, 7]
+    assert row_index.rows(until='2025-01-03') == [2, 3, 4, 5, 6]
+    assert row_index.rows(since='2025-01-04', until='2025-01-05') == []
+    assert row_index.rows(since='2025-01-03', until='2025-01-06', symbols=['TSLA']) == [6, 7]
+    assert row_index.rows(symbols=['NVDA', 'AAPL']) == [2, 3, 4, 5]
+    assert row_index.rows(symbols=['MISSING']) == []
+
+def test_from_worksheet():
+    ws = openpyxl.Workbook().active
+    ws.append(['Date', 'Symbol'])
+    ws.append([datetime.datetime(2025, 1, 2), 'NVDA'])
+    ws.append([None, None])
+    ws.append(['2025/01/03', 'NVDA'])
+    index = RowIndex.from_worksheet(ws)
+    assert index.dates == {'2025-01-02': [2], '2025-01-03': [4]}
+    assert index.symbols == {'NVDA': [2, 4]}
+
+def test_find_and_add(row_index):
+    assert row_index.find('2025-01-03', 'AAPL') == 5
+    assert row_index.find('2025-01-06', 'AAPL') is None
+    assert row_index.find('2025-01-04', 'NVDA') is None
+    row_index.add(8, '2025-01-04', 'NVDA')
+    assert row_index.find('2025-01-04', 'NVDA') == 8
+    assert row_index.rows(since='2025-01-04', until='2025-01-05') == [8]
+
+def test_row_spans():
+    assert row_spans([]) == []
+    assert row_spans([2, 3, 4, 7, 9, 10]) == [(2, 4), (7, 7), (9, 10)]
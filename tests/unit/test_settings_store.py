@@ -0,0 +1,37 @@
+"""Unit tests for settings_store.py"""
+
+import json
+import os
+
+from settings_store import SettingsStore
+
+def test_load_uses_cache(tmp_path, mocker):
+    SettingsStore.clear()
+    path = tmp_path/'settings.json'
+    path.write_text(json.dumps({"type": "basic", "market": "global"}))
+    spy_load = mocker.spy(json, 'load')
+
+    assert SettingsStore.load(path) == {"type": "basic", "market": "global"}
+    settings = SettingsStore.load(path)
+    assert spy_load.call_count == 1
+    settings["market"] = "america"  # modifying returned object must not modify cache
+    assert SettingsStore.load(path)["market"] == "global"
+
+def test_load_reloads_changed_file(tmp_path):
+    SettingsStore.clear()
+    path = tmp_path/'settings.json'
+    path.write_text(json.dumps({"market": "global"}))
+    assert SettingsStore.load(path) == {"market": "global"}
+    path.write_text(json.dumps({"market": "america"}))
+    os.utime(path, ns=(0, 0))
+    assert SettingsStore.load(path) == {"market": "america"}
+
+def test_dump(tmp_path):
+    SettingsStore.clear()
+    path = tmp_path/'current_wb.json'
+    SettingsStore.dump(path, {"wb_name": "test"})
+    SettingsStore.dump(path, {"wb_name": "test2"})
+
+    assert json.loads(path.read_text()) == {"wb_name": "test2"}
+    assert SettingsStore.load(path) == {"wb_name": "test2"}
+    assert os.listdir(tmp_path) == ['current_wb.json']
@@ -0,0 +1,62 @@
+"""Unit tests for styles.py"""
+
+import datetime
+
+import openpyxl
+import pytest
+
+from query import QuerySchema
+from styles import StyledRows, column_style
+
+@pytest.fixture
+def schema():
+    return QuerySchema.build(['name', 'open', 'volume', 'close'],
+                             {'A1': 'Date', 'B1': 'Symbol', 'C1': 'Open', 'D1': 'Volume', 'E1': 'Price'},
+                             ['D1'], ['C1', 'E1'], {'C1': 2})
+
+@pytest.fixture
+def wb():
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = 'Data'
+    ws.append(['Date', 'Symbol', 'Open', 'Volume', 'Price'])
+    ws.append([datetime.datetime(2025, 1, 2), 'NVDA', '1.50', 100, 1.625])
+    ws.append([datetime.datetime(2025, 1, 2), 'AAPL', None, 200, 2.5])
+    notes = wb.create_sheet('Notes')
+    notes.append(['Date', 'Symbol'])
+    notes.append([datetime.datetime(2025, 1, 2), 'NVDA'])
+    return wb
+
+def test_column_style(schema):
+    assert [column_style(spec) for spec in schema.columns] == [
+        'datetime', None, 'float 0.00', 'int 0', 'float General']
+
+def test_apply(wb, schema):
+    styled = StyledRows({})
+    assert styled.apply(wb, ['Data', 'Notes', 'Missing'], schema) == 3
+    assert styled.rows == {'Data': 3, 'Notes': 2}
+    ws = wb['Data']
+    assert [ws[cell].style for cell in ('A2', 'B2', 'C2', 'D2', 'E2', 'C3')] == [
+        'datetime', 'Normal', 'float 0.00', 'int 0', 'float General', 'Normal']
+    assert ws['E2'].number_format == 'General'
+    assert (ws['A2'].number_format, ws['A2'].alignment.horizontal) == ('YYYY/MM/DD', 'left')
+    assert wb['Notes']['A2'].style == 'datetime'
+
+    ws.append([datetime.datetime(2025, 1, 3), 'TSLA', '2.00', 300, 2.0])
+    ws['D2'].style = 'Normal'
+    assert styled.apply(wb, ['Data', 'Notes'], schema) == 1
+    assert (ws['D4'].style, ws['D2'].style) == ('int 0', 'Normal')
+    assert styled.apply(wb, ['Data', 'Notes'], schema, first_row=2) == 4
+    assert ws['D2'].style == 'int 0'
+
+def test_load(wb, schema, tmp_path):
+    wb_path = tmp_path/'test.xlsx'
+    styled_path = tmp_path/'styled_rows.json'
+    wb.save(wb_path)
+    assert StyledRows.load_current(wb_path, styled_path) is None
+    assert StyledRows.load(wb_path, styled_path).rows == {}
+    StyledRows({'Data': 3}).store(wb_path, styled_path)
+    assert StyledRows.load(wb_path, styled_path).rows == {'Data': 3}
+    wb['Data'].append([datetime.datetime(2025, 1, 3), 'TSLA'])
+    wb.save(wb_path)
+    assert StyledRows.load_current(wb_path, styled_path) is None
@@ -0,0 +1,51 @@
+"""Unit tests for watch.py"""
+
+import datetime
+
+import pytest
+
+from query import FetchData
+import watch
+from watch import WatchSchedule
+
+def _dt(hour, minute, day=6):
+    return datetime.datetime(2025, 1, day, hour, minute)
+
+@pytest.mark.parametrize("schedule, after, fire", [
+    (WatchSchedule(5), _dt(4, 2), _dt(4, 5)),
+    (WatchSchedule(5), _dt(4, 5), _dt(4, 10)),
+    (WatchSchedule(15), _dt(23, 50), _dt(0, 0, day=7)),
+    (WatchSchedule.from_args(5, None, '04:00-09:30', None), _dt(1, 0), _dt(4, 0)),
+    (WatchSchedule.from_args(5, None, '04:00-09:30', None), _dt(9, 27), _dt(9, 30)),
+    (WatchSchedule.from_args(5, None, '04:00-09:30', None), _dt(9, 30), _dt(4, 0, day=7)),
+    (WatchSchedule.from_args(5, ['09:25', '09:00'], None, None), _dt(8, 0), _dt(9, 0)),
+    (WatchSchedule.from_args(5, ['09:25', '09:00'], None, None), _dt(9, 0), _dt(9, 25)),
+    (WatchSchedule.from_args(5, ['09:25', '09:00'], None, None), _dt(12, 0), _dt(9, 0, day=7))
+])
+def test_next_fire(schedule, after, fire):
+    assert schedule.next_fire(after) == fire
+
+@pytest.mark.parametrize("interval, at, window, tz", [
+    (0, None, None, None),
+    (5, ['9.00'], None, None),
+    (5, None, '09:30', None),
+    (5, None, '09:30-04:00', None),
+    (5, None, None, 'Not/AZone')
+])
+def test_from_args_invalid(interval, at, window, tz):
+    with pytest.raises(ValueError):
+        WatchSchedule.from_args(interval, at, window, tz)
+
+def test_watch(mocker, capsys):
+    mock_cycle = mocker.patch("watch._run_cycle", side_effect=[3, Exception("Could not fetch any data from API."), 2])
+    mock_sleep = mocker.Mock()
+    watch.watch(WatchSchedule(1), max_cycles=3, sleep=mock_sleep)
+
+    assert mock_cycle.call_count == 3
+    assert mock_sleep.call_count == 3
+    assert all(0 < call.args[0] <= 60 for call in mock_sleep.call_args_list)
+    output = capsys.readouterr().out
+    assert "cycle 1: 3 rows saved" in output
+    assert "cycle 2 failed: Could not fetch any data from API." in output
+    assert "cycle 3: 2 rows saved" in output
+    assert FetchData.session is None